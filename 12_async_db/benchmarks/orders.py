@@ -0,0 +1,91 @@
+'''
+Бенчмарк пропускной способности оформления заказов.
+
+Запуск из корня проекта:
+python -m benchmarks.orders --orders 2000 --concurrency 1 10 50
+
+Создает временную БД с товарами и отправляет заказы из нескольких позиций
+в приложение (через ASGI, без сети) с заданным числом параллельных запросов.
+Выводит заказов в секунду, задержки и долю отказов из-за нехватки товара.
+'''
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+from time import perf_counter
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from main import app
+from database import Base, get_session
+from models import Product
+
+async def run(orders: int, concurrency: int, products: int, stock: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), 'orders_bench.db')
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}', connect_args={'timeout': 30})
+    SessionMaker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionMaker() as session:
+        session.add_all([Product(name=f'Товар {i}', price=100 + i, stock=stock) for i in range(products)])
+        await session.commit()
+
+    async def override_get_session():
+        async with SessionMaker() as session:
+            yield session
+    app.dependency_overrides[get_session] = override_get_session
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def place_order(client: httpx.AsyncClient):
+        items = [
+            {'product_id': product_id, 'quantity': random.randint(1, 3)}
+            for product_id in random.sample(range(1, products + 1), k=random.randint(1, 5))
+        ]
+        payload = {'customer_name': 'Бенчмарк', 'delivery_address': 'Склад', 'items': items}
+        async with semaphore:
+            start = perf_counter()
+            response = await client.post('/orders', json=payload)
+            latencies.append((perf_counter() - start) * 1000)
+            statuses.append(response.status_code)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        start = perf_counter()
+        await asyncio.gather(*[place_order(client) for _ in range(orders)])
+        elapsed = perf_counter() - start
+
+    app.dependency_overrides.pop(get_session, None)
+    await engine.dispose()
+    return {
+        'orders_per_sec': orders / elapsed,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': statistics.quantiles(latencies, n=100)[98],
+        'rejected': statuses.count(409) / orders,
+        'errors': sum(status not in (200, 409) for status in statuses),
+    }
+
+async def main(orders: int, levels: list[int], products: int, stock: int):
+    # SQL-запросы движка приложения (echo=True) в бенчмарке не нужны
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    print(f'{orders} заказов, {products} товаров по {stock} шт.')
+    print(f'{"параллельно":>11} {"заказов/с":>10} {"p50":>10} {"p99":>10} {"отказы":>8} {"ошибки":>7}')
+    for concurrency in levels:
+        result = await run(orders, concurrency, products, stock)
+        print(
+            f'{concurrency:>11} {result["orders_per_sec"]:>10.0f} {result["p50_ms"]:7.1f} мс {result["p99_ms"]:7.1f} мс '
+            f'{result["rejected"]:>7.0%} {result["errors"]:>7}'
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--stock', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.concurrency, args.products, args.stock))
\ No newline at end of file
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from database import Base, engine
-from routers import products
+from routers import products, orders, reports
 
 app = FastAPI()
 
@@ -8,4 +8,6 @@ app = FastAPI()
 def root():
     return {'message': 'API каталога товаров готов к работе'}
 
-app.include_router(products.router)
\ No newline at end of file
+app.include_router(products.router)
+app.include_router(orders.router)
+app.include_router(reports.router)
\ No newline at end of file
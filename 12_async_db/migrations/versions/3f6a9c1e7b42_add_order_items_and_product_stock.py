@@ -0,0 +1,62 @@
+"""add order_items and product stock
+
+Revision ID: 3f6a9c1e7b42
+Revises: 80e50629d7ef
+Create Date: 2026-10-19 20:05:41.218873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9c1e7b42'
+down_revision: Union[str, Sequence[str], None] = '80e50629d7ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('stock', sa.Integer(), server_default='0', nullable=False))
+    # остатков существующих товаров мы не знаем, поэтому stock у них 0;
+    # in_stock приводим в соответствие с остатком, иначе товар показывается "в наличии",
+    # а условное списание отклоняет каждый его заказ - остаток задается через обновление товара
+    op.execute('UPDATE products SET in_stock = stock > 0')
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.CheckConstraint('quantity > 0', name='check_order_item_quantity_positive'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    # старые заказы с одним товаром переносим в позиции: одна штука по сумме заказа
+    op.execute(
+        'INSERT INTO order_items (order_id, product_id, quantity, unit_price) '
+        'SELECT id, product_id, 1, total_price FROM orders WHERE product_id IS NOT NULL'
+    )
+    # SQLite не умеет удалять столбец с внешним ключом, поэтому таблица пересоздается
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.drop_column('product_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.add_column(sa.Column('product_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_orders_product_id_products', 'products', ['product_id'], ['id'])
+    # в заказ возвращается товар первой позиции
+    op.execute(
+        'UPDATE orders SET product_id = '
+        '(SELECT product_id FROM order_items WHERE order_items.order_id = orders.id ORDER BY id LIMIT 1)'
+    )
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_table('order_items')
+    op.drop_column('products', 'stock')
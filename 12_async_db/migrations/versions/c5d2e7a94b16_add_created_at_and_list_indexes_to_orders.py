@@ -0,0 +1,36 @@
+"""add created_at and list indexes to orders
+
+Revision ID: c5d2e7a94b16
+Revises: 3f6a9c1e7b42
+Create Date: 2026-10-19 20:41:09.530217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e7a94b16'
+down_revision: Union[str, Sequence[str], None] = '3f6a9c1e7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite не умеет добавлять столбец со значением по умолчанию CURRENT_TIMESTAMP, поэтому таблица пересоздается;
+    # у существующих заказов created_at станет временем миграции
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+    op.create_index('ix_orders_customer_name_id', 'orders', ['customer_name', 'id'], unique=False)
+    op.create_index('ix_orders_status_id', 'orders', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_status_id', table_name='orders')
+    op.drop_index('ix_orders_customer_name_id', table_name='orders')
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.drop_column('created_at')
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""add order report rollups
+
+Revision ID: d83a5f0c6e21
+Revises: c5d2e7a94b16
+Create Date: 2026-10-19 21:17:52.804316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd83a5f0c6e21'
+down_revision: Union[str, Sequence[str], None] = 'c5d2e7a94b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('product_daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    # заполняем итоги по уже существующим заказам (то же самое делает python rebuild_reports.py)
+    op.execute(
+        'INSERT INTO order_daily_stats (day, status, orders_count, revenue) '
+        'SELECT date(created_at), status, COUNT(id), SUM(total_price) FROM orders '
+        'GROUP BY date(created_at), status'
+    )
+    op.execute(
+        'INSERT INTO product_daily_sales (day, product_id, quantity, revenue) '
+        'SELECT date(orders.created_at), order_items.product_id, SUM(order_items.quantity), '
+        'SUM(order_items.quantity * order_items.unit_price) '
+        'FROM order_items JOIN orders ON orders.id = order_items.order_id '
+        'GROUP BY date(orders.created_at), order_items.product_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_daily_sales')
+    op.drop_table('order_daily_stats')
\ No newline at end of file
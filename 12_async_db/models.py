@@ -1,5 +1,5 @@
 # ForeignKey - класс для определения зависимости между двумя столбцами
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, CheckConstraint, Index, func
 # relationship() - функция для создания связи на уровне классов
 from sqlalchemy.orm import relationship
 from database import Base
@@ -12,6 +12,8 @@ class Product(Base):
     description = Column(String, nullable=True)             
     price = Column(Float, nullable=False)            
     in_stock = Column(Boolean, default=True)
+    # количество товара на складе (уменьшается при оформлении заказа)
+    stock = Column(Integer, nullable=False, default=0, server_default='0')
 
 # модель таблицы заказов
 class Order(Base):
@@ -19,12 +21,60 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     customer_name = Column(String, nullable=False)
+    # сумма заказа считается на сервере по позициям заказа
     total_price = Column(Float, nullable=False)
-    # создаем связь "один ко многим": заказ -> товары
-    product_id = Column(Integer, ForeignKey('products.id'))
-    # создаем связь с классом Product, объект Order сможет обращаться к полям Product напрямую
-    product = relationship('Product')
+    # позиции заказа (связь "один ко многим": заказ -> позиции)
+    items = relationship('OrderItem', back_populates='order', cascade='all, delete-orphan')
     # новое поле со статусом заказа (по умолчанию - Новый)
     status = Column(String, default='Новый', nullable=False)
     # новое поле с адресом доставки
-    delivery_address = Column(String, nullable=False)
\ No newline at end of file
+    delivery_address = Column(String, nullable=False)
+    # время оформления заказа (ставит база)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    # индексы под список заказов: фильтр по покупателю или статусу + постраничный вывод по ID
+    __table_args__ = (
+        Index('ix_orders_customer_name_id', 'customer_name', 'id'),
+        Index('ix_orders_status_id', 'status', 'id'),
+    )
+    # created_at заполняет база: сразу читаем его после INSERT, а не отдельным запросом при обращении
+    __mapper_args__ = {'eager_defaults': True}
+
+# модель позиции заказа: товар, количество и цена товара на момент заказа
+class OrderItem(Base):
+    __tablename__ = 'order_items'
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+
+    order = relationship('Order', back_populates='items')
+    product = relationship('Product')
+
+    __table_args__ = (
+        CheckConstraint('quantity > 0', name='check_order_item_quantity_positive'),
+    )
+
+# сводные таблицы для отчетов: обновляются в той же транзакции, что и заказы,
+# поэтому отчеты читают готовые итоги и не агрегируют таблицу заказов целиком
+# день заказа - дата created_at (время базы, UTC)
+
+# количество и сумма заказов за день в разрезе статуса
+class OrderDailyStats(Base):
+    __tablename__ = 'order_daily_stats'
+
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+# продажи товара за день: сколько штук и на какую сумму заказано
+class ProductDailySales(Base):
+    __tablename__ = 'product_daily_sales'
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,40 @@
+'''
+Заполнение и проверка сводных таблиц отчетов по заказам.
+
+Запуск из папки проекта:
+python rebuild_reports.py          # пересчитать сводные таблицы по заказам (например, после миграции)
+python rebuild_reports.py --check  # только сверить сводные таблицы с полным пересчетом
+
+С флагом --check код выхода 1 означает, что найдены расхождения.
+'''
+import argparse
+import asyncio
+import sys
+
+from database import AsyncSessionLocal, engine
+from repositories.reports_repository import rebuild_rollups, check_rollups
+
+async def main(check: bool) -> int:
+    async with AsyncSessionLocal() as session:
+        if check:
+            mismatches = await check_rollups(session)
+        else:
+            await rebuild_rollups(session)
+            mismatches = None
+    await engine.dispose()
+    if mismatches is None:
+        print('Сводные таблицы перестроены')
+        return 0
+    if not mismatches:
+        print('Сводные таблицы совпадают с полным пересчетом')
+        return 0
+    for table, keys in mismatches.items():
+        for key, (stored, actual) in sorted(keys.items()):
+            print(f'{table} {key}: в сводной таблице {stored}, по факту {actual}')
+    return 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заполнение и проверка сводных таблиц отчетов')
+    parser.add_argument('--check', action='store_true', help='только проверить, без перестроения')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
\ No newline at end of file
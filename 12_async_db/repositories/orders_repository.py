@@ -0,0 +1,141 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+from models import Product, Order, OrderItem
+from schemas import OrderCreate
+from repositories import reports_repository
+
+# позиции заказа и их товары подгружаются заранее двумя запросами с IN на всю страницу заказов:
+# в AsyncSession ленивая загрузка связи при обращении к атрибуту не работает,
+# а без предзагрузки на каждый заказ приходился бы отдельный запрос
+ORDER_LOAD_OPTIONS = (selectinload(Order.items).selectinload(OrderItem.product),)
+
+# ошибка: в заказе есть несуществующие товары
+class ProductsNotFoundError(Exception):
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f'Товары не найдены: {product_ids}')
+
+# ошибка: товара не хватает на складе
+class OutOfStockError(Exception):
+    def __init__(self, product_id: int):
+        self.product_id = product_id
+        super().__init__(f'Недостаточно товара на складе: {product_id}')
+
+# создание заказа из нескольких позиций
+# - все товары заказа загружаются одним запросом с IN
+# - сумма заказа считается на сервере по текущим ценам товаров
+# - остаток каждого товара уменьшается условным UPDATE ... WHERE stock >= количество:
+#   проверка и списание выполняются базой атомарно, поэтому параллельные заказы не продадут больше, чем есть
+# - все списания, сам заказ и итоги в сводных таблицах отчетов - одна транзакция:
+#   если хотя бы одного товара не хватает, откатывается весь заказ
+async def create_order(session: AsyncSession, order_data: OrderCreate) -> Order:
+    # одинаковые товары в нескольких позициях объединяем
+    quantities = Counter()
+    for item in order_data.items:
+        quantities[item.product_id] += item.quantity
+
+    result = await session.execute(select(Product.id, Product.price).where(Product.id.in_(quantities)))
+    prices = dict(result.all())
+    missing = sorted(set(quantities) - set(prices))
+    if missing:
+        raise ProductsNotFoundError(missing)
+
+    # списываем в порядке ID, чтобы параллельные транзакции блокировали строки в одном порядке
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        result = await session.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity, in_stock=Product.stock - quantity > 0)
+        )
+        if result.rowcount != 1:
+            await session.rollback()
+            raise OutOfStockError(product_id)
+
+    items = [
+        OrderItem(product_id=product_id, quantity=quantity, unit_price=prices[product_id])
+        for product_id, quantity in quantities.items()
+    ]
+    order = Order(
+        customer_name=order_data.customer_name,
+        delivery_address=order_data.delivery_address,
+        total_price=round(sum(item.quantity * item.unit_price for item in items), 2),
+        items=items,
+    )
+    session.add(order)
+    # записываем заказ, чтобы получить от базы created_at - по нему определяется день в отчетах
+    await session.flush()
+    await reports_repository.add_order(session, order, items)
+    await session.commit()
+    return await get_order(session, order.id)
+
+# смена статуса заказа вместе с переносом заказа между итогами статусов в отчетах
+# статус меняется условным UPDATE ... WHERE status = прочитанный статус: если другой запрос успел
+# поменять статус раньше, итоги пересчитываются от нового значения (повторяем попытку)
+async def update_order_status(session: AsyncSession, order_id: int, status: str) -> Order | None:
+    while True:
+        result = await session.execute(
+            select(Order.status, Order.total_price, Order.created_at).where(Order.id == order_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        if row.status == status:
+            break
+        result = await session.execute(
+            update(Order).where(Order.id == order_id, Order.status == row.status).values(status=status)
+        )
+        if result.rowcount == 1:
+            await reports_repository.move_order_status(
+                session, row.created_at.date(), row.total_price, row.status, status
+            )
+            await session.commit()
+            break
+        await session.rollback()
+    return await get_order(session, order_id)
+
+# получение заказа по ID вместе с позициями и товарами
+async def get_order(session: AsyncSession, order_id: int) -> Order | None:
+    query = (
+        select(Order)
+        .options(*ORDER_LOAD_OPTIONS)
+        .where(Order.id == order_id)
+        # заказ может уже быть в сессии (сразу после создания) - перечитываем его вместе со связями
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+# список заказов с фильтрами, новые заказы первыми
+# постраничный вывод по ключу: следующая страница начинается с заказов, у которых ID меньше before_id,
+# поэтому база не перебирает пропущенные строки, как при OFFSET;
+# фильтры по покупателю и статусу используют индексы (customer_name, id) и (status, id)
+async def get_orders_list(
+    session: AsyncSession,
+    customer_name: str | None = None,
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    before_id: int | None = None,
+    limit: int = 20
+) -> list[Order]:
+    query = select(Order).options(*ORDER_LOAD_OPTIONS)
+
+    if customer_name is not None:
+        query = query.where(Order.customer_name == customer_name)
+    if status is not None:
+        query = query.where(Order.status == status)
+    if created_from is not None:
+        query = query.where(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Order.created_at < created_to)
+    if before_id is not None:
+        query = query.where(Order.id < before_id)
+
+    query = query.order_by(Order.id.desc()).limit(limit)
+    result = await session.execute(query)
+    return result.scalars().all()
\ No newline at end of file
@@ -5,9 +5,15 @@ from sqlalchemy import select
 from models import Product
 from schemas import ProductCreate, ProductUpdate
 
+# наличие товара всегда определяется остатком на складе (как при списании в заказе),
+# переданный клиентом in_stock не учитывается, иначе товар мог бы числиться в наличии с нулевым остатком
+def sync_in_stock(product: Product):
+    product.in_stock = product.stock > 0
+
 # создать новый товар
 async def create_product(session: AsyncSession, product_data: ProductCreate) -> Product:
     new_product = Product(**product_data.model_dump())
+    sync_in_stock(new_product)
     session.add(new_product)
     await session.commit()
     return new_product
@@ -53,6 +59,7 @@ async def get_product(session: AsyncSession, product_id: int) -> Product | None:
 async def put_product(session: AsyncSession, product: Product, product_data: ProductCreate) -> Product:
     for field, value in product_data.model_dump().items():
         setattr(product, field, value)
+    sync_in_stock(product)
     await session.commit()
     return product
 
@@ -61,6 +68,7 @@ async def patch_product(session: AsyncSession, product: Product, product_data: P
     updates = product_data.model_dump(exclude_unset=True)
     for field, value in updates.items():
         setattr(product, field, value)
+    sync_in_stock(product)
     await session.commit()
     return product
 
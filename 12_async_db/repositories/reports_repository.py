@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Order, OrderItem, OrderDailyStats, ProductDailySales
+
+# изменяем итоги дня по статусу на orders_delta заказов и revenue_delta рублей
+# вызывается внутри транзакции репозитория заказов, поэтому итоги меняются вместе с заказами
+async def apply_status_delta(session: AsyncSession, day: date, status: str, orders_delta: int, revenue_delta: float):
+    statement = insert(OrderDailyStats).values(day=day, status=status, orders_count=orders_delta, revenue=revenue_delta)
+    statement = statement.on_conflict_do_update(
+        index_elements=[OrderDailyStats.day, OrderDailyStats.status],
+        set_={
+            'orders_count': OrderDailyStats.orders_count + orders_delta,
+            'revenue': OrderDailyStats.revenue + revenue_delta,
+        }
+    )
+    await session.execute(statement)
+
+# добавляем новый заказ в сводные таблицы (заказ уже записан в базу через flush, created_at известен)
+async def add_order(session: AsyncSession, order: Order, items: list[OrderItem]):
+    day = order.created_at.date()
+    await apply_status_delta(session, day, order.status, 1, order.total_price)
+    for item in items:
+        revenue = item.quantity * item.unit_price
+        statement = insert(ProductDailySales).values(
+            day=day, product_id=item.product_id, quantity=item.quantity, revenue=revenue
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ProductDailySales.day, ProductDailySales.product_id],
+            set_={
+                'quantity': ProductDailySales.quantity + item.quantity,
+                'revenue': ProductDailySales.revenue + revenue,
+            }
+        )
+        await session.execute(statement)
+
+# переносим заказ из итогов старого статуса в итоги нового (продажи товаров от статуса не зависят)
+async def move_order_status(session: AsyncSession, day: date, total_price: float, old_status: str, new_status: str):
+    await apply_status_delta(session, day, old_status, -1, -total_price)
+    await apply_status_delta(session, day, new_status, 1, total_price)
+
+# условие на диапазон дней (обе границы включительно)
+def day_range(column, date_from: date | None, date_to: date | None) -> list:
+    conditions = []
+    if date_from is not None:
+        conditions.append(column >= date_from)
+    if date_to is not None:
+        conditions.append(column <= date_to)
+    return conditions
+
+# выручка по дням: итоги всех статусов дня складываются (статусов немного, это дешево)
+async def get_daily_revenue(session: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> list[dict]:
+    query = (
+        select(
+            OrderDailyStats.day,
+            func.sum(OrderDailyStats.orders_count).label('orders_count'),
+            func.sum(OrderDailyStats.revenue).label('revenue'),
+        )
+        .where(*day_range(OrderDailyStats.day, date_from, date_to))
+        .group_by(OrderDailyStats.day)
+        .having(func.sum(OrderDailyStats.orders_count) > 0)
+        .order_by(OrderDailyStats.day)
+    )
+    result = await session.execute(query)
+    return [{**row, 'revenue': round(row['revenue'], 2)} for row in result.mappings()]
+
+# количество и сумма заказов по статусам за период
+async def get_status_report(session: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> list[dict]:
+    query = (
+        select(
+            OrderDailyStats.status,
+            func.sum(OrderDailyStats.orders_count).label('orders_count'),
+            func.sum(OrderDailyStats.revenue).label('revenue'),
+        )
+        .where(*day_range(OrderDailyStats.day, date_from, date_to))
+        .group_by(OrderDailyStats.status)
+        .having(func.sum(OrderDailyStats.orders_count) > 0)
+        .order_by(OrderDailyStats.status)
+    )
+    result = await session.execute(query)
+    return [{**row, 'revenue': round(row['revenue'], 2)} for row in result.mappings()]
+
+# продажи товаров по дням за период (можно ограничить одним товаром)
+async def get_product_sales(
+    session: AsyncSession,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    product_id: int | None = None
+) -> list[ProductDailySales]:
+    query = select(ProductDailySales).where(*day_range(ProductDailySales.day, date_from, date_to))
+    if product_id is not None:
+        query = query.where(ProductDailySales.product_id == product_id)
+    query = query.order_by(ProductDailySales.day, ProductDailySales.product_id)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+# полный пересчет сводных таблиц по заказам в виде словарей {ключ: (количество, сумма)}
+async def count_rollups(session: AsyncSession) -> dict[str, dict[tuple, tuple]]:
+    day = func.date(Order.created_at)
+    result = await session.execute(
+        select(day, Order.status, func.count(Order.id), func.sum(Order.total_price)).group_by(day, Order.status)
+    )
+    statuses = {(date.fromisoformat(d), status): (count, revenue) for d, status, count, revenue in result.all()}
+    result = await session.execute(
+        select(day, OrderItem.product_id, func.sum(OrderItem.quantity), func.sum(OrderItem.quantity * OrderItem.unit_price))
+        .join(OrderItem.order)
+        .group_by(day, OrderItem.product_id)
+    )
+    products = {(date.fromisoformat(d), product_id): (quantity, revenue) for d, product_id, quantity, revenue in result.all()}
+    return {'statuses': statuses, 'products': products}
+
+# сводные таблицы в том же виде, что и полный пересчет (пустые строки не учитываются)
+async def get_rollups(session: AsyncSession) -> dict[str, dict[tuple, tuple]]:
+    result = await session.execute(select(OrderDailyStats).where(OrderDailyStats.orders_count != 0))
+    statuses = {(row.day, row.status): (row.orders_count, row.revenue) for row in result.scalars()}
+    result = await session.execute(select(ProductDailySales).where(ProductDailySales.quantity != 0))
+    products = {(row.day, row.product_id): (row.quantity, row.revenue) for row in result.scalars()}
+    return {'statuses': statuses, 'products': products}
+
+# перестраиваем сводные таблицы с нуля (заполнение после миграции или исправление расхождений)
+async def rebuild_rollups(session: AsyncSession):
+    rollups = await count_rollups(session)
+    await session.execute(delete(OrderDailyStats))
+    await session.execute(delete(ProductDailySales))
+    session.add_all([
+        OrderDailyStats(day=day, status=status, orders_count=count, revenue=revenue)
+        for (day, status), (count, revenue) in rollups['statuses'].items()
+    ])
+    session.add_all([
+        ProductDailySales(day=day, product_id=product_id, quantity=quantity, revenue=revenue)
+        for (day, product_id), (quantity, revenue) in rollups['products'].items()
+    ])
+    await session.commit()
+
+# сравниваем сводные таблицы с полным пересчетом, возвращаем расхождения
+# в виде {таблица: {ключ: (в сводной таблице, по факту)}}; суммы сравниваются с точностью до копейки
+async def check_rollups(session: AsyncSession) -> dict[str, dict[tuple, tuple]]:
+    stored = await get_rollups(session)
+    actual = await count_rollups(session)
+    mismatches = defaultdict(dict)
+    for table in ('statuses', 'products'):
+        for key in set(stored[table]) | set(actual[table]):
+            stored_count, stored_revenue = stored[table].get(key, (0, 0))
+            actual_count, actual_revenue = actual[table].get(key, (0, 0))
+            if stored_count != actual_count or round(stored_revenue - actual_revenue, 2) != 0:
+                mismatches[table][key] = (stored[table].get(key, (0, 0)), actual[table].get(key, (0, 0)))
+    return dict(mismatches)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_session
+from schemas import OrderCreate, OrderOut, OrderStatusUpdate
+from repositories import orders_repository
+
+router = APIRouter(
+    prefix='/orders',
+    tags=['Orders']
+)
+
+# оформление заказа: сумма считается на сервере, остатки товаров списываются в одной транзакции
+@router.post('', response_model=OrderOut)
+async def create_order(order_data: OrderCreate, session: AsyncSession = Depends(get_session)):
+    try:
+        return await orders_repository.create_order(session, order_data)
+    except orders_repository.ProductsNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except orders_repository.OutOfStockError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+# список заказов с фильтрами и постраничным выводом по ключу
+# если страница заполнена целиком, в заголовке X-Next-Before-Id передается before_id следующей страницы
+@router.get('', response_model=list[OrderOut])
+async def get_orders_list(
+    response: Response,
+    customer_name: str | None = Query(default=None, description='Имя покупателя'),
+    status: str | None = Query(default=None, description='Статус заказа'),
+    created_from: datetime | None = Query(default=None, description='Заказы, оформленные начиная с этого времени'),
+    created_to: datetime | None = Query(default=None, description='Заказы, оформленные до этого времени'),
+    before_id: int | None = Query(default=None, description='Заказы с ID меньше указанного (следующая страница)'),
+    limit: int = Query(default=20, ge=1, le=100, description='Количество заказов на странице'),
+    session: AsyncSession = Depends(get_session)
+):
+    orders = await orders_repository.get_orders_list(
+        session, customer_name, status, created_from, created_to, before_id, limit
+    )
+    if len(orders) == limit:
+        response.headers['X-Next-Before-Id'] = str(orders[-1].id)
+    return orders
+
+# получение заказа по ID
+@router.get('/{order_id}', response_model=OrderOut)
+async def get_order(order_id: int, session: AsyncSession = Depends(get_session)):
+    order = await orders_repository.get_order(session, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail='Заказ не найден')
+    return order
+
+# смена статуса заказа (итоги отчетов по статусам обновляются в той же транзакции)
+@router.patch('/{order_id}/status', response_model=OrderOut)
+async def update_order_status(order_id: int, status_data: OrderStatusUpdate, session: AsyncSession = Depends(get_session)):
+    order = await orders_repository.update_order_status(session, order_id, status_data.status)
+    if not order:
+        raise HTTPException(status_code=404, detail='Заказ не найден')
+    return order
\ No newline at end of file
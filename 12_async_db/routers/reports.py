@@ -0,0 +1,51 @@
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_session
+from schemas import DailyRevenueOut, StatusReportOut, ProductSalesOut
+from repositories import reports_repository
+
+router = APIRouter(
+    prefix='/reports',
+    tags=['Reports']
+)
+
+# проверка периода отчета
+def check_period(date_from: date | None, date_to: date | None):
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail='Начало периода позже его конца')
+
+# отчеты читают только сводные таблицы, таблица заказов не агрегируется
+
+# выручка и количество заказов по дням
+@router.get('/revenue/daily', response_model=list[DailyRevenueOut])
+async def get_daily_revenue(
+    date_from: date | None = Query(default=None, description='Первый день периода'),
+    date_to: date | None = Query(default=None, description='Последний день периода'),
+    session: AsyncSession = Depends(get_session)
+):
+    check_period(date_from, date_to)
+    return await reports_repository.get_daily_revenue(session, date_from, date_to)
+
+# количество и сумма заказов по статусам за период
+@router.get('/statuses', response_model=list[StatusReportOut])
+async def get_status_report(
+    date_from: date | None = Query(default=None, description='Первый день периода'),
+    date_to: date | None = Query(default=None, description='Последний день периода'),
+    session: AsyncSession = Depends(get_session)
+):
+    check_period(date_from, date_to)
+    return await reports_repository.get_status_report(session, date_from, date_to)
+
+# продажи товаров по дням за период
+@router.get('/products', response_model=list[ProductSalesOut])
+async def get_product_sales(
+    date_from: date | None = Query(default=None, description='Первый день периода'),
+    date_to: date | None = Query(default=None, description='Последний день периода'),
+    product_id: int | None = Query(default=None, description='Только один товар'),
+    session: AsyncSession = Depends(get_session)
+):
+    check_period(date_from, date_to)
+    return await reports_repository.get_product_sales(session, date_from, date_to, product_id)
\ No newline at end of file
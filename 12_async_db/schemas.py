@@ -1,4 +1,6 @@
 # ConfigDict - специальный словарь для настройки поведения Pydantic-моделей
+from datetime import date, datetime
+
 from pydantic import BaseModel, Field, ConfigDict
 
 # схема для создания нового товара
@@ -6,7 +8,9 @@ class ProductCreate(BaseModel):
     name: str = Field(min_length=1, max_length=200)
     description: str | None = None
     price: float = Field(gt=0)
+    # при сохранении наличие вычисляется по остатку stock, переданное значение не учитывается
     in_stock: bool = True
+    stock: int = Field(default=0, ge=0)
 
 # схема для возврата ответа клиенту
 class ProductOut(ProductCreate):
@@ -19,4 +23,65 @@ class ProductUpdate(BaseModel):
     name: str | None = Field(default=None, min_length=1, max_length=200)
     description: str | None = None
     price: float | None = Field(default=None, gt=0)
-    in_stock: bool | None = None
\ No newline at end of file
+    in_stock: bool | None = None
+    stock: int | None = Field(default=None, ge=0)
+
+# позиция нового заказа: какой товар и сколько штук
+class OrderItemCreate(BaseModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+
+# схема для создания заказа (сумму заказа клиент не передает - она считается на сервере)
+class OrderCreate(BaseModel):
+    customer_name: str = Field(min_length=1, max_length=200)
+    delivery_address: str = Field(min_length=1)
+    items: list[OrderItemCreate] = Field(min_length=1)
+
+# краткие сведения о товаре в позиции заказа
+class ProductBrief(BaseModel):
+    id: int
+    name: str
+    model_config = ConfigDict(from_attributes=True)
+
+# позиция заказа в ответе
+class OrderItemOut(BaseModel):
+    product_id: int
+    product: ProductBrief
+    quantity: int
+    unit_price: float
+    model_config = ConfigDict(from_attributes=True)
+
+# заказ в ответе
+class OrderOut(BaseModel):
+    id: int
+    customer_name: str
+    delivery_address: str
+    status: str
+    total_price: float
+    created_at: datetime
+    items: list[OrderItemOut]
+    model_config = ConfigDict(from_attributes=True)
+
+# новый статус заказа
+class OrderStatusUpdate(BaseModel):
+    status: str = Field(min_length=1, max_length=50)
+
+# выручка за день
+class DailyRevenueOut(BaseModel):
+    day: date
+    orders_count: int
+    revenue: float
+
+# количество и сумма заказов в одном статусе
+class StatusReportOut(BaseModel):
+    status: str
+    orders_count: int
+    revenue: float
+
+# продажи товара за день
+class ProductSalesOut(BaseModel):
+    day: date
+    product_id: int
+    quantity: int
+    revenue: float
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
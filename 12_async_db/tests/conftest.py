@@ -0,0 +1,49 @@
+import httpx
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from main import app
+from database import Base, get_session
+from models import Product
+
+# товары для тестов: (название, цена, остаток на складе)
+PRODUCTS_TEST = [
+    ('Телефон', 49000, 10),
+    ('Компьютер', 90000, 3),
+    ('Наушники', 12000, 0),
+]
+
+# тестовая база в файле, а не в памяти: параллельным заказам нужны отдельные соединения,
+# как в рабочем приложении (timeout - сколько соединение ждет блокировку записи)
+@pytest_asyncio.fixture
+async def test_engine(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "test.db"}', connect_args={'timeout': 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def test_sessionmaker(test_engine):
+    SessionMaker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with SessionMaker() as session:
+        session.add_all([
+            Product(name=name, price=price, stock=stock, in_stock=stock > 0)
+            for name, price, stock in PRODUCTS_TEST
+        ])
+        await session.commit()
+    return SessionMaker
+
+# асинхронный клиент, который отправляет запросы прямо в приложение
+# (в отличие от TestClient позволяет отправлять запросы параллельно)
+@pytest_asyncio.fixture
+async def client(test_sessionmaker):
+    async def override_get_session():
+        async with test_sessionmaker() as session:
+            yield session
+    app.dependency_overrides[get_session] = override_get_session
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as c:
+        yield c
+
+    app.dependency_overrides.pop(get_session, None)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, func
+
+from models import Product, OrderItem
+
+# заказ с указанными позициями {ID товара: количество}
+def order_payload(items: dict[int, int]) -> dict:
+    return {
+        'customer_name': 'Иван',
+        'delivery_address': 'Москва, ул. Ленина, 1',
+        'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in items.items()],
+    }
+
+# остаток товара на складе
+async def get_stock(test_sessionmaker, product_id: int) -> int:
+    async with test_sessionmaker() as session:
+        return await session.scalar(select(Product.stock).where(Product.id == product_id))
+
+# тестирование заказа из нескольких позиций: сумма считается на сервере, остатки списываются
+@pytest.mark.asyncio
+async def test_create_order(client, test_sessionmaker):
+    response = await client.post('/orders', json=order_payload({1: 2, 2: 1}))
+    assert response.status_code == 200
+    order = response.json()
+    assert order['total_price'] == 2 * 49000 + 90000
+    assert order['status'] == 'Новый'
+    assert {(item['product_id'], item['quantity'], item['unit_price']) for item in order['items']} == {(1, 2, 49000), (2, 1, 90000)}
+    assert await get_stock(test_sessionmaker, 1) == 8
+    assert await get_stock(test_sessionmaker, 2) == 2
+
+    response = await client.get(f"/orders/{order['id']}")
+    assert response.status_code == 200
+    assert response.json() == order
+
+# тестирование ошибок: при нехватке одного товара заказ откатывается целиком
+@pytest.mark.asyncio
+async def test_create_order_errors(client, test_sessionmaker):
+    response = await client.post('/orders', json=order_payload({1: 1, 3: 1}))
+    assert response.status_code == 409
+    assert await get_stock(test_sessionmaker, 1) == 10
+
+    response = await client.post('/orders', json=order_payload({1: 1, 999: 1}))
+    assert response.status_code == 404
+
+    response = await client.post('/orders', json=order_payload({}))
+    assert response.status_code == 422
+
+    # одинаковый товар в двух позициях проверяется по общему количеству
+    response = await client.post('/orders', json={**order_payload({}), 'items': [
+        {'product_id': 2, 'quantity': 2}, {'product_id': 2, 'quantity': 2},
+    ]})
+    assert response.status_code == 409
+    assert await get_stock(test_sessionmaker, 2) == 3
+
+# тестирование параллельных заказов: товар не продается сверх остатка
+@pytest.mark.asyncio
+async def test_parallel_orders_do_not_oversell(client, test_sessionmaker):
+    responses = await asyncio.gather(*[
+        client.post('/orders', json=order_payload({1: 1, 2: 1} if i % 2 else {1: 1}))
+        for i in range(30)
+    ])
+    statuses = [response.status_code for response in responses]
+    assert set(statuses) <= {200, 409}
+
+    async with test_sessionmaker() as session:
+        sold = dict((await session.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+        )).all())
+    assert sold[1] == 10
+    assert sold[2] <= 3
+    assert await get_stock(test_sessionmaker, 1) == 0
+    assert await get_stock(test_sessionmaker, 2) == 3 - sold[2]
+    assert statuses.count(200) == 10
+
+# тестирование наличия товара: in_stock всегда следует за остатком, в том числе при создании без stock
+@pytest.mark.asyncio
+async def test_in_stock_follows_stock(client):
+    response = await client.post('/products', json={'name': 'Планшет', 'price': 30000})
+    assert response.status_code == 200
+    product = response.json()
+    assert product['stock'] == 0 and product['in_stock'] is False
+
+    listed = {p['id'] for p in (await client.get('/products', params={'in_stock': True})).json()}
+    assert product['id'] not in listed
+    response = await client.post('/orders', json=order_payload({product['id']: 1}))
+    assert response.status_code == 409
+
+    # остаток появился - товар в наличии, даже если клиент прислал in_stock=false
+    response = await client.patch(f"/products/{product['id']}", json={'stock': 5, 'in_stock': False})
+    assert response.json()['in_stock'] is True
+    listed = {p['id'] for p in (await client.get('/products', params={'in_stock': True})).json()}
+    assert product['id'] in listed
+
+    response = await client.put(f"/products/{product['id']}", json={'name': 'Планшет', 'price': 30000, 'stock': 0, 'in_stock': True})
+    assert response.json()['in_stock'] is False
\ No newline at end of file
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+
+from models import Order
+from tests.test_orders import order_payload
+
+# создаем заказы разных покупателей (каждый заказ - один телефон, каждый четвертый - компьютер)
+async def create_orders(client, count: int) -> list[dict]:
+    orders = []
+    for i in range(count):
+        payload = {**order_payload({2 if i % 4 == 1 else 1: 1}), 'customer_name': 'Иван' if i % 3 else 'Мария'}
+        response = await client.post('/orders', json=payload)
+        assert response.status_code == 200
+        orders.append(response.json())
+    return orders
+
+# тестирование фильтров списка заказов
+@pytest.mark.asyncio
+async def test_orders_list_filters(client, test_sessionmaker):
+    orders = await create_orders(client, 6)
+    async with test_sessionmaker() as session:
+        await session.execute(update(Order).where(Order.id == orders[1]['id']).values(status='Доставлен'))
+        await session.execute(update(Order).where(Order.id == orders[0]['id']).values(created_at=datetime(2024, 1, 1)))
+        await session.commit()
+
+    response = await client.get('/orders', params={'customer_name': 'Мария'})
+    assert [order['id'] for order in response.json()] == [orders[3]['id'], orders[0]['id']]
+
+    response = await client.get('/orders', params={'status': 'Доставлен'})
+    assert [order['id'] for order in response.json()] == [orders[1]['id']]
+
+    response = await client.get('/orders', params={'created_to': '2025-01-01T00:00:00'})
+    assert [order['id'] for order in response.json()] == [orders[0]['id']]
+
+    response = await client.get('/orders', params={'created_from': (datetime.now() - timedelta(days=1)).isoformat()})
+    assert len(response.json()) == 5
+
+    # позиции приходят вместе с товарами
+    item = response.json()[0]['items'][0]
+    assert item['product'] == {'id': item['product_id'], 'name': 'Компьютер' if item['product_id'] == 2 else 'Телефон'}
+
+# тестирование постраничного вывода по ключу
+@pytest.mark.asyncio
+async def test_orders_list_pagination(client):
+    orders = await create_orders(client, 5)
+    ids = [order['id'] for order in reversed(orders)]
+
+    pages, params = [], {'limit': 2}
+    while True:
+        response = await client.get('/orders', params=params)
+        pages.append([order['id'] for order in response.json()])
+        if 'X-Next-Before-Id' not in response.headers:
+            break
+        params['before_id'] = response.headers['X-Next-Before-Id']
+    assert pages == [ids[0:2], ids[2:4], ids[4:]]
+
+# тестирование числа запросов: страница заказов читается одним и тем же числом запросов
+# (заказы, их позиции, товары позиций) независимо от количества заказов на странице
+@pytest.mark.asyncio
+async def test_orders_list_query_count(client, test_engine):
+    await create_orders(client, 10)
+
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(test_engine.sync_engine, 'before_cursor_execute', count_statement)
+    try:
+        counts = {}
+        for limit in (1, 5, 10):
+            statements.clear()
+            response = await client.get('/orders', params={'limit': limit})
+            assert len(response.json()) == limit
+            counts[limit] = len(statements)
+    finally:
+        event.remove(test_engine.sync_engine, 'before_cursor_execute', count_statement)
+    assert counts == {1: 3, 5: 3, 10: 3}
\ No newline at end of file
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from repositories.reports_repository import check_rollups
+from tests.test_orders import order_payload
+
+# тестирование отчетов: итоги обновляются при создании заказа и смене статуса
+@pytest.mark.asyncio
+async def test_reports(client, test_sessionmaker):
+    first = (await client.post('/orders', json=order_payload({1: 2, 2: 1}))).json()
+    second = (await client.post('/orders', json=order_payload({1: 1}))).json()
+    response = await client.patch(f"/orders/{second['id']}/status", json={'status': 'Отменен'})
+    assert response.status_code == 200
+    assert response.json()['status'] == 'Отменен'
+    assert (await client.patch('/orders/999/status', json={'status': 'Отменен'})).status_code == 404
+
+    # день заказа считается по времени базы (UTC)
+    today = datetime.now(timezone.utc).date().isoformat()
+    response = await client.get('/reports/revenue/daily', params={'date_from': today, 'date_to': today})
+    assert response.json() == [{'day': today, 'orders_count': 2, 'revenue': 3 * 49000 + 90000}]
+
+    response = await client.get('/reports/statuses')
+    assert response.json() == [
+        {'status': 'Новый', 'orders_count': 1, 'revenue': first['total_price']},
+        {'status': 'Отменен', 'orders_count': 1, 'revenue': second['total_price']},
+    ]
+
+    response = await client.get('/reports/products', params={'product_id': 1})
+    assert response.json() == [{'day': today, 'product_id': 1, 'quantity': 3, 'revenue': 3 * 49000}]
+
+    response = await client.get('/reports/revenue/daily', params={'date_to': '2020-01-01'})
+    assert response.json() == []
+    response = await client.get('/reports/statuses', params={'date_from': today, 'date_to': '2020-01-01'})
+    assert response.status_code == 400
+
+    async with test_sessionmaker() as session:
+        assert await check_rollups(session) == {}
+
+# тестирование отчетов: читаются только сводные таблицы
+@pytest.mark.asyncio
+async def test_reports_do_not_read_orders(client, test_engine):
+    await client.post('/orders', json=order_payload({1: 1}))
+
+    statements = []
+    def save_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(test_engine.sync_engine, 'before_cursor_execute', save_statement)
+    try:
+        for url in ('/reports/revenue/daily', '/reports/statuses', '/reports/products'):
+            assert (await client.get(url)).status_code == 200
+    finally:
+        event.remove(test_engine.sync_engine, 'before_cursor_execute', save_statement)
+    assert len(statements) == 3
+    assert not any('orders ' in statement or 'order_items' in statement for statement in statements)
+
+# тестирование параллельной смены статусов: каждый заказ учитывается в итогах ровно один раз
+@pytest.mark.asyncio
+async def test_parallel_status_changes(client, test_sessionmaker):
+    orders = [(await client.post('/orders', json=order_payload({1: 1}))).json() for _ in range(3)]
+    responses = await asyncio.gather(*[
+        client.patch(f"/orders/{order['id']}/status", json={'status': status})
+        for order in orders
+        for status in ('Собран', 'Доставлен', 'Отменен', 'Собран')
+    ])
+    assert all(response.status_code == 200 for response in responses)
+
+    response = await client.get('/reports/statuses')
+    assert sum(row['orders_count'] for row in response.json()) == 3
+    async with test_sessionmaker() as session:
+        assert await check_rollups(session) == {}
\ No newline at end of file
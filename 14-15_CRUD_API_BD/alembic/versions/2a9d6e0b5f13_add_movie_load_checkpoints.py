@@ -0,0 +1,35 @@
+"""add movie load checkpoints
+
+Revision ID: 2a9d6e0b5f13
+Revises: 8f3b1d27c4e9
+Create Date: 2026-10-19 17:25:48.301772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a9d6e0b5f13'
+down_revision: Union[str, Sequence[str], None] = '8f3b1d27c4e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_load_checkpoints',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('rows_read', sa.Integer(), nullable=False),
+    sa.Column('rows_loaded', sa.Integer(), nullable=False),
+    sa.Column('rows_rejected', sa.Integer(), nullable=False),
+    sa.Column('finished', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movie_load_checkpoints')
@@ -0,0 +1,41 @@
+"""add movies sort indexes
+
+Revision ID: 5c2e8a41f0b7
+Revises: d981bbcd7795
+Create Date: 2026-10-19 15:02:11.418204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8a41f0b7'
+down_revision: Union[str, Sequence[str], None] = 'd981bbcd7795'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # составной индекс (title, id) заменяет индекс только по title
+    op.drop_index(op.f('ix_movies_title'), table_name='movies')
+    op.create_index('ix_movies_title_id', 'movies', ['title', 'id'], unique=False)
+    op.create_index('ix_movies_title_desc_id', 'movies', [sa.text('title DESC'), 'id'], unique=False)
+    op.create_index('ix_movies_year_id', 'movies', ['year', 'id'], unique=False)
+    op.create_index('ix_movies_year_desc_id', 'movies', [sa.text('year DESC'), 'id'], unique=False)
+    op.create_index('ix_movies_rating_id', 'movies', ['rating', 'id'], unique=False)
+    op.create_index('ix_movies_rating_desc_id', 'movies', [sa.text('rating DESC'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_rating_desc_id', table_name='movies')
+    op.drop_index('ix_movies_rating_id', table_name='movies')
+    op.drop_index('ix_movies_year_desc_id', table_name='movies')
+    op.drop_index('ix_movies_year_id', table_name='movies')
+    op.drop_index('ix_movies_title_desc_id', table_name='movies')
+    op.drop_index('ix_movies_title_id', table_name='movies')
+    op.create_index(op.f('ix_movies_title'), 'movies', ['title'], unique=False)
@@ -0,0 +1,47 @@
+"""add movie facet counts
+
+Revision ID: 8f3b1d27c4e9
+Revises: 5c2e8a41f0b7
+Create Date: 2026-10-19 16:40:27.913054
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b1d27c4e9'
+down_revision: Union[str, Sequence[str], None] = '5c2e8a41f0b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_facet_counts',
+    sa.Column('facet', sa.String(), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+    # заполняем счетчики по уже существующим фильмам (значения как в src/repositories/facets.py)
+    op.execute(
+        "INSERT INTO movie_facet_counts (facet, value, count) "
+        "SELECT 'genre', genre, COUNT(*) FROM movies GROUP BY genre"
+    )
+    op.execute(
+        "INSERT INTO movie_facet_counts (facet, value, count) "
+        "SELECT 'decade', CAST(year / 10 * 10 AS TEXT), COUNT(*) FROM movies GROUP BY year / 10"
+    )
+    op.execute(
+        "INSERT INTO movie_facet_counts (facet, value, count) "
+        "SELECT 'rating', bucket || '-' || (bucket + 1), COUNT(*) "
+        "FROM (SELECT MIN(CAST(rating AS INTEGER), 9) AS bucket FROM movies) GROUP BY bucket"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movie_facet_counts')
@@ -0,0 +1,87 @@
+"""move genres to table
+
+Revision ID: b71c4f9e2d08
+Revises: 2a9d6e0b5f13
+Create Date: 2026-10-19 19:12:35.624410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71c4f9e2d08'
+down_revision: Union[str, Sequence[str], None] = '2a9d6e0b5f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# сколько фильмов обновлять одним UPDATE при заполнении genre_id
+BACKFILL_BATCH_SIZE = 50000
+# индексы с DESC: при пересоздании таблицы в batch-режиме Alembic теряет направление сортировки,
+# поэтому удаляем их до пересоздания и создаем заново после
+DESC_INDEXES = {
+    'ix_movies_title_desc_id': ['title', 'id'],
+    'ix_movies_year_desc_id': ['year', 'id'],
+    'ix_movies_rating_desc_id': ['rating', 'id'],
+}
+
+
+def drop_desc_indexes() -> None:
+    for name in DESC_INDEXES:
+        op.drop_index(name, table_name='movies')
+
+
+def create_desc_indexes() -> None:
+    for name, (column, *rest) in DESC_INDEXES.items():
+        op.create_index(name, 'movies', [sa.text(f'{column} DESC'), *rest], unique=False)
+
+
+# выполняем UPDATE пачками по диапазонам id, чтобы не строить один огромный UPDATE по всей таблице
+def run_in_batches(sql: str) -> None:
+    connection = op.get_bind()
+    max_id = connection.execute(sa.text('SELECT MAX(id) FROM movies')).scalar() or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        connection.execute(sa.text(sql), {'start': start, 'end': start + BACKFILL_BATCH_SIZE})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute('INSERT INTO genres (name) SELECT DISTINCT genre FROM movies ORDER BY genre')
+    op.add_column('movies', sa.Column('genre_id', sa.Integer(), nullable=True))
+    run_in_batches(
+        'UPDATE movies SET genre_id = (SELECT genres.id FROM genres WHERE genres.name = movies.genre) '
+        'WHERE id > :start AND id <= :end'
+    )
+    # SQLite не умеет менять столбцы и добавлять внешние ключи, поэтому таблица пересоздается
+    drop_desc_indexes()
+    with op.batch_alter_table('movies', recreate='always') as batch_op:
+        batch_op.alter_column('genre_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_movies_genre_id_genres', 'genres', ['genre_id'], ['id'])
+        batch_op.drop_column('genre')
+    create_desc_indexes()
+    op.create_index('ix_movies_genre_id_rating_desc_id', 'movies', ['genre_id', sa.text('rating DESC'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_genre_id_rating_desc_id', table_name='movies')
+    op.add_column('movies', sa.Column('genre', sa.String(), nullable=True))
+    run_in_batches(
+        'UPDATE movies SET genre = (SELECT genres.name FROM genres WHERE genres.id = movies.genre_id) '
+        'WHERE id > :start AND id <= :end'
+    )
+    drop_desc_indexes()
+    with op.batch_alter_table('movies', recreate='always') as batch_op:
+        batch_op.alter_column('genre', existing_type=sa.String(), nullable=False)
+        batch_op.drop_constraint('fk_movies_genre_id_genres', type_='foreignkey')
+        batch_op.drop_column('genre_id')
+    create_desc_indexes()
+    op.drop_table('genres')
\ No newline at end of file
@@ -0,0 +1,68 @@
+'''
+Бенчмарк пагинации списка фильмов: OFFSET против курсора.
+
+Запуск из корня проекта:
+python -m benchmarks.pagination --rows 200000
+
+Создает временную БД со случайными фильмами и замеряет время получения
+первой и глубокой страницы для каждой сортировки.
+'''
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+from time import perf_counter
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.models import Base, Genre, Movie
+from src.repositories.movies import ALLOWED_ORDERS, get_list_movies, encode_cursor, get_order_key
+
+GENRES = ['Драма', 'Комедия', 'Триллер', 'Научная фантастика', 'Мультфильм', 'Аниме', 'Исторический']
+
+async def main(rows: int, page_size: int, deep_page: int):
+    path = os.path.join(tempfile.mkdtemp(), 'movies_bench.db')
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Genre), [{'id': i, 'name': name} for i, name in enumerate(GENRES, start=1)])
+        batch = 10000
+        for start in range(0, rows, batch):
+            await conn.execute(insert(Movie), [
+                {
+                    'title': f'Фильм {i}',
+                    'genre_id': random.randint(1, len(GENRES)),
+                    'year': random.randint(1900, 2024),
+                    'rating': round(random.uniform(0, 10), 1),
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+
+    print(f'{rows} фильмов, страница {page_size}, глубокая страница №{deep_page}')
+    print(f'{"сортировка":10} {"OFFSET стр.1":>14} {"OFFSET глубокая":>16} {"курсор глубокая":>16}')
+    async with SessionLocal() as session:
+        for order_by in ALLOWED_ORDERS:
+            timings = []
+            for offset in (0, deep_page * page_size):
+                start_time = perf_counter()
+                await get_list_movies(session, order_by=order_by, limit=page_size, offset=offset)
+                timings.append((perf_counter() - start_time) * 1000)
+            # курсор на последний фильм предыдущей страницы
+            previous = await get_list_movies(session, order_by=order_by, limit=1, offset=deep_page * page_size - 1)
+            cursor = encode_cursor(get_order_key(order_by), previous[0])
+            start_time = perf_counter()
+            await get_list_movies(session, order_by=order_by, limit=page_size, cursor=cursor)
+            timings.append((perf_counter() - start_time) * 1000)
+            print(f'{order_by:10} {timings[0]:11.2f} мс {timings[1]:13.2f} мс {timings[2]:13.2f} мс')
+    await engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--deep-page', type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size, args.deep_page))
\ No newline at end of file
@@ -0,0 +1,78 @@
+'''
+Бенчмарк поиска похожих фильмов по индексу признаков в памяти.
+
+Запуск из корня проекта:
+python -m benchmarks.similar --rows 100000 1000000
+
+Для каждого размера строит индекс из случайных фильмов и замеряет время построения,
+задержку top-k (медиана и 99-й перцентиль) и время обновления одного фильма.
+Для сравнения считает ту же выборку циклом Python по всем фильмам.
+'''
+import argparse
+import random
+from time import perf_counter
+
+import numpy as np
+
+from src.models import Movie
+from src.recommendations import MovieFeatureIndex
+
+# количество жанров (индекс работает с ID жанров)
+GENRES_COUNT = 7
+
+# top-k циклом Python по всем фильмам (то, что заменяет индекс)
+def top_k_python(index: MovieFeatureIndex, movie_id: int, k: int) -> list[int]:
+    position = index._positions[movie_id]
+    genre, year = index.genres[position], index.years[position]
+    scored = []
+    for i in range(len(index)):
+        if i != position:
+            score = (index.genres[i] == genre) + 0.5 * (1 - abs(index.years[i] - year)) + 0.3 * index.ratings[i]
+            scored.append((-score, int(index.ids[i])))
+    return [movie_id for _, movie_id in sorted(scored)[:k]]
+
+def percentile(timings: list[float], q: float) -> float:
+    return float(np.percentile(timings, q))
+
+def main(sizes: list[int], k: int, queries: int):
+    print(f'{"фильмов":>9} {"построение":>12} {"top-k p50":>11} {"top-k p99":>11} {"upsert":>10} {"цикл Python":>13}')
+    for size in sizes:
+        index = MovieFeatureIndex()
+        start = perf_counter()
+        index.set_rows(
+            list(range(1, size + 1)),
+            [random.randint(1, GENRES_COUNT) for _ in range(size)],
+            [random.randint(1900, 2024) for _ in range(size)],
+            [round(random.uniform(0, 10), 1) for _ in range(size)],
+        )
+        build_ms = (perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(queries):
+            movie_id = random.randint(1, size)
+            start = perf_counter()
+            index.top_k(movie_id, k)
+            timings.append((perf_counter() - start) * 1000)
+
+        start = perf_counter()
+        for movie_id in range(size + 1, size + 1001):
+            index.upsert(Movie(id=movie_id, genre_id=random.randint(1, GENRES_COUNT), year=2000, rating=7.0))
+        # 1000 обновлений: миллисекунды на все обновления равны микросекундам на одно
+        upsert_us = (perf_counter() - start) * 1000
+
+        start = perf_counter()
+        top_k_python(index, 1, k)
+        python_ms = (perf_counter() - start) * 1000
+
+        print(
+            f'{size:>9} {build_ms:9.0f} мс {percentile(timings, 50):8.2f} мс {percentile(timings, 99):8.2f} мс '
+            f'{upsert_us:7.2f} мкс {python_ms:10.0f} мс'
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.k, args.queries)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+
+from sortedcontainers import SortedList
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Genre, Movie
+from src.repositories.genres import genre_cache
+
+# сколько лучших фильмов по рейтингу держать в памяти (глобально и в каждом жанре)
+LEADERBOARD_SIZE = 1000
+# сколько жанровых таблиц можно держать в памяти (жанр приходит из запроса и может быть любым)
+MAX_GENRE_BOARDS = 200
+# столбцы фильма, которые хранятся в таблице лидеров
+MOVIE_FIELDS = ('id', 'title', 'genre_id', 'year', 'rating')
+
+# топ-N фильмов одной выборки (все фильмы или один жанр) в порядке сортировки '-rating'
+# ключ (-rating, id) совпадает с ORDER BY rating DESC, id
+# инвариант: в списке ровно min(N, всего фильмов) лучших фильмов выборки;
+# complete - в выборке не больше N фильмов, т.е. список содержит ее целиком
+class TopN:
+    def __init__(self, size: int, movies: list[dict], complete: bool):
+        self.size = size
+        self.complete = complete
+        # после удаления фильма из неполного списка на освободившееся место
+        # должен встать фильм, которого нет в памяти, - список нужно перечитать из базы
+        self.needs_refill = False
+        self._keys = SortedList()
+        self._movies: dict[int, dict] = {}
+        for values in movies:
+            self._add(values)
+
+    def _add(self, values: dict):
+        self._keys.add((-values['rating'], values['id']))
+        self._movies[values['id']] = values
+
+    def _discard(self, movie_id: int) -> bool:
+        values = self._movies.pop(movie_id, None)
+        if values is None:
+            return False
+        self._keys.remove((-values['rating'], movie_id))
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    # добавляем новый или измененный фильм
+    def upsert(self, values: dict):
+        was_present = self._discard(values['id'])
+        key = (-values['rating'], values['id'])
+        # фильм хуже последнего в неполном списке - он не входит в топ
+        if not self.complete and self._keys and key > self._keys[-1]:
+            # если фильм был в топе и выпал из него, освободилось место
+            if was_present:
+                self.needs_refill = True
+            return
+        self._add(values)
+        if len(self._keys) > self.size:
+            self._discard(self._keys[-1][1])
+            self.complete = False
+
+    # удаляем фильм из выборки (удален или перешел в другой жанр)
+    def remove(self, movie_id: int):
+        if self._discard(movie_id) and not self.complete:
+            self.needs_refill = True
+
+    # можно ли отдать страницу из памяти
+    def covers(self, offset: int, limit: int) -> bool:
+        return not self.needs_refill and (self.complete or offset + limit <= len(self._keys))
+
+    # страница фильмов в виде несвязанных с сессией объектов Movie
+    def page(self, offset: int, limit: int) -> list[Movie]:
+        return [to_movie(self._movies[movie_id]) for _, movie_id in self._keys[offset:offset + limit]]
+
+# несвязанный с сессией фильм из сохраненных значений (вместе с названием жанра)
+def to_movie(values: dict) -> Movie:
+    values = dict(values)
+    genre = Genre(id=values['genre_id'], name=values.pop('genre'))
+    return Movie(**values, genre_ref=genre)
+
+# таблицы лидеров по рейтингу: общая и по жанрам
+# общая загружается при старте приложения, жанровые - при первом запросе жанра,
+# причем только для жанров из справочника (жанр приходит из запроса и может быть любой строкой)
+# функции записи репозитория обновляют уже загруженные таблицы после фиксации транзакции
+# загрузка выборки из базы идет через await, и изменения, пришедшие в это время, запрос может
+# уже не увидеть - поэтому они копятся в pending и повторяются на загруженной таблице
+# (upsert и remove по id идемпотентны, повтор уже учтенного изменения ничего не портит)
+class Leaderboard:
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self.boards: dict[str | None, TopN] = {}
+        # изменения выборок, которые сейчас загружаются: [(метод TopN, аргумент)]
+        self.pending: dict[str | None, list[tuple[str, object]]] = {}
+        # одна загрузка выборки за раз: параллельные запросы ждут ее результата
+        self._locks: dict[str | None, asyncio.Lock] = {}
+
+    # загружаем топ выборки из базы (на один фильм больше, чтобы понять, вся ли выборка поместилась)
+    async def _load(self, session: AsyncSession, genre: str | None) -> TopN:
+        query = select(*[getattr(Movie, field) for field in MOVIE_FIELDS], Genre.name.label('genre'))
+        query = query.join(Movie.genre_ref)
+        if genre is not None:
+            query = query.where(Genre.name == genre)
+        query = query.order_by(Movie.rating.desc(), Movie.id.asc()).limit(self.size + 1)
+        pending = self.pending[genre] = []
+        try:
+            rows = (await session.execute(query)).mappings().all()
+        finally:
+            del self.pending[genre]
+        board = TopN(self.size, [dict(row) for row in rows[:self.size]], complete=len(rows) <= self.size)
+        for method, argument in pending:
+            getattr(board, method)(argument)
+        self.boards[genre] = board
+        return board
+
+    # таблица выборки (загружается или перечитывается при необходимости)
+    # None - жанра нет в справочнике или жанровых таблиц слишком много, выборку обслуживает SQL
+    async def get_board(self, session: AsyncSession, genre: str | None = None) -> TopN | None:
+        board = self.boards.get(genre)
+        if board is not None and not board.needs_refill:
+            return board
+        if board is None and genre is not None:
+            if self._genre_boards() >= MAX_GENRE_BOARDS:
+                return None
+            if await genre_cache.get_id(session, genre) is None:
+                return None
+        async with self._locks.setdefault(genre, asyncio.Lock()):
+            # пока ждали блокировку, выборку мог загрузить другой запрос
+            board = self.boards.get(genre)
+            if board is None and genre is not None and self._genre_boards() >= MAX_GENRE_BOARDS:
+                return None
+            if board is None or board.needs_refill:
+                board = await self._load(session, genre)
+        return board
+
+    # число жанровых таблиц вместе с загружающимися (общая таблица не считается)
+    # проверка и регистрация загрузки в pending идут без await между ними, поэтому
+    # параллельные запросы разных жанров не превысят MAX_GENRE_BOARDS
+    def _genre_boards(self) -> int:
+        return len((self.boards.keys() | self.pending.keys()) - {None})
+
+    # страница списка по умолчанию ('-rating') из памяти или None, если страница глубже топа
+    async def get_page(self, session: AsyncSession, genre: str | None, offset: int, limit: int) -> list[Movie] | None:
+        board = self.boards.get(genre)
+        # страница заведомо за пределами топа - таблицу лидеров даже не загружаем
+        if offset + limit > self.size and (board is None or not board.complete):
+            return None
+        board = await self.get_board(session, genre)
+        if board is None or not board.covers(offset, limit):
+            return None
+        return board.page(offset, limit)
+
+    # обновляем фильм в общей таблице и в таблице его жанра (и старого жанра, если он сменился)
+    def upsert(self, movie: Movie, old_genre: str | None = None):
+        values = {field: getattr(movie, field) for field in MOVIE_FIELDS}
+        values['genre'] = movie.genre
+        if old_genre is not None and old_genre != movie.genre:
+            self._apply(old_genre, 'remove', movie.id)
+        for genre in (None, movie.genre):
+            self._apply(genre, 'upsert', values)
+
+    def remove(self, movie: Movie):
+        for genre in (None, movie.genre):
+            self._apply(genre, 'remove', movie.id)
+
+    # изменение загруженной таблицы выборки; если выборка загружается, изменение запоминается для повтора
+    def _apply(self, genre: str | None, method: str, argument):
+        if genre in self.pending:
+            self.pending[genre].append((method, argument))
+        if genre in self.boards:
+            getattr(self.boards[genre], method)(argument)
+
+    def reset(self):
+        self.boards = {}
+        self._locks = {}
+
+# общие таблицы лидеров на процесс
+leaderboard = Leaderboard()
\ No newline at end of file
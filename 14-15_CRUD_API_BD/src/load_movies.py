@@ -0,0 +1,244 @@
+'''
+Массовая загрузка фильмов из CSV/TSV-файла в базу данных.
+
+Запуск из корня проекта:
+python -m src.load_movies movies.csv
+python -m src.load_movies movies.tsv --db movies.db --batch-size 100000
+
+Файл должен содержать строку заголовка со столбцами title, genre, year, rating
+(остальные столбцы игнорируются). Разделитель определяется по расширению (.tsv - табуляция).
+
+- строки читаются потоком и проверяются пачками по тем же правилам, что и MovieBase / CheckConstraint
+- отклоненные строки с причиной пишутся в файл <имя файла>.rejects.csv
+- на время загрузки индексы таблицы movies удаляются и строятся заново в конце
+- новые жанры добавляются в справочник genres в той же транзакции, что и фильмы пачки
+- каждая пачка вставляется одной транзакцией вместе с контрольной точкой и счетчиками фасетов,
+  поэтому после сбоя повторный запуск продолжит загрузку с первой незагруженной строки
+'''
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from collections import Counter
+from datetime import date
+from itertools import islice
+from time import perf_counter
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+
+from src.models import Movie
+from src.repositories.facets import movie_facet_values
+
+# обязательные столбцы файла
+COLUMNS = ('title', 'genre', 'year', 'rating')
+# количество строк в одной пачке (и в одной транзакции)
+BATCH_SIZE = 100_000
+# ограничения, повторяющие MovieBase и CheckConstraint модели Movie
+TITLE_LENGTH = (2, 200)
+GENRE_LENGTH = (2, 100)
+RATING_RANGE = (0, 10)
+MIN_YEAR = 1888
+
+# ошибка в структуре входного файла
+class LoaderError(Exception):
+    pass
+
+# разделитель по расширению файла
+def get_delimiter(path: str) -> str:
+    return '\t' if path.lower().endswith(('.tsv', '.tab')) else ','
+
+# позиции обязательных столбцов по строке заголовка
+def get_column_positions(header: list[str]) -> list[int]:
+    names = [name.strip().lower() for name in header]
+    missing = [column for column in COLUMNS if column not in names]
+    if missing:
+        raise LoaderError(f"В заголовке нет столбцов: {', '.join(missing)}")
+    return [names.index(column) for column in COLUMNS]
+
+# проверяем пачку строк по правилам MovieBase без создания pydantic-моделей на каждую строку
+# проверка намеренно не переведена на столбцы NumPy: почти все время уходит на разбор строк int()/float()
+# и на len(), а astype над строковым массивом вызывает те же функции для каждого элемента, плюс тратит
+# время на сборку столбцов и обратное превращение в кортежи - на пачке 100 000 строк такой вариант
+# оказался на 20-50% медленнее этого цикла
+# возвращаем корректные строки (title, genre, year, rating) и отклоненные (номер строки, причина, строка)
+def validate_batch(rows: list[list[str]], positions: list[int], first_line: int) -> tuple[list[tuple], list[tuple]]:
+    title_pos, genre_pos, year_pos, rating_pos = positions
+    width = max(positions) + 1
+    max_year = date.today().year
+    valid, rejected = [], []
+    for line, row in enumerate(rows, start=first_line):
+        if len(row) < width:
+            rejected.append((line, 'не хватает столбцов', row))
+            continue
+        title, genre = row[title_pos], row[genre_pos]
+        try:
+            year = int(row[year_pos])
+        except ValueError:
+            rejected.append((line, 'год не является целым числом', row))
+            continue
+        try:
+            rating = float(row[rating_pos])
+        except ValueError:
+            rejected.append((line, 'рейтинг не является числом', row))
+            continue
+        if not TITLE_LENGTH[0] <= len(title) <= TITLE_LENGTH[1]:
+            rejected.append((line, f'длина названия должна быть от {TITLE_LENGTH[0]} до {TITLE_LENGTH[1]}', row))
+        elif not GENRE_LENGTH[0] <= len(genre) <= GENRE_LENGTH[1]:
+            rejected.append((line, f'длина жанра должна быть от {GENRE_LENGTH[0]} до {GENRE_LENGTH[1]}', row))
+        elif not MIN_YEAR <= year <= max_year:
+            rejected.append((line, f'год должен быть между {MIN_YEAR} и {max_year}', row))
+        elif not RATING_RANGE[0] <= rating <= RATING_RANGE[1]:
+            # сравнение с NaN всегда ложно, поэтому NaN тоже отклоняется
+            rejected.append((line, f'рейтинг должен быть от {RATING_RANGE[0]} до {RATING_RANGE[1]}', row))
+        else:
+            valid.append((title, genre, year, rating))
+    return valid, rejected
+
+# подключение к базе с настройками для массовой загрузки
+def connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    # кэш страниц около 256 МБ (отрицательное значение задается в КБ)
+    conn.execute('PRAGMA cache_size=-262144')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+# удаляем индексы таблицы movies (первичный ключ остается)
+def drop_indexes(conn: sqlite3.Connection):
+    for index in Movie.__table__.indexes:
+        conn.execute(f'DROP INDEX IF EXISTS {index.name}')
+
+# строим индексы таблицы movies заново по описанию модели
+def create_indexes(conn: sqlite3.Connection):
+    for index in Movie.__table__.indexes:
+        conn.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())))
+
+# читаем контрольную точку загрузки файла
+def get_checkpoint(conn: sqlite3.Connection, source: str) -> dict:
+    row = conn.execute(
+        'SELECT rows_read, rows_loaded, rows_rejected, finished FROM movie_load_checkpoints WHERE source = ?',
+        (source,)
+    ).fetchone()
+    if row is None:
+        return {'rows_read': 0, 'rows_loaded': 0, 'rows_rejected': 0, 'finished': False}
+    return {'rows_read': row[0], 'rows_loaded': row[1], 'rows_rejected': row[2], 'finished': bool(row[3])}
+
+# сохраняем контрольную точку (вызывается внутри транзакции пачки)
+def save_checkpoint(conn: sqlite3.Connection, source: str, checkpoint: dict):
+    conn.execute(
+        'INSERT INTO movie_load_checkpoints (source, rows_read, rows_loaded, rows_rejected, finished) '
+        'VALUES (?, ?, ?, ?, ?) ON CONFLICT(source) DO UPDATE SET '
+        'rows_read = excluded.rows_read, rows_loaded = excluded.rows_loaded, '
+        'rows_rejected = excluded.rows_rejected, finished = excluded.finished',
+        (source, checkpoint['rows_read'], checkpoint['rows_loaded'], checkpoint['rows_rejected'], checkpoint['finished'])
+    )
+
+# ID жанров пачки по названиям (недостающие жанры добавляются в справочник)
+def get_genre_ids(conn: sqlite3.Connection, names: set[str]) -> dict[str, int]:
+    conn.executemany('INSERT OR IGNORE INTO genres (name) VALUES (?)', [(name,) for name in names])
+    placeholders = ', '.join('?' * len(names))
+    return dict(conn.execute(f'SELECT name, id FROM genres WHERE name IN ({placeholders})', list(names)))
+
+# вставляем пачку фильмов и прибавляем их к счетчикам фасетов
+def insert_batch(conn: sqlite3.Connection, movies: list[tuple]):
+    if not movies:
+        return
+    genre_ids = get_genre_ids(conn, {genre for _, genre, _, _ in movies})
+    conn.executemany(
+        'INSERT INTO movies (title, genre_id, year, rating) VALUES (?, ?, ?, ?)',
+        [(title, genre_ids[genre], year, rating) for title, genre, year, rating in movies]
+    )
+    facets = Counter()
+    for title, genre, year, rating in movies:
+        facets.update(movie_facet_values(genre, year, rating))
+    conn.executemany(
+        'INSERT INTO movie_facet_counts (facet, value, count) VALUES (?, ?, ?) '
+        'ON CONFLICT(facet, value) DO UPDATE SET count = count + excluded.count',
+        [(facet, value, count) for (facet, value), count in facets.items()]
+    )
+
+# загружаем файл в базу, возвращаем итоговую контрольную точку
+def load_file(
+    path: str,
+    db_path: str,
+    batch_size: int = BATCH_SIZE,
+    rejects_path: str | None = None,
+    keep_indexes: bool = False,
+    restart: bool = False,
+    log=print,
+) -> dict:
+    source = os.path.abspath(path)
+    rejects_path = rejects_path or f'{path}.rejects.csv'
+    conn = connect(db_path)
+    try:
+        checkpoint = get_checkpoint(conn, source)
+        if restart:
+            checkpoint = {'rows_read': 0, 'rows_loaded': 0, 'rows_rejected': 0, 'finished': False}
+        if checkpoint['finished']:
+            log(f'Файл {path} уже загружен ({checkpoint["rows_loaded"]} строк), для повторной загрузки укажите --restart')
+            return checkpoint
+        if checkpoint['rows_read']:
+            log(f'Продолжаем загрузку с {checkpoint["rows_read"] + 1}-й строки данных')
+        if not keep_indexes:
+            drop_indexes(conn)
+
+        started = perf_counter()
+        loaded_now = 0
+        with open(path, newline='', encoding='utf-8') as file, \
+                open(rejects_path, 'a' if checkpoint['rows_read'] else 'w', newline='', encoding='utf-8') as rejects_file:
+            reader = csv.reader(file, delimiter=get_delimiter(path))
+            positions = get_column_positions(next(reader, []))
+            rejects = csv.writer(rejects_file)
+            # пропускаем строки, загруженные до сбоя (номер строки в файле = номер строки данных + 1)
+            rows = islice(reader, checkpoint['rows_read'], None)
+            while batch := list(islice(rows, batch_size)):
+                valid, rejected = validate_batch(batch, positions, first_line=checkpoint['rows_read'] + 2)
+                checkpoint['rows_read'] += len(batch)
+                checkpoint['rows_loaded'] += len(valid)
+                checkpoint['rows_rejected'] += len(rejected)
+                conn.execute('BEGIN')
+                try:
+                    insert_batch(conn, valid)
+                    save_checkpoint(conn, source, checkpoint)
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                # файл отклоненных строк дописываем после фиксации пачки
+                rejects.writerows([line, reason, *row] for line, reason, row in rejected)
+                loaded_now += len(valid)
+                elapsed = perf_counter() - started
+                log(f'{checkpoint["rows_read"]} строк прочитано, {checkpoint["rows_loaded"]} загружено, '
+                    f'{checkpoint["rows_rejected"]} отклонено, {loaded_now / elapsed:.0f} строк/с')
+
+        if not keep_indexes:
+            index_started = perf_counter()
+            create_indexes(conn)
+            log(f'Индексы построены за {perf_counter() - index_started:.1f} с')
+        checkpoint['finished'] = True
+        save_checkpoint(conn, source, checkpoint)
+        elapsed = perf_counter() - started
+        log(f'Готово: {loaded_now} строк за {elapsed:.1f} с ({loaded_now / elapsed if elapsed else 0:.0f} строк/с)')
+        if checkpoint['rows_rejected']:
+            log(f'Отклоненные строки: {rejects_path}')
+        return checkpoint
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Массовая загрузка фильмов из CSV/TSV')
+    parser.add_argument('path', help='файл CSV или TSV со строкой заголовка')
+    parser.add_argument('--db', default='movies.db', help='файл базы SQLite')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='строк в одной транзакции')
+    parser.add_argument('--rejects', help='файл для отклоненных строк')
+    parser.add_argument('--keep-indexes', action='store_true', help='не удалять индексы на время загрузки')
+    parser.add_argument('--restart', action='store_true', help='загрузить файл заново, не учитывая контрольную точку')
+    args = parser.parse_args()
+    try:
+        load_file(args.path, args.db, args.batch_size, args.rejects, args.keep_indexes, args.restart)
+    except LoaderError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
\ No newline at end of file
@@ -1,7 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from src.database import get_session
+from src.recommendations import movie_index
+from src.leaderboard import leaderboard
+from src.repositories.genres import genre_cache
 from src.routers.movies import router as movie_router 
 
-app = FastAPI()
+# при старте загружаем справочник жанров, индекс похожих фильмов и общую таблицу лидеров,
+# чтобы первый запрос не ждал загрузки
+# сессию берем так же, как эндпоинты (с учетом dependency_overrides в тестах)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    session_factory = app.dependency_overrides.get(get_session, get_session)
+    async for session in session_factory():
+        await genre_cache.load(session)
+        await movie_index.load(session)
+        await leaderboard.get_board(session)
+    yield
+    genre_cache.reset()
+    movie_index.reset()
+    leaderboard.reset()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get('/')
 async def root():
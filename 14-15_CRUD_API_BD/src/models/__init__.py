@@ -3,6 +3,9 @@ from sqlalchemy.orm import DeclarativeBase
 class Base(DeclarativeBase):
     pass
 
+from .genre import Genre
 from .movie import Movie
+from .facet import MovieFacetCount
+from .load_checkpoint import MovieLoadCheckpoint
 
-__all__ = ['Base', 'Movie']
\ No newline at end of file
+__all__ = ['Base', 'Genre', 'Movie', 'MovieFacetCount', 'MovieLoadCheckpoint']
\ No newline at end of file
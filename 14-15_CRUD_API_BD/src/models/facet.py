@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from . import Base
+
+# сводная таблица для фасетов каталога: сколько фильмов в каждом жанре, десятилетии и диапазоне рейтинга
+# поддерживается репозиторием фильмов при каждом изменении, поэтому фасеты не пересчитываются по всей таблице
+class MovieFacetCount(Base):
+    __tablename__ = 'movie_facet_counts'
+
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
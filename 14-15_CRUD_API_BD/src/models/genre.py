@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from . import Base
+
+# справочник жанров: фильмы ссылаются на жанр по целочисленному ключу,
+# а не хранят название жанра строкой в каждой строке
+class Genre(Base):
+    __tablename__ = 'genres'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Boolean
+from . import Base
+
+# контрольная точка загрузки файла с фильмами (src/load_movies.py)
+# обновляется в одной транзакции с очередной пачкой строк, поэтому после сбоя
+# загрузка продолжается ровно с первой незагруженной строки
+class MovieLoadCheckpoint(Base):
+    __tablename__ = 'movie_load_checkpoints'
+
+    source = Column(String, primary_key=True)
+    rows_read = Column(Integer, nullable=False, default=0)
+    rows_loaded = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    finished = Column(Boolean, nullable=False, default=False)
\ No newline at end of file
@@ -1,16 +1,38 @@
-from sqlalchemy import Column, Integer, String, Float, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, CheckConstraint, Index, ForeignKey
+from sqlalchemy.orm import relationship
 from . import Base
+from .genre import Genre
 
 class Movie(Base):
     __tablename__ = 'movies'
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False, index=True)
-    genre = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    genre_id = Column(Integer, ForeignKey('genres.id', name='fk_movies_genre_id_genres'), nullable=False)
     rating = Column(Float, nullable=False)
     year = Column(Integer, nullable=False)
 
+    # жанр подгружается тем же запросом (JOIN), что и фильм
+    genre_ref = relationship(Genre, lazy='joined', innerjoin=True)
+
+    # название жанра - в API жанр по-прежнему строка
+    @property
+    def genre(self) -> str:
+        return self.genre_ref.name
+
     __table_args__ = (
         CheckConstraint('rating >= 0 AND rating <= 10', name='check_show_rating_range'),
-        CheckConstraint('year >= 1888', name='check_movie_year_ge_1888')
+        CheckConstraint('year >= 1888', name='check_movie_year_ge_1888'),
+        # составные индексы под каждую разрешенную сортировку (ключ сортировки, id):
+        # список фильмов читается по индексу без сортировки всей таблицы,
+        # а курсорная пагинация начинает чтение сразу с нужного места
+        # (ix_movies_title_id заменяет прежний индекс ix_movies_title и подходит для поиска по названию)
+        Index('ix_movies_title_id', title, id),
+        Index('ix_movies_title_desc_id', title.desc(), id),
+        Index('ix_movies_year_id', year, id),
+        Index('ix_movies_year_desc_id', year.desc(), id),
+        Index('ix_movies_rating_id', rating, id),
+        Index('ix_movies_rating_desc_id', rating.desc(), id),
+        # фильтр по жанру вместе с сортировкой по умолчанию ('-rating')
+        Index('ix_movies_genre_id_rating_desc_id', genre_id, rating.desc(), id),
     )
\ No newline at end of file
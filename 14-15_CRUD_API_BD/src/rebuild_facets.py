@@ -0,0 +1,40 @@
+'''
+Перестроение и проверка сводной таблицы фасетов фильмов.
+
+Запуск из корня проекта:
+python -m src.rebuild_facets          # пересчитать фасеты по таблице movies
+python -m src.rebuild_facets --check  # только сверить сводную таблицу с полным пересчетом
+
+С флагом --check код выхода 1 означает, что найдены расхождения.
+'''
+import argparse
+import asyncio
+import sys
+
+from src.database import AsyncSessionLocal, engine
+from src.repositories.facets import rebuild_facets, check_facets
+
+async def main(check: bool) -> int:
+    async with AsyncSessionLocal() as session:
+        if check:
+            mismatches = await check_facets(session)
+        else:
+            await rebuild_facets(session)
+            mismatches = None
+    await engine.dispose()
+    if mismatches is None:
+        print('Фасеты перестроены')
+        return 0
+    if not mismatches:
+        print('Фасеты совпадают с полным пересчетом')
+        return 0
+    for facet, values in mismatches.items():
+        for value, (stored, actual) in sorted(values.items()):
+            print(f'{facet}={value}: в сводной таблице {stored}, по факту {actual}')
+    return 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Перестроение и проверка фасетов фильмов')
+    parser.add_argument('--check', action='store_true', help='только проверить, без перестроения')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
\ No newline at end of file
@@ -0,0 +1,144 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Movie
+
+# веса признаков в оценке похожести
+GENRE_WEIGHT = 1.0
+YEAR_WEIGHT = 0.5
+RATING_WEIGHT = 0.3
+# границы для нормализации года и рейтинга в диапазон [0, 1]
+# границы фиксированные, поэтому новые фильмы не требуют пересчета всей матрицы
+YEAR_RANGE = (1888, date.today().year)
+RATING_MAX = 10.0
+# начальная емкость массивов (при заполнении емкость удваивается)
+INITIAL_CAPACITY = 1024
+
+# индекс признаков фильмов в памяти процесса для поиска похожих фильмов
+# каждый фильм - строка в массивах NumPy: код жанра, нормализованные год и рейтинг,
+# поэтому оценка всех фильмов считается векторно, без цикла Python по фильмам
+# (код жанра - номер единицы в one-hot векторе жанра: совпадение жанров равно скалярному
+# произведению one-hot векторов, но не требует хранить матрицу фильмы x жанры)
+class MovieFeatureIndex:
+    def __init__(self):
+        self.loaded = False
+        self._genre_codes: dict[int, int] = {}
+        self._positions: dict[int, int] = {}
+        self._allocate(INITIAL_CAPACITY)
+        self.size = 0
+
+    def _allocate(self, capacity: int):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.genres = np.zeros(capacity, dtype=np.int32)
+        self.years = np.zeros(capacity, dtype=np.float32)
+        self.ratings = np.zeros(capacity, dtype=np.float32)
+
+    # увеличиваем емкость массивов, сохраняя заполненную часть
+    def _grow(self, capacity: int):
+        old = (self.ids, self.genres, self.years, self.ratings)
+        self._allocate(capacity)
+        for new_array, old_array in zip((self.ids, self.genres, self.years, self.ratings), old):
+            new_array[:self.size] = old_array[:self.size]
+
+    # код жанра - номер жанра в порядке появления в индексе (ID жанра может быть любым числом)
+    def _genre_code(self, genre: int) -> int:
+        return self._genre_codes.setdefault(genre, len(self._genre_codes))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, movie_id: int):
+        return movie_id in self._positions
+
+    # заполняем индекс целиком по столбцам фильмов
+    def set_rows(self, ids: list[int], genres: list[int], years: list[int], ratings: list[float]):
+        self._genre_codes = {}
+        self.size = len(ids)
+        self._allocate(max(INITIAL_CAPACITY, self.size * 2))
+        self.ids[:self.size] = ids
+        self.genres[:self.size] = [self._genre_code(genre) for genre in genres]
+        self.years[:self.size] = normalize_year(np.asarray(years, dtype=np.float32))
+        self.ratings[:self.size] = np.asarray(ratings, dtype=np.float32) / RATING_MAX
+        self._positions = {movie_id: position for position, movie_id in enumerate(ids)}
+        self.loaded = True
+
+    # загружаем все фильмы из базы (при старте приложения)
+    async def load(self, session: AsyncSession):
+        result = await session.execute(select(Movie.id, Movie.genre_id, Movie.year, Movie.rating))
+        rows = result.all()
+        self.set_rows(
+            [row.id for row in rows],
+            [row.genre_id for row in rows],
+            [row.year for row in rows],
+            [row.rating for row in rows],
+        )
+
+    # загружаем индекс при первом обращении, если он не был загружен при старте
+    async def ensure_loaded(self, session: AsyncSession):
+        if not self.loaded:
+            await self.load(session)
+
+    # добавляем или обновляем один фильм (после записи в базу)
+    def upsert(self, movie: Movie):
+        if not self.loaded:
+            return
+        position = self._positions.get(movie.id)
+        if position is None:
+            if self.size == len(self.ids):
+                self._grow(len(self.ids) * 2)
+            position = self.size
+            self.size += 1
+            self._positions[movie.id] = position
+        self.ids[position] = movie.id
+        self.genres[position] = self._genre_code(movie.genre_id)
+        self.years[position] = normalize_year(movie.year)
+        self.ratings[position] = movie.rating / RATING_MAX
+
+    # удаляем фильм: на его место переносим последнюю строку, чтобы массивы оставались плотными
+    def remove(self, movie_id: int):
+        position = self._positions.pop(movie_id, None)
+        if position is None:
+            return
+        last = self.size - 1
+        if position != last:
+            for array in (self.ids, self.genres, self.years, self.ratings):
+                array[position] = array[last]
+            self._positions[int(self.ids[position])] = position
+        self.size = last
+
+    # сбрасываем индекс (он будет загружен заново при следующем обращении)
+    def reset(self):
+        self.__init__()
+
+    # оценки похожести всех фильмов на фильм в позиции position
+    def scores(self, position: int) -> np.ndarray:
+        size = self.size
+        genre_match = self.genres[:size] == self.genres[position]
+        year_proximity = 1 - np.abs(self.years[:size] - self.years[position])
+        return GENRE_WEIGHT * genre_match + YEAR_WEIGHT * year_proximity + RATING_WEIGHT * self.ratings[:size]
+
+    # ID k самых похожих фильмов (при равной оценке - по возрастанию ID)
+    def top_k(self, movie_id: int, k: int) -> list[int]:
+        position = self._positions.get(movie_id)
+        if position is None or self.size < 2:
+            return []
+        scores = self.scores(position)
+        scores[position] = -np.inf
+        k = min(k, self.size - 1)
+        # argpartition выбирает k лучших за O(n), сортируем только их
+        # при равных оценках на границе argpartition берет произвольные фильмы,
+        # поэтому добавляем всех, чья оценка равна k-й, и обрезаем после сортировки
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+        order = np.lexsort((self.ids[candidates], -scores[candidates]))
+        return self.ids[candidates[order[:k]]].tolist()
+
+# нормализация года в диапазон [0, 1]
+def normalize_year(year):
+    return (year - YEAR_RANGE[0]) / (YEAR_RANGE[1] - YEAR_RANGE[0])
+
+# общий индекс на процесс
+movie_index = MovieFeatureIndex()
\ No newline at end of file
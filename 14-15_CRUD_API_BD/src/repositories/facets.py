@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+from sqlalchemy import select, delete, func, Integer
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Genre, Movie, MovieFacetCount
+
+# фасеты каталога
+FACETS = ('genre', 'decade', 'rating')
+
+# десятилетие выпуска, например 1994 -> '1990'
+def decade_value(year: int) -> str:
+    return str(year // 10 * 10)
+
+# диапазон рейтинга шириной 1, например 8.1 -> '8-9' (рейтинг 10 попадает в '9-10')
+def rating_value(rating: float) -> str:
+    bucket = min(int(rating), 9)
+    return f'{bucket}-{bucket + 1}'
+
+# значения фасетов для одного фильма
+def movie_facet_values(genre: str, year: int, rating: float) -> list[tuple[str, str]]:
+    return [('genre', genre), ('decade', decade_value(year)), ('rating', rating_value(rating))]
+
+# изменяем счетчики фасетов фильма на delta (+1 при добавлении, -1 при удалении)
+# вызывается внутри транзакции репозитория фильмов, поэтому счетчики меняются вместе с данными
+async def apply_facet_delta(session: AsyncSession, values: list[tuple[str, str]], delta: int):
+    for facet, value in values:
+        statement = insert(MovieFacetCount).values(facet=facet, value=value, count=delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=[MovieFacetCount.facet, MovieFacetCount.value],
+            set_={'count': MovieFacetCount.count + delta}
+        )
+        await session.execute(statement)
+
+# переносим счетчики со старых значений фасетов фильма на новые (при обновлении фильма)
+async def move_facet_counts(session: AsyncSession, old_values: list[tuple[str, str]], new_values: list[tuple[str, str]]):
+    removed = [value for value in old_values if value not in new_values]
+    added = [value for value in new_values if value not in old_values]
+    await apply_facet_delta(session, removed, -1)
+    await apply_facet_delta(session, added, 1)
+
+# фасеты из сводной таблицы в виде {фасет: {значение: количество}}
+async def get_facets(session: AsyncSession) -> dict[str, dict[str, int]]:
+    result = await session.execute(select(MovieFacetCount).where(MovieFacetCount.count > 0))
+    facets = {facet: {} for facet in FACETS}
+    for row in result.scalars():
+        facets[row.facet][row.value] = row.count
+    return facets
+
+# полный пересчет фасетов по таблице movies (для перестроения и проверки)
+async def count_facets(session: AsyncSession) -> dict[str, dict[str, int]]:
+    facets = {facet: defaultdict(int) for facet in FACETS}
+    # жанры считаем по genre_id (по индексу), а названия берем из справочника
+    result = await session.execute(
+        select(Genre.name, func.count(Movie.id)).join(Movie.genre_ref).group_by(Movie.genre_id, Genre.name)
+    )
+    facets['genre'].update(dict(result.all()))
+    queries = {
+        'decade': (Movie.year // 10 * 10, lambda decade: str(int(decade))),
+        'rating': (func.min(func.cast(Movie.rating, Integer), 9), lambda bucket: f'{bucket}-{bucket + 1}'),
+    }
+    for facet, (expression, to_value) in queries.items():
+        result = await session.execute(select(expression, func.count()).group_by(expression))
+        for key, count in result.all():
+            facets[facet][to_value(key)] += count
+    return {facet: dict(values) for facet, values in facets.items()}
+
+# перестраиваем сводную таблицу с нуля
+async def rebuild_facets(session: AsyncSession):
+    facets = await count_facets(session)
+    await session.execute(delete(MovieFacetCount))
+    session.add_all([
+        MovieFacetCount(facet=facet, value=value, count=count)
+        for facet, values in facets.items()
+        for value, count in values.items()
+    ])
+    await session.commit()
+
+# сравниваем сводную таблицу с полным пересчетом, возвращаем расхождения
+# в виде {фасет: {значение: (в сводной таблице, по факту)}}
+async def check_facets(session: AsyncSession) -> dict[str, dict[str, tuple[int, int]]]:
+    stored = await get_facets(session)
+    actual = await count_facets(session)
+    mismatches = {}
+    for facet in FACETS:
+        values = set(stored[facet]) | set(actual[facet])
+        diff = {
+            value: (stored[facet].get(value, 0), actual[facet].get(value, 0))
+            for value in values
+            if stored[facet].get(value, 0) != actual[facet].get(value, 0)
+        }
+        if diff:
+            mismatches[facet] = diff
+    return mismatches
\ No newline at end of file
@@ -0,0 +1,62 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.models import Genre
+
+# кэш справочника жанров в памяти процесса: название <-> ID
+# жанры только добавляются и не переименовываются, поэтому записи кэша не устаревают;
+# жанр, добавленный другим процессом, находится запросом к базе при первом промахе
+class GenreCache:
+    def __init__(self):
+        self.loaded = False
+        self.ids: dict[str, int] = {}
+        self.names: dict[int, str] = {}
+
+    # загружаем весь справочник (при старте приложения)
+    async def load(self, session: AsyncSession):
+        result = await session.execute(select(Genre.id, Genre.name))
+        self.ids, self.names = {}, {}
+        for genre_id, name in result.all():
+            self.remember(genre_id, name)
+        self.loaded = True
+
+    def remember(self, genre_id: int, name: str):
+        self.ids[name] = genre_id
+        self.names[genre_id] = name
+
+    # ID жанра по названию или None, если такого жанра нет
+    async def get_id(self, session: AsyncSession, name: str) -> int | None:
+        if not self.loaded:
+            await self.load(session)
+        genre_id = self.ids.get(name)
+        if genre_id is None:
+            genre_id = await session.scalar(select(Genre.id).where(Genre.name == name))
+            if genre_id is not None:
+                self.remember(genre_id, name)
+        return genre_id
+
+    def reset(self):
+        self.__init__()
+
+# общий кэш на процесс
+genre_cache = GenreCache()
+
+# жанр по названию для привязки к фильму (создается, если его еще нет)
+# объект жанра подставляется в сессию через merge(load=False), без отдельного SELECT
+# (merge без загрузки принимает только "чистый" объект, поэтому сначала делаем его отсоединенным)
+async def get_or_create_genre(session: AsyncSession, name: str) -> Genre:
+    genre_id = await genre_cache.get_id(session, name)
+    if genre_id is None:
+        # ON CONFLICT на случай, если тот же жанр одновременно добавляет другой запрос
+        await session.execute(insert(Genre).values(name=name).on_conflict_do_nothing(index_elements=[Genre.name]))
+        genre_id = await session.scalar(select(Genre.id).where(Genre.name == name))
+        # в кэш новый жанр попадет только после фиксации транзакции (см. remember_genre)
+    genre = Genre(id=genre_id, name=name)
+    make_transient_to_detached(genre)
+    return await session.merge(genre, load=False)
+
+# запоминаем жанр в кэше после успешной фиксации транзакции
+def remember_genre(genre: Genre):
+    genre_cache.remember(genre.id, genre.name)
\ No newline at end of file
@@ -1,7 +1,14 @@
-from sqlalchemy import select
+import base64
+import json
+
+from sqlalchemy import select, or_, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.models import Movie
 from src.schemas.movie import MovieCreate, MovieUpdate
+from src.repositories.facets import movie_facet_values, apply_facet_delta, move_facet_counts
+from src.recommendations import movie_index
+from src.leaderboard import leaderboard
+from src.repositories.genres import genre_cache, get_or_create_genre, remember_genre
 
 # создаем словарь с разрешенными сортировками
 ALLOWED_ORDERS = {
@@ -15,56 +22,194 @@ ALLOWED_ORDERS = {
     '-id': Movie.id.desc()
 }
 
+# сортировка по умолчанию
+DEFAULT_ORDER = '-rating'
+
+# столбцы, по которым идет сортировка для каждого ключа (для курсорной пагинации)
+ORDER_COLUMNS = {
+    'title': Movie.title,
+    'year': Movie.year,
+    'rating': Movie.rating,
+    'id': Movie.id,
+}
+
+# ошибка при передаче некорректного курсора
+class InvalidCursorError(ValueError):
+    pass
+
+# курсор - непрозрачная строка с ключом сортировки и позицией последнего фильма на странице
+def encode_cursor(order_key: str, movie: Movie) -> str:
+    column = ORDER_COLUMNS[order_key.lstrip('-')]
+    payload = json.dumps([order_key, getattr(movie, column.key), movie.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+# разбираем курсор и проверяем, что он выдан для той же сортировки
+# курсор приходит от клиента и может быть подделан, поэтому проверяем и форму, и типы значений:
+# ['ключ сортировки', значение столбца сортировки, id фильма]
+def decode_cursor(cursor: str, order_key: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Некорректный курсор')
+    if not isinstance(payload, list) or len(payload) != 3:
+        raise InvalidCursorError('Некорректный курсор')
+    cursor_order, value, movie_id = payload
+    if cursor_order != order_key:
+        raise InvalidCursorError('Курсор выдан для другой сортировки')
+    if not is_cursor_value(order_key, value) or type(movie_id) is not int:
+        raise InvalidCursorError('Некорректный курсор')
+    return value, movie_id
+
+# значение курсора должно совпадать по типу со столбцом сортировки (bool в JSON - не число)
+def is_cursor_value(order_key: str, value) -> bool:
+    python_type = ORDER_COLUMNS[order_key.lstrip('-')].type.python_type
+    if python_type is str:
+        return isinstance(value, str)
+    if python_type is float:
+        return type(value) in (int, float)
+    return type(value) is python_type
+
+# условие "после позиции курсора" для сортировки (ключ, id):
+# ключ <= значения (или >= при сортировке по возрастанию) ограничивает диапазон чтения индекса,
+# а условие с id отсекает уже показанные фильмы с тем же значением ключа
+def after_cursor(order_key: str, value, movie_id: int):
+    descending = order_key.startswith('-')
+    column = ORDER_COLUMNS[order_key.lstrip('-')]
+    if column is Movie.id:
+        return Movie.id < movie_id if descending else Movie.id > movie_id
+    if descending:
+        return (column <= value) & or_(column < value, Movie.id > movie_id)
+    return (column >= value) & or_(column > value, Movie.id > movie_id)
+
+# значения фасетов фильма (жанр, десятилетие, диапазон рейтинга)
+def facet_values(movie: Movie) -> list[tuple[str, str]]:
+    return movie_facet_values(movie.genre, movie.year, movie.rating)
+
+# переносим данные из схемы в фильм: название жанра заменяем записью из справочника жанров
+# (жанр получаем до изменения полей, чтобы автосброс сессии не записал фильм без жанра)
+async def apply_movie_data(session: AsyncSession, movie: Movie, data: dict):
+    genre = data.pop('genre', None)
+    if genre is not None:
+        movie.genre_ref = await get_or_create_genre(session, genre)
+    for field, value in data.items():
+        setattr(movie, field, value)
+
 # функция для создания фильма
 async def create_movie(session: AsyncSession, data: MovieCreate) -> Movie:
-    new_movie = Movie(**data.model_dump())
+    new_movie = Movie()
+    await apply_movie_data(session, new_movie, data.model_dump())
     session.add(new_movie)
+    # счетчики фасетов меняем в той же транзакции, что и сам фильм
+    await apply_facet_delta(session, facet_values(new_movie), 1)
     await session.commit()
+    # кэш жанров, индекс похожих фильмов и таблицу лидеров обновляем только после успешной фиксации
+    remember_genre(new_movie.genre_ref)
+    movie_index.upsert(new_movie)
+    leaderboard.upsert(new_movie)
     return new_movie
 
 # функция для получения одного фильма по ID
 async def get_movie(session: AsyncSession, movie_id: int) -> Movie | None:
     return await session.get(Movie, movie_id)
 
-# функция для получения списка фильмов
-async def get_list_movies(
-    session: AsyncSession,
-    year_min: int | None = None,        
-    year_max: int | None = None,        
-    min_rating: float | None = None,    
-    order_by: str | None = '-rating',   
-    limit: int = 50, 
+# собираем запрос списка фильмов с фильтрами, сортировкой и пагинацией
+def build_list_query(
+    genre_id: int | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    min_rating: float | None = None,
+    order_by: str | None = DEFAULT_ORDER,
+    limit: int = 50,
     offset: int = 0,
-) -> list[Movie]:
-    
+    cursor: str | None = None,
+) -> Select:
     query = select(Movie)
-    
+
+    if genre_id is not None:
+        query = query.where(Movie.genre_id == genre_id)
     if year_min is not None:
         query = query.where(Movie.year >= year_min)
     if year_max is not None:
         query = query.where(Movie.year <= year_max)
     if min_rating is not None:
         query = query.where(Movie.rating >= min_rating)
-    
-    key = order_by or '-rating'
-    primary_order = ALLOWED_ORDERS.get(key, Movie.rating.desc())
-    query = query.order_by(primary_order, Movie.id.asc())
 
-    limit = max(1, min(limit, 100))
-    offset = max(0, offset)
-    query = query.offset(offset).limit(limit)
+    key = get_order_key(order_by)
+    query = query.order_by(ALLOWED_ORDERS[key], Movie.id.asc())
+
+    limit = clamp_limit(limit)
+    # с курсором продолжаем чтение после последнего фильма предыдущей страницы,
+    # поэтому стоимость любой страницы одинакова, в отличие от OFFSET
+    if cursor:
+        query = query.where(after_cursor(key, *decode_cursor(cursor, key)))
+    else:
+        query = query.offset(max(0, offset))
+    return query.limit(limit)
+
+# размер страницы - от 1 до 100 фильмов
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, 100))
+
+# неизвестные сортировки заменяем сортировкой по умолчанию
+def get_order_key(order_by: str | None) -> str:
+    key = order_by or DEFAULT_ORDER
+    return key if key in ALLOWED_ORDERS else DEFAULT_ORDER
 
+# функция для получения списка фильмов
+async def get_list_movies(
+    session: AsyncSession,
+    genre: str | None = None,
+    year_min: int | None = None,        
+    year_max: int | None = None,        
+    min_rating: float | None = None,    
+    order_by: str | None = DEFAULT_ORDER,   
+    limit: int = 50, 
+    offset: int = 0,
+    cursor: str | None = None,
+) -> list[Movie]:
+    # первые страницы сортировки по умолчанию (главная страница) отдаем из таблицы лидеров в памяти
+    if get_order_key(order_by) == DEFAULT_ORDER and cursor is None and (year_min, year_max, min_rating) == (None, None, None):
+        movies = await leaderboard.get_page(session, genre, max(0, offset), clamp_limit(limit))
+        if movies is not None:
+            return movies
+    # жанр фильтруем по ID из кэша справочника: сравнение чисел по индексу вместо сравнения строк
+    genre_id = None
+    if genre is not None:
+        genre_id = await genre_cache.get_id(session, genre)
+        if genre_id is None:
+            return []
+    query = build_list_query(genre_id, year_min, year_max, min_rating, order_by, limit, offset, cursor)
     result = await session.execute(query)
     return list(result.scalars().all())
 
+# получаем фильмы по списку ID в том же порядке (отсутствующие пропускаются)
+async def get_movies_by_ids(session: AsyncSession, movie_ids: list[int]) -> list[Movie]:
+    if not movie_ids:
+        return []
+    result = await session.execute(select(Movie).where(Movie.id.in_(movie_ids)))
+    movies = {movie.id: movie for movie in result.scalars()}
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+# похожие фильмы: оценки считает индекс в памяти, из базы читаются только найденные фильмы
+async def get_similar_movies(session: AsyncSession, movie: Movie, limit: int = 10) -> list[Movie]:
+    await movie_index.ensure_loaded(session)
+    # фильм мог быть добавлен другим процессом - добавляем или обновляем его в индексе
+    movie_index.upsert(movie)
+    return await get_movies_by_ids(session, movie_index.top_k(movie.id, clamp_limit(limit)))
+
 # полное обновление фильма
 async def put_movie(session: AsyncSession, movie_id: int, movie_data: MovieCreate) -> Movie | None:
     movie = await session.get(Movie, movie_id)
     if not movie:
         return None
-    for field, value in movie_data.model_dump().items():
-        setattr(movie, field, value)
+    old_values = facet_values(movie)
+    old_genre = movie.genre
+    await apply_movie_data(session, movie, movie_data.model_dump())
+    await move_facet_counts(session, old_values, facet_values(movie))
     await session.commit()
+    remember_genre(movie.genre_ref)
+    movie_index.upsert(movie)
+    leaderboard.upsert(movie, old_genre)
     return movie
 
 # частичное обновление фильма
@@ -72,9 +217,14 @@ async def patch_movie(session: AsyncSession, movie_id: int, movie_data: MovieUpd
     movie = await session.get(Movie, movie_id)
     if not movie:
         return None
-    for field, value in movie_data.model_dump(exclude_unset=True).items():
-        setattr(movie, field, value)
+    old_values = facet_values(movie)
+    old_genre = movie.genre
+    await apply_movie_data(session, movie, movie_data.model_dump(exclude_unset=True))
+    await move_facet_counts(session, old_values, facet_values(movie))
     await session.commit()
+    remember_genre(movie.genre_ref)
+    movie_index.upsert(movie)
+    leaderboard.upsert(movie, old_genre)
     return movie
 
 # функция для удаления фильма по ID
@@ -83,5 +233,8 @@ async def delete_movie(session: AsyncSession, movie_id: int) -> bool:
     if not movie_to_delete:
         return False
     await session.delete(movie_to_delete)
+    await apply_facet_delta(session, facet_values(movie_to_delete), -1)
     await session.commit()
+    movie_index.remove(movie_id)
+    leaderboard.remove(movie_to_delete)
     return True
\ No newline at end of file
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_session
-from src.schemas.movie import MovieCreate, MovieUpdate, MovieOut
+from src.schemas.movie import MovieCreate, MovieUpdate, MovieOut, MovieFacets
 from src.repositories import movies as repo
+from src.repositories import facets as facets_repo
 
 router = APIRouter(
     prefix='/movies',
@@ -12,17 +13,37 @@ router = APIRouter(
 )
 
 # получаем список фильмов
+# для перехода на следующую страницу можно передать курсор из заголовка X-Next-Cursor
+# (тогда offset не используется, а глубина страницы не влияет на скорость ответа)
+# первые страницы сортировки по умолчанию без фильтров (кроме жанра) отдаются из таблицы лидеров в памяти
 @router.get('/', response_model=list[MovieOut])
 async def get_movies_list(
+    response: Response,
+    genre: str | None = None,
     year_min: int | None = None,
     year_max: int | None = None,
     min_rating: float | None = None,
     order_by: str | None = '-rating',
     session: AsyncSession = Depends(get_session),
     limit: int = 50, 
-    offset: int = 0
+    offset: int = 0,
+    cursor: str | None = None
 ):
-    return await repo.get_list_movies(session, year_min, year_max, min_rating, order_by, limit, offset)
+    try:
+        movies = await repo.get_list_movies(session, genre, year_min, year_max, min_rating, order_by, limit, offset, cursor)
+    except repo.InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # страница заполнена целиком - возможно, есть следующая
+    if movies and len(movies) == repo.clamp_limit(limit):
+        response.headers['X-Next-Cursor'] = repo.encode_cursor(repo.get_order_key(order_by), movies[-1])
+    return movies
+
+# получаем фасеты каталога: количество фильмов по жанрам, десятилетиям и диапазонам рейтинга
+# счетчики читаются из сводной таблицы, а не считаются по всем фильмам при каждом запросе
+# (маршрут объявлен до /{movie_id}, иначе 'facets' будет разобран как ID)
+@router.get('/facets', response_model=MovieFacets)
+async def get_movies_facets(session: AsyncSession = Depends(get_session)):
+    return await facets_repo.get_facets(session)
 
 # получаем фильм по ID
 @router.get('/{movie_id}', response_model=MovieOut)
@@ -32,6 +53,14 @@ async def get_movie(movie_id: int, session: AsyncSession = Depends(get_session))
         raise HTTPException(status_code=404, detail='Фильм не найден')
     return movie
 
+# получаем фильмы, похожие на данный (совпадение жанра, близость года выпуска и рейтинг)
+@router.get('/{movie_id}/similar', response_model=list[MovieOut])
+async def get_similar_movies(movie_id: int, limit: int = 10, session: AsyncSession = Depends(get_session)):
+    movie = await repo.get_movie(session, movie_id)
+    if not movie:
+        raise HTTPException(status_code=404, detail='Фильм не найден')
+    return await repo.get_similar_movies(session, movie, limit)
+
 # создаем запись с новым фильмов в БД
 @router.post('/', response_model=MovieOut)
 async def create_movie(movie_data: MovieCreate, session: AsyncSession = Depends(get_session)):
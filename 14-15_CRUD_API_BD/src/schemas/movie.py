@@ -25,4 +25,10 @@ class MovieUpdate(BaseModel):
 
 class MovieOut(MovieBase):
     id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# количество фильмов по значениям каждого фасета
+class MovieFacets(BaseModel):
+    genre: dict[str, int]
+    decade: dict[str, int]
+    rating: dict[str, int]
\ No newline at end of file
@@ -6,7 +6,8 @@ from sqlalchemy.pool import StaticPool
 
 from src.main import app
 from src.database import get_session
-from src.models import Base, Movie
+from src.models import Base, Genre, Movie
+from src.repositories.facets import rebuild_facets
 
 # список с тестовыми фильмами
 MOVIES_TEST = [
@@ -40,8 +41,11 @@ def prepare_db(test_engine, test_sessionmaker):
             await conn.run_sync(Base.metadata.create_all)
 
         async with test_sessionmaker() as session:
-            session.add_all([Movie(title=t, genre=g, year=y, rating=r) for (t, g, y, r) in MOVIES_TEST])
+            genres = {g: Genre(name=g) for (_, g, _, _) in MOVIES_TEST}
+            session.add_all([Movie(title=t, genre_ref=genres[g], year=y, rating=r) for (t, g, y, r) in MOVIES_TEST])
             await session.commit()
+            # фильмы добавлены напрямую, минуя репозиторий, поэтому фасеты пересчитываем целиком
+            await rebuild_facets(session)
 
     asyncio.run(_setup())
     yield
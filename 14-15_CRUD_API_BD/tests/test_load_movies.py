@@ -0,0 +1,88 @@
+import csv
+
+import pytest
+from sqlalchemy import create_engine
+
+from src import load_movies
+from src.models import Base
+
+ROWS = [
+    ('Интерстеллар', 'Научная фантастика', '2014', '8.3'),
+    ('Гладиатор', 'Исторический', '2000', '8.6'),
+    ('Х', 'Драма', '1994', '8.1'),
+    ('Форрест Гамп', 'Драма', '1994', '8.1'),
+    ('Прибытие поезда', 'Документальный', '1850', '7.0'),
+    ('Унесенные призраками', 'Аниме', '2001', 'nan'),
+    ('Шрэк', 'Мультфильм', 'две тысячи', '7.7'),
+    ('Престиж', 'Триллер', '2006', '7.6'),
+    ('Тайна Коко', 'Мультфильм', '2017', '11'),
+    ('Тайна Коко', 'Мультфильм', '2017', '7.8'),
+]
+VALID_TITLES = ['Интерстеллар', 'Гладиатор', 'Форрест Гамп', 'Престиж', 'Тайна Коко']
+
+# создаем пустую файловую базу со схемой и файл с фильмами
+@pytest.fixture
+def load_env(tmp_path):
+    db_path = str(tmp_path / 'movies.db')
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    path = str(tmp_path / 'movies.tsv')
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file, delimiter='\t')
+        writer.writerow(['id', 'title', 'genre', 'year', 'rating'])
+        writer.writerows([i, *row] for i, row in enumerate(ROWS))
+    return path, db_path
+
+# тестирование загрузки: корректные строки загружены, отклоненные записаны с причиной,
+# индексы построены заново, фасеты совпадают с полным пересчетом
+def test_load_movies(load_env):
+    path, db_path = load_env
+    checkpoint = load_movies.load_file(path, db_path, batch_size=3, log=lambda message: None)
+    assert checkpoint == {'rows_read': 10, 'rows_loaded': 5, 'rows_rejected': 5, 'finished': True}
+
+    conn = load_movies.connect(db_path)
+    assert [row[0] for row in conn.execute('SELECT title FROM movies ORDER BY id')] == VALID_TITLES
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'movies'")}
+    assert {index.name for index in load_movies.Movie.__table__.indexes} <= indexes
+    facets = dict(((facet, value), count) for facet, value, count in conn.execute('SELECT * FROM movie_facet_counts'))
+    assert facets[('genre', 'Мультфильм')] == 1
+    assert facets[('decade', '2010')] == 2
+    conn.close()
+
+    with open(f'{path}.rejects.csv', encoding='utf-8') as file:
+        rejected = list(csv.reader(file))
+    assert [int(row[0]) for row in rejected] == [4, 6, 7, 8, 10]
+    assert 'год' in rejected[1][1]
+
+    # повторный запуск ничего не загружает
+    assert load_movies.load_file(path, db_path, log=lambda message: None)['rows_loaded'] == 5
+
+# тестирование продолжения после сбоя: пачки до сбоя не загружаются повторно
+def test_load_movies_resume(load_env, monkeypatch):
+    path, db_path = load_env
+    insert_batch = load_movies.insert_batch
+    calls = []
+
+    def failing_insert_batch(conn, movies):
+        calls.append(movies)
+        if len(calls) == 3:
+            raise RuntimeError('сбой загрузки')
+        insert_batch(conn, movies)
+
+    monkeypatch.setattr(load_movies, 'insert_batch', failing_insert_batch)
+    with pytest.raises(RuntimeError):
+        load_movies.load_file(path, db_path, batch_size=3, log=lambda message: None)
+    monkeypatch.setattr(load_movies, 'insert_batch', insert_batch)
+
+    conn = load_movies.connect(db_path)
+    assert load_movies.get_checkpoint(conn, load_movies.os.path.abspath(path))['rows_read'] == 6
+    conn.close()
+
+    checkpoint = load_movies.load_file(path, db_path, batch_size=3, log=lambda message: None)
+    assert checkpoint['rows_loaded'] == 5
+    conn = load_movies.connect(db_path)
+    assert [row[0] for row in conn.execute('SELECT title FROM movies ORDER BY id')] == VALID_TITLES
+    conn.close()
+    with open(f'{path}.rejects.csv', encoding='utf-8') as file:
+        assert len(list(csv.reader(file))) == 5
\ No newline at end of file
@@ -1,4 +1,28 @@
+import asyncio
+import base64
+import json
+
+import numpy as np
 import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import sqlite
+
+from src.models import Genre, Movie
+from src.repositories.movies import build_list_query, encode_cursor
+from src.repositories.facets import movie_facet_values, check_facets
+from src.recommendations import MovieFeatureIndex
+from src.leaderboard import Leaderboard, leaderboard, to_movie
+from src.repositories.genres import genre_cache
+
+# получаем план выполнения запроса (EXPLAIN QUERY PLAN) одной строкой
+def explain_query_plan(engine, query) -> str:
+    sql = str(query.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+
+    async def run():
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')
+            return ' | '.join(row[-1] for row in result)
+    return asyncio.run(run())
 
 # тестирование фильтрации
 @pytest.mark.parametrize(
@@ -61,4 +85,292 @@ def test_crud(client):
 
     # тестируем read удаленного фильма
     response = client.get(f'/movies/{movie_id}')
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+# тестирование курсорной пагинации: обход всех страниц по курсору дает тот же порядок, что и OFFSET
+@pytest.mark.parametrize('order_by', ['title', '-title', 'year', '-year', 'rating', '-rating', 'id', '-id'])
+def test_cursor_pagination(client, order_by):
+    expected = [movie['id'] for movie in client.get('/movies', params={'order_by': order_by, 'limit': 100}).json()]
+
+    ids, cursor = [], None
+    while True:
+        params = {'order_by': order_by, 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/movies', params=params)
+        assert response.status_code == 200
+        ids += [movie['id'] for movie in response.json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert ids == expected
+
+# тестирование некорректного курсора и курсора от другой сортировки
+def test_invalid_cursor(client):
+    assert client.get('/movies', params={'cursor': 'мусор'}).status_code == 400
+    cursor = client.get('/movies', params={'order_by': 'year', 'limit': 1}).headers['X-Next-Cursor']
+    assert client.get('/movies', params={'order_by': 'title', 'cursor': cursor}).status_code == 400
+
+# тестирование подделанных курсоров: неверная форма или типы значений - 400, а не 500
+@pytest.mark.parametrize('order_by, payload', [
+    ('-rating', 'abc'),
+    ('-rating', {'a': 1}),
+    ('-rating', ['-rating', 8.0]),
+    ('-rating', ['-rating', [1], 1]),
+    ('-rating', ['-rating', {'a': 1}, 1]),
+    ('-rating', ['-rating', None, 1]),
+    ('-rating', ['-rating', True, 1]),
+    ('-rating', ['-rating', 8.0, True]),
+    ('-rating', ['-rating', 8.0, 1.5]),
+    ('title', ['title', 5, 1]),
+    ('year', ['year', 2000.5, 1]),
+    ('-id', ['-id', '10', 10]),
+])
+def test_tampered_cursor(client, order_by, payload):
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    response = client.get('/movies', params={'order_by': order_by, 'cursor': cursor})
+    assert response.status_code == 400
+
+# тестирование плана запроса: каждая сортировка читается по своему составному индексу,
+# без сортировки таблицы во временном B-дереве, в том числе при переходе по курсору
+@pytest.mark.parametrize(
+    'order_by, index_name',
+    [
+        ('title', 'ix_movies_title_id'),
+        ('-title', 'ix_movies_title_desc_id'),
+        ('year', 'ix_movies_year_id'),
+        ('-year', 'ix_movies_year_desc_id'),
+        ('rating', 'ix_movies_rating_id'),
+        ('-rating', 'ix_movies_rating_desc_id'),
+    ]
+)
+def test_list_query_uses_sort_index(prepare_db, test_engine, order_by, index_name):
+    movie = Movie(id=3, title='Форрест Гамп', year=1994, rating=8.1)
+    cursor = encode_cursor(order_by, movie)
+    for query in (build_list_query(order_by=order_by), build_list_query(order_by=order_by, cursor=cursor)):
+        plan = explain_query_plan(test_engine, query)
+        assert index_name in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+# считаем фасеты по полному списку фильмов из API
+def count_facets_from_list(client) -> dict:
+    facets = {'genre': {}, 'decade': {}, 'rating': {}}
+    for movie in client.get('/movies', params={'limit': 100}).json():
+        for facet, value in movie_facet_values(movie['genre'], movie['year'], movie['rating']):
+            facets[facet][value] = facets[facet].get(value, 0) + 1
+    return facets
+
+# тестирование фасетов: счетчики из сводной таблицы следят за create/put/patch/delete
+def test_facets(client):
+    response = client.get('/movies/facets')
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets['genre']['Мультфильм'] == 2
+    assert facets['decade'] == {'1990': 1, '2000': 4, '2010': 2}
+    assert facets['rating'] == {'7-8': 3, '8-9': 4}
+
+    movie_id = client.post('/movies', json={'title': 'Дюна', 'genre': 'Фэнтези', 'rating': 10, 'year': 2021}).json()['id']
+    assert client.get('/movies/facets').json() == count_facets_from_list(client)
+    client.patch(f'/movies/{movie_id}', json={'rating': 6.5})
+    assert client.get('/movies/facets').json() == count_facets_from_list(client)
+    client.put('/movies/1', json={'title': 'Интерстеллар', 'genre': 'Драма', 'rating': 8.7, 'year': 2014})
+    assert client.get('/movies/facets').json() == count_facets_from_list(client)
+    client.delete(f'/movies/{movie_id}')
+    facets = client.get('/movies/facets').json()
+    assert facets == count_facets_from_list(client)
+    assert 'Фэнтези' not in facets['genre']
+
+# тестирование проверки сводной таблицы: расхождение с полным пересчетом обнаруживается
+def test_check_facets(prepare_db, test_sessionmaker):
+    async def run():
+        async with test_sessionmaker() as session:
+            assert await check_facets(session) == {}
+            drama = await session.scalar(select(Genre).where(Genre.name == 'Драма'))
+            session.add(Movie(title='Дюна', genre_ref=drama, year=2021, rating=7.7))
+            await session.commit()
+            return await check_facets(session)
+    mismatches = asyncio.run(run())
+    assert mismatches['genre'] == {'Драма': (1, 2)}
+    assert mismatches['decade'] == {'2020': (0, 1)}
+
+# тестирование похожих фильмов: жанр важнее всего, индекс обновляется при записи
+def test_similar_movies(client):
+    response = client.get('/movies/5/similar', params={'limit': 3})
+    assert response.status_code == 200
+    similar = [movie['title'] for movie in response.json()]
+    assert similar[0] == 'Тайна Коко'
+    assert 'Шрэк' not in similar
+    assert len(similar) == 3
+
+    movie_id = client.post('/movies', json={'title': 'Мадагаскар', 'genre': 'Мультфильм', 'rating': 6.9, 'year': 2005}).json()['id']
+    assert [movie['id'] for movie in client.get('/movies/5/similar', params={'limit': 2}).json()] == [movie_id, 7]
+
+    client.patch('/movies/7', json={'genre': 'Драма'})
+    assert client.get('/movies/5/similar', params={'limit': 1}).json()[0]['id'] == movie_id
+
+    client.delete(f'/movies/{movie_id}')
+    assert movie_id not in [movie['id'] for movie in client.get('/movies/5/similar').json()]
+    assert client.get('/movies/999/similar').status_code == 404
+
+# тестирование индекса: top-k совпадает с полной сортировкой оценок, посчитанных циклом Python
+def test_feature_index_top_k():
+    random = np.random.default_rng(0)
+    index = MovieFeatureIndex()
+    index.set_rows(
+        list(range(1, 2001)),
+        random.integers(1, 5, 2000).tolist(),
+        random.integers(1900, 2024, 2000).tolist(),
+        np.round(random.uniform(0, 10, 2000), 1).tolist(),
+    )
+    for movie_id in range(3, 1501, 3):
+        index.remove(movie_id)
+    index.upsert(Movie(id=5000, genre_id=100, year=1960, rating=9.9))
+    index.upsert(Movie(id=4, genre_id=100, year=1961, rating=5.0))
+
+    position = index._positions[4]
+    scores = index.scores(position)
+    expected = sorted(
+        (int(index.ids[i]) for i in range(len(index)) if i != position),
+        key=lambda movie_id: (-scores[index._positions[movie_id]], movie_id)
+    )[:10]
+    assert index.top_k(4, 10) == expected
+    assert index.top_k(4, 10)[0] == 5000
+    assert 3 not in index and len(index) == 2000 - 500 + 1
+
+# тестирование равных оценок на границе top-k: побеждают фильмы с меньшими ID
+def test_feature_index_top_k_ties():
+    index = MovieFeatureIndex()
+    ids = list(range(200, 0, -1))
+    index.set_rows(ids, [1] * 200, [2000] * 200, [7.0] * 200)
+    index.upsert(Movie(id=1000, genre_id=1, year=2000, rating=1.0))
+    assert index.top_k(1000, 5) == [1, 2, 3, 4, 5]
+    assert index.top_k(1, 3) == [2, 3, 4]
+
+# сравниваем страницы сортировки по умолчанию с той же выборкой из SQL
+# (фильтр min_rating=0 ничего не отсекает, но отключает таблицу лидеров)
+def assert_leaderboard_matches_sql(client):
+    for genre in (None, 'Мультфильм', 'Драма'):
+        for offset in range(0, 9):
+            for limit in (1, 2, 4):
+                params = {'offset': offset, 'limit': limit}
+                if genre:
+                    params['genre'] = genre
+                from_memory = client.get('/movies', params=params).json()
+                from_sql = client.get('/movies', params={**params, 'min_rating': 0}).json()
+                assert from_memory == from_sql, params
+
+# тестирование таблицы лидеров: после любых изменений страницы совпадают с сортировкой SQL
+def test_leaderboard_matches_sql(client, monkeypatch):
+    # маленький топ, чтобы проверить вытеснение, перечитывание и переход к SQL за пределами топа
+    monkeypatch.setattr(leaderboard, 'size', 3)
+    leaderboard.reset()
+    assert_leaderboard_matches_sql(client)
+
+    movie_id = client.post('/movies', json={'title': 'Дюна', 'genre': 'Мультфильм', 'rating': 9.0, 'year': 2021}).json()['id']
+    assert_leaderboard_matches_sql(client)
+    # лучший фильм опускается вниз рейтинга - на его место должен встать фильм из базы
+    client.patch('/movies/2', json={'rating': 1.0})
+    assert_leaderboard_matches_sql(client)
+    # фильм переходит в другой жанр
+    client.put(f'/movies/{movie_id}', json={'title': 'Дюна', 'genre': 'Драма', 'rating': 8.1, 'year': 2021})
+    assert_leaderboard_matches_sql(client)
+    client.delete('/movies/1')
+    client.delete('/movies/7')
+    assert_leaderboard_matches_sql(client)
+
+# тестирование таблицы лидеров: первая страница по умолчанию отдается без запросов к базе
+def test_leaderboard_serves_without_sql(client, test_engine):
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, 'before_cursor_execute', count_statement)
+    try:
+        movies = client.get('/movies', params={'limit': 5}).json()
+    finally:
+        event.remove(test_engine.sync_engine, 'before_cursor_execute', count_statement)
+    assert [movie['title'] for movie in movies][:2] == ['Гладиатор', 'Интерстеллар']
+    assert statements == []
+
+# тестирование таблиц лидеров по жанрам: для жанра, которого нет в справочнике, таблица не создается
+def test_leaderboard_unknown_genre(client):
+    assert client.get('/movies', params={'genre': 'Нет такого жанра'}).json() == []
+    assert 'Нет такого жанра' not in leaderboard.boards
+    assert client.get('/movies', params={'genre': 'Драма'}).json()[0]['title'] == 'Форрест Гамп'
+    assert 'Драма' in leaderboard.boards
+
+# тестирование загрузки таблицы лидеров: изменения, пришедшие во время запроса к базе, не теряются
+def test_leaderboard_replays_changes_during_load(prepare_db, test_sessionmaker):
+    async def run():
+        board = Leaderboard(size=3)
+        async with test_sessionmaker() as session:
+            genre_cache.reset()
+            await genre_cache.load(session)
+            # запрос выборки уже выполнен, но его результат возвращается только после изменений
+            started, release = asyncio.Event(), asyncio.Event()
+            execute = session.execute
+
+            async def slow_execute(*args, **kwargs):
+                result = await execute(*args, **kwargs)
+                started.set()
+                await release.wait()
+                return result
+            session.execute = slow_execute
+
+            loading = asyncio.create_task(board.get_page(session, 'Мультфильм', 0, 3))
+            await started.wait()
+            dune = {'id': 100, 'title': 'Дюна', 'genre_id': genre_cache.ids['Мультфильм'],
+                    'year': 2021, 'rating': 9.9, 'genre': 'Мультфильм'}
+            board.upsert(to_movie(dune))
+            board.remove(await session.get(Movie, 5))
+            release.set()
+            return await loading
+    page = asyncio.run(run())
+    genre_cache.reset()
+    assert [movie.title for movie in page] == ['Дюна', 'Тайна Коко']
+
+# тестирование ограничения числа жанровых таблиц: общая таблица не считается,
+# а параллельные загрузки разных жанров не превышают MAX_GENRE_BOARDS
+def test_leaderboard_genre_boards_limit(prepare_db, test_sessionmaker, monkeypatch):
+    monkeypatch.setattr('src.leaderboard.MAX_GENRE_BOARDS', 2)
+
+    async def run():
+        board = Leaderboard(size=3)
+        async with test_sessionmaker() as session:
+            genre_cache.reset()
+            await genre_cache.load(session)
+            assert await board.get_board(session) is not None
+
+        async def load(genre):
+            async with test_sessionmaker() as session:
+                return await board.get_board(session, genre)
+        boards = await asyncio.gather(*[load(genre) for genre in ('Драма', 'Аниме', 'Триллер', 'Мультфильм')])
+        return board, boards
+    board, boards = asyncio.run(run())
+    genre_cache.reset()
+    assert sum(b is not None for b in boards) == 2
+    assert len(board.boards) == 3 and None in board.boards
+
+# тестирование плана запроса с фильтром по жанру: фильтр и сортировка по умолчанию идут по одному индексу
+def test_genre_filter_uses_index(prepare_db, test_engine):
+    plan = explain_query_plan(test_engine, build_list_query(genre_id=1, order_by='-rating'))
+    assert 'ix_movies_genre_id_rating_desc_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+# тестирование справочника жанров: фильтр по жанру, новый жанр через API, смена жанра
+def test_genres(client):
+    titles = lambda params: [movie['title'] for movie in client.get('/movies', params=params).json()]
+    assert titles({'genre': 'Мультфильм', 'order_by': 'title'}) == ['Тайна Коко', 'Шрэк']
+    assert titles({'genre': 'Вестерн'}) == []
+
+    movie = client.post('/movies', json={'title': 'Хороший, плохой, злой', 'genre': 'Вестерн', 'rating': 8.8, 'year': 1966}).json()
+    assert movie['genre'] == 'Вестерн'
+    assert titles({'genre': 'Вестерн', 'min_rating': 0}) == ['Хороший, плохой, злой']
+
+    response = client.patch('/movies/5', json={'genre': 'Вестерн'})
+    assert response.json()['genre'] == 'Вестерн'
+    assert client.get('/movies/5').json()['genre'] == 'Вестерн'
+    assert titles({'genre': 'Вестерн', 'order_by': 'title'}) == ['Хороший, плохой, злой', 'Шрэк']
+    assert titles({'genre': 'Мультфильм'}) == ['Тайна Коко']
\ No newline at end of file
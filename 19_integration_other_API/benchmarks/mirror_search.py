@@ -0,0 +1,53 @@
+'''
+Замер поиска по локальному зеркалу шоу (SQLite FTS5).
+
+Запуск из папки проекта:
+python -m benchmarks.mirror_search --shows 70000 --queries 2000
+
+Зеркало во временном файле заполняется синтетическими шоу (в TVMaze их около 70 тысяч).
+Названия из 1-4 слов; слова выбираются с весами по закону Ципфа, как в настоящих названиях:
+несколько слов ('the', 'of') встречаются очень часто, большинство - редко.
+Запросы - начала названий существующих шоу, как у пользователей.
+'''
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from tv_mirror import ShowMirror
+
+VOCABULARY_SIZE = 20000
+
+# случайное слово из латинских букв
+def random_word() -> str:
+    return ''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=random.randint(3, 9)))
+
+def main(shows: int, queries: int):
+    random.seed(0)
+    words = [random_word() for _ in range(VOCABULARY_SIZE)]
+    weights = [1 / rank for rank in range(1, VOCABULARY_SIZE + 1)]
+    names = [' '.join(random.choices(words, weights, k=random.randint(1, 4))) for _ in range(shows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = ShowMirror(str(Path(tmp) / 'mirror.db'))
+        with mirror._conn:
+            mirror._upsert([{'id': i, 'name': name, 'updated': 0} for i, name in enumerate(names, start=1)])
+        latencies = []
+        for _ in range(queries):
+            name_words = random.choice(names).split()
+            q = ' '.join(name_words[:random.randint(1, len(name_words))])
+            started = time.perf_counter()
+            mirror.search(q)
+            latencies.append((time.perf_counter() - started) * 1000)
+        mirror.close()
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f'{shows} шоу, {queries} поисков')
+    print(f'p50 {percentiles[49]:.3f} мс, p99 {percentiles[98]:.3f} мс, попаданий {mirror.metrics["hits"]}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер поиска по зеркалу шоу')
+    parser.add_argument('--shows', type=int, default=70000, help='сколько шоу в зеркале')
+    parser.add_argument('--queries', type=int, default=2000, help='сколько поисков')
+    args = parser.parse_args()
+    main(args.shows, args.queries)
\ No newline at end of file
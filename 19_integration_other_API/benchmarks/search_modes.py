@@ -0,0 +1,89 @@
+'''
+Замер режимов ответа поиска /tv/search: full, compact и raw.
+
+Запуск из папки проекта:
+python -m benchmarks.search_modes --requests 500 --shows 10
+
+TVMaze заменен поддельным сервером, который отвечает шоу в полном формате TVMaze
+(описание, картинки, ссылки, расписание). Каждый запрос ищет новое название, поэтому ответ не берется из кэша.
+Для каждого режима выводятся:
+- задержка ответа эндпоинта (p50 и p99);
+- пик выделенной памяти при обработке одного запроса (tracemalloc, задержки с ним выше обычных);
+- сколько памяти занимает кэш после всех запросов (в режиме raw кэша нет).
+'''
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+import httpx
+
+from main import app
+from tv_client import TVMazeClient
+from tv_scheduler import RequestScheduler, TokenBucket
+
+# шоу в полном формате TVMaze
+def full_show(show_id: int) -> dict:
+    return {
+        'id': show_id, 'url': f'https://www.tvmaze.com/shows/{show_id}/show', 'name': f'Show {show_id}',
+        'type': 'Scripted', 'language': 'English', 'genres': ['Drama', 'Comedy'], 'status': 'Ended',
+        'runtime': 30, 'averageRuntime': 30, 'premiered': '2012-04-15', 'ended': '2017-04-16',
+        'officialSite': f'http://www.hbo.com/show-{show_id}', 'schedule': {'time': '22:00', 'days': ['Sunday']},
+        'rating': {'average': 6.5}, 'weight': 97,
+        'network': {'id': 8, 'name': 'HBO', 'country': {'name': 'United States', 'code': 'US', 'timezone': 'America/New_York'},
+                    'officialSite': 'https://www.hbo.com/'},
+        'webChannel': None, 'dvdCountry': None, 'externals': {'tvrage': 30124, 'thetvdb': 220411, 'imdb': 'tt1723816'},
+        'image': {'medium': f'https://static.tvmaze.com/uploads/images/medium_portrait/{show_id}.jpg',
+                  'original': f'https://static.tvmaze.com/uploads/images/original_untouched/{show_id}.jpg'},
+        'summary': '<p>' + 'This Emmy winning series is a comic look at the assorted humiliations and rare triumphs. ' * 8 + '</p>',
+        'updated': 1704794122,
+        '_links': {'self': {'href': f'https://api.tvmaze.com/shows/{show_id}'},
+                   'previousepisode': {'href': f'https://api.tvmaze.com/episodes/{show_id}', 'name': 'Latching'}},
+    }
+
+def make_transport(shows: int) -> httpx.MockTransport:
+    body = json.dumps([{'score': 0.9 - i / 100, 'show': full_show(i)} for i in range(1, shows + 1)]).encode()
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body, headers={'Content-Type': 'application/json'})
+    return httpx.MockTransport(handler)
+
+async def measure(mode: str, total: int, shows: int) -> dict:
+    client = TVMazeClient(transport=make_transport(shows), scheduler=RequestScheduler(TokenBucket(10 ** 6, 10 ** 6)))
+    app.state.tv_client = client
+    latencies, peaks = [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as api:
+        tracemalloc.start()
+        cache_before = tracemalloc.get_traced_memory()[0]
+        for i in range(total):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            response = await api.get('/tv/search', params={'q': f'show {i}', 'mode': mode})
+            latencies.append((time.perf_counter() - started) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    cache_size = tracemalloc.get_traced_memory()[0] - cache_before
+    tracemalloc.stop()
+    await client.close()
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'p50': percentiles[49], 'p99': percentiles[98],
+        'peak_kb': statistics.median(peaks) / 1024, 'cache_mb': cache_size / 1024 / 1024,
+        'body_kb': len(response.content) / 1024,
+    }
+
+async def main(total: int, shows: int):
+    print(f'{total} запросов, в ответе TVMaze {shows} шоу')
+    print(f'{"режим":>8} {"p50, мс":>9} {"p99, мс":>9} {"пик, КБ":>9} {"ответ, КБ":>10} {"кэш, МБ":>9}')
+    for mode in ('full', 'compact', 'raw'):
+        result = await measure(mode, total, shows)
+        print(f'{mode:>8} {result["p50"]:>9.2f} {result["p99"]:>9.2f} {result["peak_kb"]:>9.0f} '
+              f'{result["body_kb"]:>10.1f} {result["cache_mb"]:>9.2f}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер режимов ответа поиска')
+    parser.add_argument('--requests', type=int, default=500, help='сколько запросов в каждом режиме')
+    parser.add_argument('--shows', type=int, default=10, help='сколько шоу в ответе TVMaze')
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.shows))
\ No newline at end of file
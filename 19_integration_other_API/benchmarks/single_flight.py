@@ -0,0 +1,51 @@
+'''
+Замер объединения одинаковых одновременных запросов (single-flight) в TVMazeClient.
+
+Запуск из папки проекта:
+python -m benchmarks.single_flight --burst 500 --queries 5 --delay 0.2
+
+Всплеск из burst одновременных поисков по queries популярным названиям отправляется в клиент,
+TVMaze заменен поддельным сервером с задержкой ответа delay секунд.
+Сравниваются число запросов к TVMaze и время всплеска с объединением и без него.
+'''
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from tv_cache import ResponseCache
+from tv_client import TVMazeClient
+
+# поддельный TVMaze с задержкой ответа, считает запросы
+def make_transport(delay: float, calls: list) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params['q'])
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json=[{'score': 1, 'show': {'name': request.url.params['q']}}])
+    return httpx.MockTransport(handler)
+
+# один всплеск: возвращает число запросов к TVMaze и время в секундах
+async def run_burst(burst: int, queries: int, delay: float, single_flight: bool) -> tuple[int, float]:
+    calls = []
+    client = TVMazeClient(transport=make_transport(delay, calls), cache=ResponseCache(single_flight=single_flight))
+    start = time.perf_counter()
+    await asyncio.gather(*[client.search_shows(f'show {i % queries}') for i in range(burst)])
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return len(calls), elapsed
+
+async def main(burst: int, queries: int, delay: float):
+    print(f'{burst} одновременных поисков по {queries} названиям, ответ TVMaze {delay * 1000:.0f} мс')
+    print(f'{"объединение":>12} {"запросов к TVMaze":>18} {"время":>10}')
+    for single_flight in (False, True):
+        calls, elapsed = await run_burst(burst, queries, delay, single_flight)
+        print(f'{"да" if single_flight else "нет":>12} {calls:>18} {elapsed * 1000:>7.0f} мс')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер single-flight в TVMazeClient')
+    parser.add_argument('--burst', type=int, default=500, help='число одновременных поисков')
+    parser.add_argument('--queries', type=int, default=5, help='число разных названий')
+    parser.add_argument('--delay', type=float, default=0.2, help='задержка ответа TVMaze в секундах')
+    args = parser.parse_args()
+    asyncio.run(main(args.burst, args.queries, args.delay))
\ No newline at end of file
@@ -0,0 +1,91 @@
+'''
+Замер пропускной способности эндпоинта с блокирующим клиентом requests.
+
+Запуск из папки проекта:
+python -m benchmarks.sync_client --requests 100 --concurrency 20 --delay 0.1
+
+Сравниваются два варианта эндпоинта /search при concurrency одновременных запросах:
+- до: requests.get() прямо в async-эндпоинте (блокирует цикл событий);
+- после: SyncTVMazeClient из request_tvmaze.py (пул потоков и общая requests.Session).
+TVMaze заменен локальным многопоточным сервером, который отвечает через delay секунд.
+'''
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fastapi import FastAPI
+import httpx
+import requests
+
+import request_tvmaze
+
+# локальный медленный TVMaze: каждый ответ через delay секунд, запросы обслуживаются параллельно
+def start_slow_server(delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps([{'score': 1, 'show': {'url': self.path}}]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# эндпоинт "до": блокирующий requests.get() в async-функции, как было в request_tvmaze.py
+def make_blocking_app(base_url: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/search')
+    async def sync_search_shows(q: str):
+        response = requests.get(url=f'{base_url}/search/shows', params={'q': q})
+        return response.json()
+
+    return app
+
+# отправляем total запросов в приложение, не больше concurrency одновременно; возвращаем запросов в секунду
+async def measure(app: FastAPI, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get('/search', params={'q': f'show {i}'})
+                response.raise_for_status()
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(total)])
+        return total / (time.perf_counter() - started)
+
+async def main(total: int, concurrency: int, delay: float):
+    server = start_slow_server(delay)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    print(f'{total} запросов, {concurrency} одновременно, ответ TVMaze {delay * 1000:.0f} мс')
+
+    blocking = await measure(make_blocking_app(base_url), total, concurrency)
+    print(f'до (requests в async-эндпоинте): {blocking:8.1f} запросов/с')
+
+    # приложение из request_tvmaze.py с клиентом, направленным на локальный сервер
+    request_tvmaze.app.state.tv_client = request_tvmaze.SyncTVMazeClient(base_url=base_url, max_workers=concurrency)
+    pooled = await measure(request_tvmaze.app, total, concurrency)
+    request_tvmaze.app.state.tv_client.close()
+    print(f'после (пул потоков):             {pooled:8.1f} запросов/с')
+    server.shutdown()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер блокирующего и пулового клиента requests')
+    parser.add_argument('--requests', type=int, default=100, help='всего запросов')
+    parser.add_argument('--concurrency', type=int, default=20, help='одновременных запросов')
+    parser.add_argument('--delay', type=float, default=0.1, help='задержка ответа TVMaze в секундах')
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.delay))
\ No newline at end of file
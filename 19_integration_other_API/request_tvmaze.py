@@ -3,18 +3,70 @@
 pip install requests
 '''
 
-from fastapi import FastAPI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 import requests
+from requests.adapters import HTTPAdapter
+
+# базовый URL TVMaze API
+TVMAZE_BASE = 'https://api.tvmaze.com'
+# сколько блокирующих запросов к TVMaze выполнять одновременно (размер пула потоков)
+SYNC_MAX_WORKERS = 20
+# таймауты requests: (подключение, чтение ответа) в секундах
+SYNC_TIMEOUT = (3.0, 10.0)
+
+# синхронный клиент TVMaze на requests для работы из асинхронного приложения
+# requests.get() блокирует поток, поэтому в async-эндпоинте он останавливает весь цикл событий,
+# и запросы пользователей выполняются строго по одному; здесь блокирующие вызовы уходят в пул потоков:
+# - не больше max_workers запросов одновременно, остальные ждут свободный поток
+# - одна requests.Session на клиент: соединения к TVMaze переиспользуются (keep-alive),
+#   размер пула соединений адаптера равен числу потоков, чтобы потоки не ждали соединение
+class SyncTVMazeClient:
+    def __init__(self, base_url: str = TVMAZE_BASE, max_workers: int = SYNC_MAX_WORKERS):
+        self.base_url = base_url
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tvmaze')
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._session.close()
+
+    # блокирующий запрос (выполняется в потоке из пула)
+    def _search_shows(self, film_name: str) -> list[dict]:
+        response = self._session.get(f'{self.base_url}/search/shows', params={'q': film_name}, timeout=SYNC_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    # получаем список шоу по указанному названию, не блокируя цикл событий
+    async def search_shows(self, film_name: str) -> list[dict]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._search_shows, film_name)
+
+# один клиент на все приложение: создается при запуске и закрывается при остановке
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.tv_client = SyncTVMazeClient()
+    try:
+        yield
+    finally:
+        app.state.tv_client.close()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # получаем данные о всех шоу с указанным названием
 @app.get('/search')
-async def sync_search_shows(q: str):
-    # отправляем GET-запрос к TVMaze и получаем ответ
-    response = requests.get(
-        url='https://api.tvmaze.com/search/shows',
-        params={'q': q}
-    )
-    # возвращаем ответ в формате JSON
-    return response.json()
\ No newline at end of file
+async def sync_search_shows(q: str, request: Request):
+    try:
+        return await request.app.state.tv_client.search_shows(q)
+    except requests.Timeout:
+        raise HTTPException(status_code=504, detail='TVMaze timeout')
+    except requests.HTTPError as exc:
+        raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
+    except requests.ConnectionError:
+        raise HTTPException(status_code=502, detail='TVMaze unavailable')
\ No newline at end of file
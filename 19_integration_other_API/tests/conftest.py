@@ -0,0 +1,140 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+# поддельный TVMaze: отвечает на поиск шоу и на данные шоу с ID до 100 (эпизоды, актеры), считает запросы
+# status - код ответа, который сервер вернет на следующие запросы, delay - задержка ответа в секундах
+# rate_limit - (запросов, секунд): как TVMaze, отвечает 429 с Retry-After на запросы сверх лимита
+# shows - каталог шоу {ID: шоу} для общего списка /shows?page=N (по page_size на странице) и /updates/shows
+class FakeTVMaze:
+    def __init__(self):
+        self.calls = []
+        self.times = []
+        self.status = 200
+        self.delay = 0
+        self.rate_limit = None
+        self.rejected = 0
+        # сколько запросов обрабатывается одновременно сейчас и сколько было максимум
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.shows = {}
+        self.page_size = 250
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append((request.url.path, dict(request.url.params)))
+        now = time.monotonic()
+        if self.rate_limit is not None:
+            limit, window = self.rate_limit
+            recent = [t for t in self.times if t > now - window]
+            if len(recent) >= limit:
+                self.rejected += 1
+                return httpx.Response(429, headers={'Retry-After': str(recent[0] + window - now)})
+        self.times.append(now)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.status != 200:
+            return httpx.Response(self.status, text='upstream error')
+        parts = request.url.path.strip('/').split('/')
+        if parts == ['search', 'shows']:
+            q = request.url.params['q']
+            return httpx.Response(200, json=[{'score': 1, 'show': {'id': len(self.calls), 'name': q}}])
+        if parts == ['shows']:
+            page = int(request.url.params['page'])
+            shows = [self.shows[show_id] for show_id in sorted(self.shows)]
+            shows = shows[page * self.page_size:(page + 1) * self.page_size]
+            return httpx.Response(200, json=shows) if shows else httpx.Response(404, json={'message': 'not found'})
+        if parts == ['updates', 'shows']:
+            return httpx.Response(200, json={str(show_id): show['updated'] for show_id, show in self.shows.items()})
+        if parts[0] == 'shows' and len(parts) == 2 and int(parts[1]) in self.shows:
+            return httpx.Response(200, json=self.shows[int(parts[1])])
+        if parts[0] == 'shows' and parts[1].isdigit() and int(parts[1]) <= 100:
+            show_id = int(parts[1])
+            if len(parts) == 2:
+                return httpx.Response(200, json={'id': show_id, 'name': f'Show {show_id}'})
+            if parts[2] == 'episodes':
+                return httpx.Response(200, json=[{'id': show_id * 100 + i, 'number': i} for i in range(1, 4)])
+            if parts[2] == 'cast':
+                return httpx.Response(200, json=[{'person': {'name': f'Actor {show_id}'}}])
+        return httpx.Response(404, json={'message': 'not found'})
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+# часы, которые двигаются только вручную (для проверки времени жизни кэша)
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def upstream():
+    return FakeTVMaze()
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+# настоящий HTTP-сервер на локальном порту, который ведет себя как сбоящий TVMaze
+# поведение на каждый запрос берется из очереди behaviors, а когда она пуста - default:
+# 'ok' - обычный ответ, 'slow' - ответ через slow_delay секунд, 'drop' - разрыв соединения без ответа, '503',
+# 'partial' - заголовки и начало тела, после чего сервер молчит, пока клиент не закроет соединение
+class MisbehavingServer:
+    def __init__(self):
+        self.behaviors = []
+        self.default = 'ok'
+        self.slow_delay = 1.0
+        self.requests = 0
+        self.connections = 0
+        self.url = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            # соединение keep-alive: читаем запросы, пока клиент его не закроет
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                self.requests += 1
+                behavior = self.behaviors.pop(0) if self.behaviors else self.default
+                if behavior == 'drop':
+                    break
+                if behavior == 'partial':
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 1000\r\n\r\n[')
+                    await writer.drain()
+                    await reader.read()
+                    break
+                if behavior == 'slow':
+                    await asyncio.sleep(self.slow_delay)
+                if behavior == '503':
+                    status, body = '503 Service Unavailable', b'unavailable'
+                else:
+                    target = head.split(b' ')[1].decode()
+                    status, body = '200 OK', json.dumps([{'score': 1, 'show': {'url': target}}]).encode()
+                writer.write(
+                    f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+@pytest_asyncio.fixture
+async def fake_server():
+    server = MisbehavingServer()
+    tcp_server = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    host, port = tcp_server.sockets[0].getsockname()[:2]
+    server.url = f'http://{host}:{port}'
+    yield server
+    tcp_server.close()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.sync_client import start_slow_server
+from request_tvmaze import SyncTVMazeClient
+
+@pytest.fixture
+def slow_server():
+    server = start_slow_server(delay=0.2)
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+# тестирование синхронного клиента: блокирующие запросы идут параллельно в пуле потоков
+# и не останавливают цикл событий
+@pytest.mark.asyncio
+async def test_sync_client_runs_in_thread_pool(slow_server):
+    client = SyncTVMazeClient(base_url=slow_server, max_workers=5)
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+    ticker_task = asyncio.create_task(ticker())
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[client.search_shows(f'show {i}') for i in range(5)])
+    elapsed = time.perf_counter() - started
+    ticker_task.cancel()
+    client.close()
+
+    assert [result[0]['show']['url'] for result in results] == [f'/search/shows?q=show+{i}' for i in range(5)]
+    # пять запросов по 0.2 с выполнились одновременно, а цикл событий все это время работал
+    assert elapsed < 0.6
+    assert ticks > 10
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from tv_cache import ResponseCache
+from tv_client import TVMazeClient
+from tv_scheduler import RequestScheduler, TokenBucket
+
+# клиент с поддельным TVMaze и кэшем на ручных часах: ответ свежий 10 с, затем еще 100 с устаревший
+# (ограничение частоты запросов здесь не проверяется, поэтому корзина токенов большая)
+@pytest_asyncio.fixture
+async def make_client(upstream, clock):
+    clients = []
+    def make(**cache_options):
+        cache = ResponseCache(ttls={'/search/shows': (10, 100)}, clock=clock, **cache_options)
+        client = TVMazeClient(
+            transport=upstream.transport, cache=cache, scheduler=RequestScheduler(TokenBucket(1000, 1000))
+        )
+        clients.append(client)
+        return client
+    yield make
+    for client in clients:
+        await client.close()
+
+# тестирование кэша: повторный запрос не доходит до TVMaze, после истечения времени жизни запрос повторяется
+@pytest.mark.asyncio
+async def test_cache_hit_and_expire(make_client, upstream, clock):
+    client = make_client()
+    first = await client.search_shows('girls')
+    assert await client.search_shows('girls') == first
+    assert len(upstream.calls) == 1
+
+    await client.search_shows('boys')
+    assert len(upstream.calls) == 2
+
+    # ответ устарел полностью - клиент ждет новый ответ
+    clock.now = 200
+    assert await client.search_shows('girls') != first
+    assert len(upstream.calls) == 3
+    metrics = client.cache.get_metrics()
+    assert (metrics['hits'], metrics['misses']) == (1, 3)
+
+# тестирование stale-while-revalidate: устаревший ответ отдается сразу, новый загружается в фоне один раз
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(make_client, upstream, clock):
+    client = make_client()
+    first = await client.search_shows('girls')
+
+    clock.now = 50
+    assert await client.search_shows('girls') == first
+    assert await client.search_shows('girls') == first
+    await client.cache.wait_refreshes()
+    assert len(upstream.calls) == 2
+
+    refreshed = await client.search_shows('girls')
+    assert refreshed != first
+    metrics = client.cache.get_metrics()
+    assert (metrics['stale_hits'], metrics['refreshes'], metrics['hits']) == (2, 1, 1)
+
+    # ошибка фонового обновления не мешает отдавать устаревший ответ
+    clock.now = 100
+    upstream.status = 500
+    assert await client.search_shows('girls') == refreshed
+    await client.cache.wait_refreshes()
+    assert client.cache.get_metrics()['refresh_errors'] == 1
+
+# тестирование ограничения объема: вытесняются давно не использованные ответы
+@pytest.mark.asyncio
+async def test_cache_lru_by_size(make_client, upstream):
+    client = make_client()
+    await client.search_shows('a')
+    entry_size = client.cache.size
+
+    client = make_client(max_bytes=entry_size * 2)
+    await client.search_shows('a')
+    await client.search_shows('b')
+    await client.search_shows('a')
+    await client.search_shows('c')
+    assert client.cache.size <= entry_size * 2
+    assert client.cache.get_metrics()['evictions'] == 1
+
+    # 'a' использовался недавно и остался в кэше, 'b' вытеснен
+    calls = len(upstream.calls)
+    await client.search_shows('a')
+    assert len(upstream.calls) == calls
+    await client.search_shows('b')
+    assert len(upstream.calls) == calls + 1
+
+# тестирование ошибок: ответы с ошибкой не кэшируются
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(make_client, upstream):
+    client = make_client()
+    upstream.status = 404
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.search_shows('girls')
+    upstream.status = 200
+    await client.search_shows('girls')
+    assert len(upstream.calls) == 2
+    assert client.cache.get_metrics()['entries'] == 1
+
+# тестирование single-flight: одновременные одинаковые запросы доходят до TVMaze один раз
+@pytest.mark.asyncio
+async def test_single_flight_burst(make_client, upstream):
+    client = make_client()
+    upstream.delay = 0.05
+    results = await asyncio.gather(*[client.search_shows('girls') for _ in range(50)])
+    assert len(upstream.calls) == 1
+    assert all(result == results[0] for result in results)
+    assert client.cache.get_metrics()['coalesced'] == 49
+
+    # без объединения каждый одновременный промах идет во внешний API
+    client = make_client(single_flight=False)
+    await asyncio.gather(*[client.search_shows('girls') for _ in range(10)])
+    assert len(upstream.calls) == 11
+
+# тестирование отмены: отключение одного клиента не отменяет общий запрос
+@pytest.mark.asyncio
+async def test_single_flight_cancel(make_client, upstream):
+    client = make_client()
+    upstream.delay = 0.05
+    tasks = [asyncio.create_task(client.search_shows('girls')) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    tasks[0].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1] == results[2] == [{'score': 1, 'show': {'id': 1, 'name': 'girls'}}]
+
+    # даже если отменены все ожидающие, ответ попадает в кэш
+    task = asyncio.create_task(client.search_shows('boys'))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.sleep(0.1)
+    await client.search_shows('boys')
+    assert len(upstream.calls) == 2
+
+# тестирование ошибок: ошибку общего запроса получают все ожидающие
+@pytest.mark.asyncio
+async def test_single_flight_error(make_client, upstream):
+    client = make_client()
+    upstream.delay = 0.05
+    upstream.status = 500
+    results = await asyncio.gather(*[client.search_shows('girls') for _ in range(5)], return_exceptions=True)
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert len(upstream.calls) == 1
\ No newline at end of file
@@ -0,0 +1,57 @@
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from tv_client import TVMazeClient
+from tv_scheduler import RequestScheduler, TokenBucket
+
+# приложение с клиентом, который ходит в поддельный TVMaze
+@pytest_asyncio.fixture
+async def api(upstream):
+    app.state.tv_client = TVMazeClient(transport=upstream.transport, scheduler=RequestScheduler(TokenBucket(1000, 1000)))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        yield client
+    await app.state.tv_client.close()
+
+# тестирование пакетной загрузки: по строке NDJSON на шоу, ошибки не прерывают пакет
+@pytest.mark.asyncio
+async def test_shows_details_stream(api, upstream):
+    response = await api.post('/tv/shows/details', json={'show_ids': [1, 2, 500, 3]})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    results = {item['id']: item for item in map(json.loads, response.text.splitlines())}
+    assert set(results) == {1, 2, 3, 500}
+    assert results[500] == {'id': 500, 'error': 404}
+    assert results[2]['show']['name'] == 'Show 2'
+    assert len(results[2]['episodes']) == 3
+    assert results[2]['cast'] == [{'person': {'name': 'Actor 2'}}]
+
+# тестирование ограничения параллельности: одновременно загружается не больше concurrency шоу
+@pytest.mark.asyncio
+async def test_shows_details_concurrency(api, upstream):
+    upstream.delay = 0.02
+    response = await api.post('/tv/shows/details', json={'show_ids': list(range(1, 21)), 'concurrency': 2})
+    assert len(response.text.splitlines()) == 20
+    # на одно шоу - три одновременных запроса (данные, эпизоды, актеры)
+    assert upstream.max_in_flight == 2 * 3
+
+    response = await api.post('/tv/shows/details', json={'show_ids': [1], 'concurrency': 50})
+    assert response.status_code == 422
+
+# тестирование потоковой выдачи: первые результаты приходят до того, как готов весь пакет
+@pytest.mark.asyncio
+async def test_shows_details_partial_results(upstream):
+    client = TVMazeClient(transport=upstream.transport, scheduler=RequestScheduler(TokenBucket(1000, 1000)))
+    upstream.delay = 0.02
+    details = client.iter_show_details(list(range(1, 11)), concurrency=1)
+    first = await details.__anext__()
+    assert first['id'] == 1
+    # на момент первого результата загружено только первое шоу
+    assert len(upstream.calls) == 3
+    # закрытие генератора останавливает загрузку остальных шоу
+    await details.aclose()
+    assert len(upstream.calls) <= 6
+    await client.close()
\ No newline at end of file
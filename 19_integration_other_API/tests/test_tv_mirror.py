@@ -0,0 +1,127 @@
+import sqlite3
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from tv_client import TVMazeClient
+from tv_mirror import ShowMirror
+from tv_scheduler import RequestScheduler, TokenBucket
+
+SHOW_NAMES = ['Breaking Bad', 'Better Call Saul', 'Bad Sisters', 'Girls', 'Pokémon', 'The Office']
+
+@pytest.fixture
+def catalog(upstream):
+    upstream.shows = {
+        show_id: {'id': show_id, 'name': name, 'updated': 1000 + show_id}
+        for show_id, name in enumerate(SHOW_NAMES, start=1)
+    }
+    upstream.page_size = 2
+    return upstream.shows
+
+@pytest_asyncio.fixture
+async def client(upstream):
+    client = TVMazeClient(transport=upstream.transport, scheduler=RequestScheduler(TokenBucket(1000, 1000)))
+    yield client
+    await client.close()
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = ShowMirror(str(tmp_path / 'mirror.db'))
+    yield mirror
+    mirror.close()
+
+# тестирование заполнения: постранично, с продолжением с сохраненной страницы
+@pytest.mark.asyncio
+async def test_populate_resumes(client, catalog, upstream, tmp_path):
+    mirror = ShowMirror(str(tmp_path / 'mirror.db'))
+    assert await mirror.populate(client, max_pages=2, log=lambda _: None) == 2
+    assert mirror.count() == 4
+    mirror.close()
+
+    # новый процесс продолжает с третьей страницы
+    mirror = ShowMirror(str(tmp_path / 'mirror.db'))
+    calls = len(upstream.calls)
+    assert await mirror.populate(client, log=lambda _: None) == 1
+    assert mirror.count() == 6
+    assert [params['page'] for _, params in upstream.calls[calls:]] == ['2', '3']
+    mirror.close()
+
+# тестирование поиска: по началу слов, без учета регистра и диакритики, в формате TVMaze
+@pytest.mark.asyncio
+async def test_search(client, mirror, catalog):
+    await mirror.populate(client, log=lambda _: None)
+    assert {item['show']['name'] for item in mirror.search('bad')} == {'Bad Sisters', 'Breaking Bad'}
+    assert [item['show']['name'] for item in mirror.search('better c')] == ['Better Call Saul']
+    assert mirror.search('pokemon')[0]['show'] == catalog[5]
+    assert mirror.search('"OR*(') == []
+    assert mirror.search('simpsons') == []
+
+    started = time.perf_counter()
+    for _ in range(100):
+        mirror.search('bad')
+    assert (time.perf_counter() - started) / 100 < 0.001
+
+# тестирование синхронизации: загружаются только изменившиеся шоу, удаленные убираются
+@pytest.mark.asyncio
+async def test_sync_updates(client, mirror, catalog, upstream):
+    await mirror.populate(client, log=lambda _: None)
+    catalog[4] = {'id': 4, 'name': 'Girls5eva', 'updated': 2000}
+    catalog[7] = {'id': 7, 'name': 'Severance', 'updated': 2001}
+    calls = len(upstream.calls)
+    assert await mirror.sync_updates(client, log=lambda _: None) == 2
+    assert sorted(path for path, _ in upstream.calls[calls + 1:]) == ['/shows/4', '/shows/7']
+    assert mirror.search('girls')[0]['show']['name'] == 'Girls5eva'
+    assert mirror.search('severance')
+
+    # повторная синхронизация ничего не загружает
+    assert await mirror.sync_updates(client, log=lambda _: None) == 0
+
+# тестирование эндпоинта: поиск отвечает из зеркала, во внешний API идет только при промахе
+@pytest.mark.asyncio
+async def test_search_endpoint_uses_mirror(client, mirror, catalog, upstream):
+    await mirror.populate(client, log=lambda _: None)
+    app.state.tv_client, app.state.tv_mirror = client, mirror
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as api:
+        calls = len(upstream.calls)
+        response = await api.get('/tv/search', params={'q': 'saul'})
+        assert response.json()[0]['show']['name'] == 'Better Call Saul'
+        assert len(upstream.calls) == calls
+
+        response = await api.get('/tv/search', params={'q': 'simpsons'})
+        assert response.json()[0]['show']['name'] == 'simpsons'
+        assert upstream.calls[-1] == ('/search/shows', {'q': 'simpsons'})
+
+        response = await api.get('/tv/mirror/metrics')
+        assert response.json() == {'hits': 1, 'misses': 1, 'errors': 0, 'shows': 6}
+    del app.state.tv_mirror
+
+# соединение с базой, которую держит другой процесс: любой запрос завершается ошибкой блокировки
+class LockedConnection:
+    def execute(self, *args):
+        raise sqlite3.OperationalError('database is locked')
+
+# тестирование записи во время поиска: благодаря WAL открытая транзакция записи не мешает читать,
+# а если база все же занята, поиск уходит в TVMaze вместо ошибки 500
+@pytest.mark.asyncio
+async def test_search_while_mirror_is_written(client, mirror, catalog, upstream, monkeypatch):
+    await mirror.populate(client, log=lambda _: None)
+    writer = sqlite3.connect(mirror.path)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute('DELETE FROM shows')
+    started = time.perf_counter()
+    assert mirror.search('saul')[0]['show']['name'] == 'Better Call Saul'
+    assert time.perf_counter() - started < 0.05
+    writer.rollback()
+    writer.close()
+
+    monkeypatch.setattr(app.state, 'tv_client', client, raising=False)
+    monkeypatch.setattr(app.state, 'tv_mirror', mirror, raising=False)
+    monkeypatch.setattr(mirror, '_conn', LockedConnection())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as api:
+        response = await api.get('/tv/search', params={'q': 'saul'})
+    assert response.status_code == 200
+    assert upstream.calls[-1] == ('/search/shows', {'q': 'saul'})
+    assert mirror.metrics['errors'] == 1
\ No newline at end of file
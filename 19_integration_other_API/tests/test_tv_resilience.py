@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import tv_client
+from tv_breaker import CircuitBreaker, CircuitOpenError
+from tv_cache import ResponseCache
+from tv_client import TVMazeClient
+from tv_scheduler import RequestScheduler, TokenBucket
+
+# клиент к локальному сбоящему серверу с короткими паузами между повторами
+@pytest_asyncio.fixture
+async def make_client(fake_server, monkeypatch):
+    monkeypatch.setattr(tv_client, 'RETRY_BACKOFF', 0.01)
+    clients = []
+    def make(**options):
+        client = TVMazeClient(
+            base_url=fake_server.url, scheduler=RequestScheduler(TokenBucket(1000, 1000)), **options
+        )
+        clients.append(client)
+        return client
+    yield make
+    for client in clients:
+        await client.close()
+
+# тестирование повторов: разрыв соединения и 503 повторяются, третья попытка успешна
+@pytest.mark.asyncio
+async def test_retry_transient_errors(make_client, fake_server):
+    client = make_client()
+    fake_server.behaviors = ['drop', '503']
+    result = await client.search_shows('girls')
+    assert result[0]['show']['url'] == '/search/shows?q=girls'
+    assert fake_server.requests == 3
+
+    # после всех неудачных попыток ошибка доходит до вызывающего кода
+    fake_server.behaviors = ['503'] * 3
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.search_shows('boys')
+
+# тестирование таймаута чтения: медленный ответ не держит запрос дольше таймаута
+@pytest.mark.asyncio
+async def test_read_timeout(make_client, fake_server):
+    client = make_client(timeout=httpx.Timeout(connect=1.0, read=0.1, write=1.0, pool=1.0))
+    fake_server.default = 'slow'
+    started = time.perf_counter()
+    with pytest.raises(httpx.ReadTimeout):
+        await client.search_shows('girls')
+    assert time.perf_counter() - started < fake_server.slow_delay
+    assert fake_server.requests == tv_client.TVMAZE_MAX_ATTEMPTS
+
+# тестирование пула: последовательные запросы идут через одно keep-alive соединение
+@pytest.mark.asyncio
+async def test_keep_alive(make_client, fake_server):
+    client = make_client()
+    for i in range(5):
+        await client.search_shows(f'show {i}')
+    assert fake_server.requests == 5
+    assert fake_server.connections == 1
+
+# тестирование выключателя: пока TVMaze падает, запросы сразу отклоняются, после паузы - пробный запрос
+@pytest.mark.asyncio
+async def test_circuit_breaker(make_client, fake_server):
+    client = make_client(breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2))
+    fake_server.default = '503'
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.search_shows('girls')
+    assert client.breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        await client.search_shows('boys')
+    assert fake_server.requests == 3
+
+    await asyncio.sleep(0.25)
+    fake_server.default = 'ok'
+    await client.search_shows('boys')
+    assert client.breaker.get_metrics() == {'opened': 1, 'rejected': 1, 'state': 'closed', 'failures': 0}
+
+# тестирование выдачи из кэша: пока TVMaze недоступен, отдается устаревший ответ
+@pytest.mark.asyncio
+async def test_serve_cache_while_down(make_client, fake_server):
+    cache = ResponseCache(ttls={'/search/shows': (0, 0)})
+    client = make_client(cache=cache, breaker=CircuitBreaker(failure_threshold=1))
+    first = await client.search_shows('girls')
+
+    fake_server.default = 'drop'
+    assert await client.search_shows('girls') == first
+    assert client.breaker.state == 'open'
+    assert await client.search_shows('girls') == first
+    assert cache.get_metrics()['served_on_error'] == 2
+    with pytest.raises(CircuitOpenError):
+        await client.search_shows('boys')
\ No newline at end of file
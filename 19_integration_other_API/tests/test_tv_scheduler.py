@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import pytest_asyncio
+
+from tv_client import TVMazeClient
+from tv_scheduler import RequestScheduler, TokenBucket, BACKGROUND, DEFAULT_RETRY_AFTER, parse_retry_after
+
+@pytest_asyncio.fixture
+async def make_client(upstream):
+    clients = []
+    def make(bucket: TokenBucket):
+        client = TVMazeClient(transport=upstream.transport, scheduler=RequestScheduler(bucket))
+        clients.append(client)
+        return client
+    yield make
+    for client in clients:
+        await client.close()
+
+# тестирование корзины токенов: всплеск не больше capacity, дальше - rate токенов в секунду
+def test_token_bucket(clock):
+    bucket = TokenBucket.for_limit(20, 10.0, clock=clock)
+    assert (bucket.capacity, bucket.rate) == (5, 1.5)
+    for _ in range(5):
+        assert bucket.time_until_token() == 0
+        bucket.take()
+    assert bucket.time_until_token() == pytest.approx(1 / 1.5)
+    clock.now = 10
+    assert bucket.tokens <= 5 and bucket.time_until_token() == 0
+
+# тестирование разбора Retry-After: секунды, HTTP-дата, мусор
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 < parse_retry_after(in_ten_seconds) <= 10
+    assert parse_retry_after(None) == parse_retry_after('soon') == DEFAULT_RETRY_AFTER
+
+# тестирование планировщика: при корзине под лимит TVMaze нет ни одного ответа 429
+@pytest.mark.asyncio
+async def test_no_rate_limit_errors(make_client, upstream):
+    upstream.rate_limit = (20, 0.5)
+    client = make_client(TokenBucket.for_limit(20, 0.5))
+    results = await asyncio.gather(*[client.search_shows(f'show {i}') for i in range(30)])
+    assert len(results) == 30
+    assert upstream.rejected == 0
+    assert client.scheduler.get_metrics()['rate_limited'] == 0
+
+# тестирование Retry-After: после 429 запросы ждут указанное время и повторяются успешно
+@pytest.mark.asyncio
+async def test_retry_after(make_client, upstream):
+    upstream.rate_limit = (20, 0.5)
+    client = make_client(TokenBucket(1000, 1000))
+    results = await asyncio.gather(*[client.search_shows(f'show {i}') for i in range(30)])
+    assert len(results) == 30
+    assert upstream.rejected == 10
+    # каждый отклоненный запрос повторен один раз - после паузы по Retry-After окно лимита уже свободно
+    assert len(upstream.calls) == 40
+    assert client.scheduler.get_metrics()['rate_limited'] == 10
+
+# тестирование приоритетов: поиск пользователя обгоняет очередь фоновой предзагрузки
+@pytest.mark.asyncio
+async def test_interactive_before_background(make_client, upstream):
+    client = make_client(TokenBucket(rate=20, capacity=1))
+    prefetch = [asyncio.create_task(client.search_shows(f'popular {i}', priority=BACKGROUND)) for i in range(5)]
+    await asyncio.sleep(0.01)
+    await client.search_shows('user query')
+    queries = [params['q'] for _, params in upstream.calls]
+    assert queries.index('user query') == 1
+    await asyncio.gather(*prefetch)
+
+    waits = client.scheduler.get_metrics()['queue_wait']
+    assert waits['interactive']['requests'] == 1
+    assert waits['background']['requests'] == 5
+    assert waits['background']['max_wait'] > waits['interactive']['max_wait']
\ No newline at end of file
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from starlette.requests import ClientDisconnect
+
+from main import app
+from tv_client import TVMazeClient
+from tv_projection import ShowSummary, project_show
+from tv_scheduler import RequestScheduler, TokenBucket
+
+# шоу в том виде, в каком его отдает TVMaze (с описанием, картинками и ссылками)
+FULL_SHOW = {
+    'id': 139, 'url': 'https://www.tvmaze.com/shows/139/girls', 'name': 'Girls', 'type': 'Scripted',
+    'language': 'English', 'genres': ['Drama', 'Romance'], 'premiered': '2012-04-15',
+    'rating': {'average': 6.5}, 'network': {'id': 8, 'name': 'HBO', 'country': {'code': 'US'}},
+    'webChannel': None, 'image': {'medium': 'https://static.tvmaze.com/m.jpg', 'original': 'https://static.tvmaze.com/o.jpg'},
+    'summary': '<p>This Emmy winning series is a comic look at the assorted humiliations...</p>',
+    '_links': {'self': {'href': 'https://api.tvmaze.com/shows/139'}},
+}
+
+@pytest_asyncio.fixture
+async def api(upstream):
+    app.state.tv_client = TVMazeClient(transport=upstream.transport, scheduler=RequestScheduler(TokenBucket(1000, 1000)))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        yield client
+    await app.state.tv_client.close()
+
+# тестирование проекции: из полного шоу остаются только нужные поля
+def test_project_show():
+    assert project_show(FULL_SHOW) == ShowSummary(
+        id=139, name='Girls', type='Scripted', language='English', genres=['Drama', 'Romance'],
+        premiered='2012-04-15', rating=6.5, network='HBO', image='https://static.tvmaze.com/m.jpg'
+    )
+    assert not hasattr(project_show(FULL_SHOW), '__dict__')
+    assert project_show({'id': 1, 'name': 'Web show', 'webChannel': {'name': 'Netflix'}}).network == 'Netflix'
+
+# тестирование режимов поиска: compact отдает проекцию, raw - байты ответа TVMaze без изменений
+@pytest.mark.asyncio
+async def test_search_modes(api, upstream):
+    await api.get('/tv/search', params={'q': 'girls'})
+    # компактный ответ кэшируется отдельно от полного, поэтому это второй запрос к TVMaze (id шоу = номер запроса)
+    compact = (await api.get('/tv/search', params={'q': 'girls', 'mode': 'compact'})).json()
+    assert compact == [{'score': 1, 'show': {
+        'id': 2, 'name': 'girls', 'type': None, 'language': None, 'genres': [],
+        'premiered': None, 'rating': None, 'network': None, 'image': None,
+    }}]
+
+    response = await api.get('/tv/search', params={'q': 'boys', 'mode': 'raw'})
+    assert response.status_code == 200
+    upstream_body = httpx.Response(200, json=[{'score': 1, 'show': {'id': len(upstream.calls), 'name': 'boys'}}]).content
+    assert response.content == upstream_body
+
+    # повторный компактный поиск берется из кэша, raw не кэшируется
+    calls = len(upstream.calls)
+    await api.get('/tv/search', params={'q': 'girls', 'mode': 'compact'})
+    await api.get('/tv/search', params={'q': 'boys', 'mode': 'raw'})
+    assert len(upstream.calls) == calls + 1
+
+# тестирование ошибок в режиме raw: статус TVMaze передается клиенту
+@pytest.mark.asyncio
+async def test_raw_mode_errors(api, upstream):
+    upstream.status = 404
+    response = await api.get('/tv/search', params={'q': 'girls', 'mode': 'raw'})
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'upstream error'}
+
+# тестирование отключения клиента посреди ответа в режиме raw: поток TVMaze закрывается,
+# и соединение возвращается в пул (в пуле одно соединение, поэтому следующий запрос иначе не дождался бы его)
+@pytest.mark.asyncio
+async def test_raw_mode_client_disconnect(fake_server, monkeypatch):
+    fake_server.behaviors = ['partial']
+    client = TVMazeClient(
+        base_url=fake_server.url, scheduler=RequestScheduler(TokenBucket(1000, 1000)),
+        limits=httpx.Limits(max_connections=1), timeout=httpx.Timeout(2.0, pool=0.5)
+    )
+    monkeypatch.setattr(app.state, 'tv_client', client, raising=False)
+    monkeypatch.setattr(app.state, 'tv_mirror', None, raising=False)
+
+    # клиент отключается на первой части тела: сервер не может ее отправить
+    body_started = asyncio.Event()
+    async def receive():
+        await asyncio.Event().wait()
+    async def send(message):
+        if message['type'] == 'http.response.body' and message['body']:
+            body_started.set()
+            raise OSError('client disconnected')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0', 'spec_version': '2.4'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': '/tv/search', 'raw_path': b'/tv/search', 'query_string': b'q=girls&mode=raw', 'root_path': '',
+        'headers': [(b'host', b'test')], 'server': ('test', 80), 'client': ('127.0.0.1', 1234),
+    }
+    try:
+        with pytest.raises(ClientDisconnect):
+            await asyncio.wait_for(app(scope, receive, send), timeout=2)
+        assert body_started.is_set()
+        shows = await client.search_shows(film_name='boys')
+        assert shows == [{'score': 1, 'show': {'url': '/search/shows?q=boys'}}]
+    finally:
+        await client.close()
\ No newline at end of file
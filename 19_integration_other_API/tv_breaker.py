@@ -0,0 +1,60 @@
+import time
+from typing import Callable
+
+# сколько неудачных запросов подряд размыкают цепь
+FAILURE_THRESHOLD = 5
+# через сколько секунд после размыкания пропустить пробный запрос
+RESET_TIMEOUT = 30.0
+
+# цепь разомкнута: внешний API считается недоступным, запрос не отправляется
+class CircuitOpenError(Exception):
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f'Внешний API недоступен, следующая попытка через {retry_in:.1f} с')
+
+# автоматический выключатель (circuit breaker)
+# - closed: запросы идут как обычно, неудачи подряд считаются
+# - open: после FAILURE_THRESHOLD неудач подряд запросы сразу получают CircuitOpenError и не ждут таймаутов
+# - half_open: через RESET_TIMEOUT пропускается один пробный запрос; успех замыкает цепь, неудача - снова размыкает
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.metrics = {'opened': 0, 'rejected': 0}
+
+    # вызывается перед запросом: CircuitOpenError, если запрос отправлять нельзя
+    def before_call(self):
+        if self.state == 'closed':
+            return
+        # в состоянии half_open opened_at - время начала пробного запроса:
+        # пока он идет, остальные запросы отклоняются (если он завис или отменен, через RESET_TIMEOUT пойдет новый)
+        retry_in = self.opened_at + self.reset_timeout - self.clock()
+        if retry_in > 0:
+            self.metrics['rejected'] += 1
+            raise CircuitOpenError(retry_in)
+        self.state = 'half_open'
+        self.opened_at = self.clock()
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            if self.state != 'open':
+                self.metrics['opened'] += 1
+            self.state = 'open'
+            self.opened_at = self.clock()
+
+    def get_metrics(self) -> dict:
+        return {**self.metrics, 'state': self.state, 'failures': self.failures}
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+# время жизни ответов по эндпоинтам TVMaze в секундах: (свежий ответ, сколько еще можно отдавать устаревший)
+# результаты поиска и данные шоу меняются редко, поэтому их можно долго отдавать из кэша
+# ID в пути заменяется на {id}: у всех шоу одно время жизни
+CACHE_TTLS = {
+    '/search/shows': (300, 3600),
+    '/shows/{id}': (3600, 86400),
+    '/shows/{id}/episodes': (3600, 86400),
+    '/shows/{id}/cast': (3600, 86400),
+}
+# время жизни для эндпоинтов, которых нет в CACHE_TTLS
+DEFAULT_TTL = (60, 600)
+# сколько байт ответов держать в кэше
+CACHE_MAX_BYTES = 10 * 1024 * 1024
+
+# эндпоинт без ID для поиска времени жизни: '/shows/82/cast' -> '/shows/{id}/cast'
+def endpoint_of(url: str) -> str:
+    return '/'.join('{id}' if part.isdigit() else part for part in url.split('/'))
+
+# запись кэша: ответ, его размер в байтах и до какого момента он свежий / еще пригоден
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+# объединение одинаковых одновременных запросов (single-flight):
+# первый вызов по ключу запускает запрос к внешнему API отдельной задачей,
+# остальные вызовы с тем же ключом, пока запрос идет, ждут ту же задачу
+# - ожидание идет через asyncio.shield: если клиент отключился и его вызов отменен,
+#   общий запрос продолжается для остальных ожидающих
+# - исключение запроса получают все ожидающие
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[tuple, asyncio.Task] = {}
+        self.metrics = {'leaders': 0, 'coalesced': 0}
+
+    async def do(self, key: tuple, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.metrics['leaders'] += 1
+            task = asyncio.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.metrics['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # если все ожидающие отменены, исключение запроса никто не получит - помечаем его полученным,
+        # чтобы asyncio не писал в лог 'Task exception was never retrieved'
+        if not task.cancelled():
+            task.exception()
+
+    # отменяем незавершенные запросы при остановке приложения
+    async def close(self):
+        for task in self._calls.values():
+            task.cancel()
+        await asyncio.gather(*self._calls.values(), return_exceptions=True)
+
+# кэш ответов внешнего API
+# - у каждого эндпоинта свое время жизни ответа (CACHE_TTLS)
+# - объем кэша ограничен суммарным размером ответов: при переполнении вытесняются давно не использованные (LRU)
+# - stale-while-revalidate: устаревший ответ сразу отдается клиенту, а в фоне запрашивается новый
+# - при промахе одинаковые одновременные запросы объединяются в один (single_flight=False - отключить)
+# - если запрос при промахе не удался, а в кэше есть совсем устаревший ответ, отдается он, а не ошибка
+class ResponseCache:
+    def __init__(
+        self,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttls: dict[str, tuple[float, float]] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        single_flight: bool = True
+    ):
+        self.max_bytes = max_bytes
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self.clock = clock
+        self.size = 0
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        # фоновые обновления по ключам: один ключ обновляется не больше чем одной задачей
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        self.flights = SingleFlight() if single_flight else None
+        self.metrics = {
+            'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'evictions': 0,
+            'served_on_error': 0,
+        }
+
+    # ключ кэша: эндпоинт и параметры запроса (порядок параметров не важен)
+    @staticmethod
+    def make_key(url: str, params: dict | None = None) -> tuple:
+        return (url, tuple(sorted((params or {}).items())))
+
+    # запись по ключу, в том числе совсем устаревшая: она отдается, если внешний API недоступен
+    # (такие записи вытесняются из кэша по LRU, как и остальные)
+    def _lookup(self, key: tuple) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+    # сохраняем ответ и вытесняем давно не использованные записи, пока кэш не уложится в лимит
+    def set(self, key: tuple, value: Any, size: int):
+        if key in self._entries:
+            self._remove(key)
+        # ответ больше всего кэша не сохраняем, чтобы он не вытеснил все остальное
+        if size > self.max_bytes:
+            return
+        fresh, stale = self.ttls.get(endpoint_of(key[0]), DEFAULT_TTL)
+        now = self.clock()
+        self._entries[key] = CacheEntry(value, size, now + fresh, now + fresh + stale)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.metrics['evictions'] += 1
+
+    # ответ из кэша или от fetch()
+    # fetch() возвращает пару (ответ, размер в байтах) и вызывается:
+    # - сразу, если ответа в кэше нет или он совсем устарел;
+    # - в фоне, если ответ устарел, но еще пригоден (клиент получает устаревший ответ без ожидания);
+    #   для фонового обновления можно передать отдельную функцию refresh (например, с низким приоритетом)
+    async def get_or_fetch(
+        self,
+        key: tuple,
+        fetch: Callable[[], Awaitable[tuple[Any, int]]],
+        refresh: Callable[[], Awaitable[tuple[Any, int]]] | None = None
+    ) -> Any:
+        entry = self._lookup(key)
+        now = self.clock()
+        if entry is None or now >= entry.stale_until:
+            self.metrics['misses'] += 1
+            # ответ сохраняется внутри общего запроса, поэтому попадет в кэш, даже если все ожидающие отменены
+            async def fetch_and_store():
+                value, size = await fetch()
+                self.set(key, value, size)
+                return value
+            try:
+                if self.flights is None:
+                    return await fetch_and_store()
+                return await self.flights.do(key, fetch_and_store)
+            except Exception:
+                if entry is None:
+                    raise
+                self.metrics['served_on_error'] += 1
+                return entry.value
+        if now < entry.fresh_until:
+            self.metrics['hits'] += 1
+        else:
+            self.metrics['stale_hits'] += 1
+            if key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(self._refresh(key, refresh or fetch))
+        return entry.value
+
+    # фоновое обновление: при ошибке остается старый ответ, новая попытка - при следующем обращении
+    async def _refresh(self, key: tuple, fetch: Callable[[], Awaitable[tuple[Any, int]]]):
+        try:
+            value, size = await fetch()
+            self.set(key, value, size)
+            self.metrics['refreshes'] += 1
+        except Exception:
+            self.metrics['refresh_errors'] += 1
+        finally:
+            self._refreshing.pop(key, None)
+
+    # ждем завершения фоновых обновлений (нужно в тестах)
+    async def wait_refreshes(self):
+        while self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+
+    # метрики кэша вместе с текущим объемом
+    def get_metrics(self) -> dict:
+        metrics = {**self.metrics, 'entries': len(self._entries), 'size_bytes': self.size, 'max_bytes': self.max_bytes}
+        if self.flights is not None:
+            metrics['coalesced'] = self.flights.metrics['coalesced']
+        return metrics
+
+    # отменяем фоновые обновления при остановке приложения
+    async def close(self):
+        for task in self._refreshing.values():
+            task.cancel()
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        if self.flights is not None:
+            await self.flights.close()
\ No newline at end of file
@@ -1,26 +1,234 @@
+import asyncio
+import json
+import random
+from dataclasses import asdict
+from typing import Any, Callable
+
 import httpx
 
+from tv_breaker import CircuitBreaker, CircuitOpenError
+from tv_cache import ResponseCache
+from tv_projection import ShowMatch, project_search
+from tv_scheduler import RequestScheduler, INTERACTIVE, BACKGROUND, parse_retry_after
+
 # базовый URL TVMaze API, в дальнейшем можно дополнять для разных эндпоинтов
 TVMAZE_BASE = 'https://api.tvmaze.com'
+# пул соединений: сколько соединений открывать к TVMaze и сколько держать открытыми между запросами
+TVMAZE_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30)
+# таймауты по отдельности: подключение должно быть быстрым, ответ поиска может идти дольше,
+# pool - сколько ждать свободного соединения из пула
+TVMAZE_TIMEOUT = httpx.Timeout(connect=3.0, read=10.0, write=5.0, pool=5.0)
+# сколько попыток делать на запрос (повторы на 429, ошибки соединения, таймауты и ответы RETRY_STATUSES)
+TVMAZE_MAX_ATTEMPTS = 3
+# временные ошибки сервера, после которых GET-запрос (идемпотентный) можно повторить
+RETRY_STATUSES = {502, 503, 504}
+# базовая пауза перед повтором в секундах: удваивается с каждой попыткой,
+# фактическая пауза - случайная от 0 до нее, чтобы повторы разных запросов не приходили одновременно
+RETRY_BACKOFF = 0.2
+
+# сколько шоу обрабатывать одновременно при пакетной загрузке подробностей
+DETAILS_CONCURRENCY = 5
+
+# пауза перед повтором номер attempt (с нуля)
+def retry_delay(attempt: int) -> float:
+    return random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
 
 # класс-обертка над httpx.AsyncClient
 class TVMazeClient:
-    def __init__(self):
+    # transport - транспорт httpx (в тестах подставляется поддельный сервер TVMaze)
+    # cache - кэш ответов; по умолчанию у каждого клиента свой
+    # scheduler - планировщик запросов под ограничение частоты TVMaze; по умолчанию у каждого клиента свой
+    # breaker - автоматический выключатель: пока TVMaze недоступен, запросы сразу завершаются ошибкой
+    # http2=True требует пакет h2 (pip install httpx[http2])
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        scheduler: RequestScheduler | None = None,
+        breaker: CircuitBreaker | None = None,
+        base_url: str = TVMAZE_BASE,
+        limits: httpx.Limits = TVMAZE_LIMITS,
+        timeout: httpx.Timeout = TVMAZE_TIMEOUT,
+        http2: bool = False
+    ):
         # создаем и настраиваем экземпляр httpx.AsyncClient
-        # можно настраивать много параметров, нам хватит пока base_url
         self._client = httpx.AsyncClient(
-            base_url=TVMAZE_BASE   # URL, использующийся как основа при построении URL в запросах
+            base_url=base_url,   # URL, использующийся как основа при построении URL в запросах
+            transport=transport,
+            limits=limits,
+            timeout=timeout,
+            http2=http2
         )
+        self.cache = ResponseCache() if cache is None else cache
+        self.scheduler = RequestScheduler() if scheduler is None else scheduler
+        self.breaker = CircuitBreaker() if breaker is None else breaker
 
     # закрываем клиент при завершении работы
     async def close(self):
+        await self.cache.close()
+        await self.scheduler.close()
         await self._client.aclose()
+
+    # запрос к TVMaze в очереди планировщика с повторами
+    # - 429: ставим все запросы на паузу по Retry-After и повторяем
+    # - ошибка соединения, таймаут, 502/503/504: повторяем после случайной паузы; такие неудачи считает выключатель
+    # - выключатель разомкнут: CircuitOpenError без запроса к TVMaze
+    async def _request(self, url: str, params: dict | None, priority: int) -> httpx.Response:
+        for attempt in range(TVMAZE_MAX_ATTEMPTS):
+            last_attempt = attempt == TVMAZE_MAX_ATTEMPTS - 1
+            self.breaker.before_call()
+            await self.scheduler.acquire(priority)
+            try:
+                response = await self._client.get(url=url, params=params)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                if not last_attempt:
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+                break
+            # любой другой ответ (в том числе 429 и 404) значит, что TVMaze работает
+            self.breaker.record_success()
+            if response.status_code != 429:
+                break
+            self.scheduler.pause(parse_retry_after(response.headers.get('Retry-After')))
+        response.raise_for_status()
+        return response
+
+    # GET-запрос к TVMaze через кэш: повторяющиеся запросы не доходят до внешнего API
+    # фоновое обновление устаревших ответов в кэше идет с низким приоритетом
+    # project - преобразование ответа перед сохранением в кэш; project_name отличает такие записи в кэше
+    async def _get_json(
+        self,
+        url: str,
+        params: dict | None = None,
+        priority: int = INTERACTIVE,
+        project: Callable[[Any], Any] | None = None,
+        project_name: str | None = None
+    ):
+        async def fetch(priority: int = priority):
+            response = await self._request(url, params, priority)
+            if project is None:
+                return response.json(), len(response.content)
+            value = project(response.json())
+            # в кэше учитываем размер компактного представления, а не исходного ответа
+            return value, len(json.dumps(value, default=asdict))
+        key = self.cache.make_key(url, params)
+        if project_name is not None:
+            key += (project_name,)
+        return await self.cache.get_or_fetch(key, fetch, refresh=lambda: fetch(BACKGROUND))
     
     # получаем список шоу по указанному названию
-    async def search_shows(self, film_name: str) -> list[dict]:
-        response = await self._client.get(
-            url='/search/shows',    # указываем более короткую версию URL за счет base_url в _client
-            params={'q': film_name}
+    async def search_shows(self, film_name: str, priority: int = INTERACTIVE) -> list[dict]:
+        # указываем более короткую версию URL за счет base_url в _client
+        return await self._get_json('/search/shows', params={'q': film_name}, priority=priority)
+
+    # поиск шоу в компактном виде: в кэше хранятся только нужные поля
+    async def search_shows_compact(self, film_name: str) -> list[ShowMatch]:
+        return await self._get_json(
+            '/search/shows', params={'q': film_name}, project=project_search, project_name='compact'
         )
-        response.raise_for_status()
-        return response.json()
\ No newline at end of file
+
+    # поиск шоу без разбора JSON: возвращает открытый потоковый ответ TVMaze,
+    # тело которого можно отдавать клиенту по частям (после этого ответ нужно закрыть - response.aclose())
+    # кэш и повторы здесь не используются, планировщик и выключатель - как для остальных запросов
+    async def stream_search_shows(self, film_name: str) -> httpx.Response:
+        self.breaker.before_call()
+        await self.scheduler.acquire(INTERACTIVE)
+        request = self._client.build_request('GET', '/search/shows', params={'q': film_name})
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status_code == 429:
+            self.scheduler.pause(parse_retry_after(response.headers.get('Retry-After')))
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return response
+
+    # данные шоу, его эпизоды и актерский состав
+    # cached=False - свежие данные мимо кэша (для синхронизации локального зеркала)
+    async def get_show(self, show_id: int, cached: bool = True) -> dict:
+        if not cached:
+            return (await self._request(f'/shows/{show_id}', None, BACKGROUND)).json()
+        return await self._get_json(f'/shows/{show_id}')
+
+    async def get_episodes(self, show_id: int) -> list[dict]:
+        return await self._get_json(f'/shows/{show_id}/episodes')
+
+    async def get_cast(self, show_id: int) -> list[dict]:
+        return await self._get_json(f'/shows/{show_id}/cast')
+
+    # шоу вместе с эпизодами и актерами: три запроса идут одновременно
+    async def get_show_details(self, show_id: int) -> dict:
+        show, episodes, cast = await asyncio.gather(
+            self.get_show(show_id), self.get_episodes(show_id), self.get_cast(show_id)
+        )
+        return {'show': show, 'episodes': episodes, 'cast': cast}
+
+    # пакетная загрузка подробностей о шоу: результаты отдаются по мере готовности, а не в порядке show_ids
+    # - concurrency обработчиков берут ID из общей очереди, поэтому одновременно загружается не больше concurrency шоу
+    # - ошибка по одному шоу попадает в его результат ({'id', 'error'}) и не прерывает остальные
+    # - если генератор закрыли раньше (клиент отключился), обработчики отменяются
+    async def iter_show_details(self, show_ids: list[int], concurrency: int = DETAILS_CONCURRENCY):
+        pending = asyncio.Queue()
+        for show_id in show_ids:
+            pending.put_nowait(show_id)
+        results = asyncio.Queue()
+
+        async def worker():
+            while not pending.empty():
+                show_id = pending.get_nowait()
+                try:
+                    details = await self.get_show_details(show_id)
+                    await results.put({'id': show_id, **details})
+                except httpx.HTTPStatusError as exc:
+                    await results.put({'id': show_id, 'error': exc.response.status_code})
+                # любая другая ошибка (сеть, выключатель, неверный JSON) тоже остается в результате одного шоу
+                except Exception as exc:
+                    await results.put({'id': show_id, 'error': str(exc) or type(exc).__name__})
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(show_ids)))]
+        try:
+            for _ in range(len(show_ids)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    # страница общего списка шоу TVMaze (по 250 шоу в порядке ID); пустой список - страниц больше нет
+    # страницы большие и нужны только для заполнения зеркала, поэтому идут мимо кэша и с низким приоритетом
+    async def get_show_index(self, page: int) -> list[dict]:
+        try:
+            response = await self._request('/shows', {'page': page}, BACKGROUND)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 404:
+                return []
+            raise
+        return response.json()
+
+    # какие шоу менялись за период since ('day', 'week', 'month'): {ID шоу: время изменения}
+    async def get_show_updates(self, since: str = 'day') -> dict[int, int]:
+        response = await self._request('/updates/shows', {'since': since}, BACKGROUND)
+        return {int(show_id): updated for show_id, updated in response.json().items()}
+
+    # фоновая предзагрузка популярных запросов в кэш: пропускает вперед поиски пользователей
+    async def prefetch_shows(self, film_names: list[str]):
+        for film_name in film_names:
+            try:
+                await self.search_shows(film_name, priority=BACKGROUND)
+            except (httpx.HTTPError, CircuitOpenError):
+                pass
\ No newline at end of file
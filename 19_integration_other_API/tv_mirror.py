@@ -0,0 +1,201 @@
+'''
+Локальное зеркало списка шоу TVMaze в SQLite с полнотекстовым поиском (FTS5).
+
+Запуск из папки проекта:
+python tv_mirror.py populate                 # заполнить зеркало из общего списка шоу TVMaze (постранично)
+python tv_mirror.py populate --max-pages 10  # только первые страницы
+python tv_mirror.py sync                     # обновить шоу, изменившиеся с прошлой синхронизации
+
+Заполнение продолжается с последней сохраненной страницы, поэтому прерванный запуск можно просто повторить.
+Синхронизацию удобно запускать по расписанию (например, раз в час из cron).
+'''
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+import time
+
+import httpx
+
+from tv_client import TVMazeClient
+
+# файл зеркала по умолчанию
+TV_MIRROR_PATH = 'tv_mirror.db'
+# сколько шоу отдавать в результатах поиска
+SEARCH_LIMIT = 10
+# сколько обновленных шоу сохранять одной транзакцией при синхронизации
+SYNC_BATCH_SIZE = 50
+# сколько секунд поиск ждет блокировку базы: он выполняется в цикле событий, поэтому ждать долго нельзя
+SEARCH_BUSY_TIMEOUT = 0.1
+# сколько секунд ждет блокировку запись из командной строки (populate/sync)
+SYNC_BUSY_TIMEOUT = 30.0
+# периоды списка изменений TVMaze: (название, длина в секундах)
+UPDATE_PERIODS = (('day', 86400), ('week', 7 * 86400), ('month', 30 * 86400))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS shows (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    updated INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS shows_fts USING fts5(
+    name, content='shows', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS shows_ai AFTER INSERT ON shows BEGIN
+    INSERT INTO shows_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS shows_ad AFTER DELETE ON shows BEGIN
+    INSERT INTO shows_fts (shows_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS shows_au AFTER UPDATE ON shows BEGIN
+    INSERT INTO shows_fts (shows_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO shows_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+# запрос FTS5 из строки пользователя: каждое слово ищется как начало слова в названии,
+# слова в кавычках, поэтому спецсимволы FTS5 в запросе не ломают поиск
+def fts_query(q: str) -> str | None:
+    words = re.findall(r'\w+', q.lower())
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+# зеркало шоу: таблица shows с исходным JSON шоу и индекс FTS5 по названиям (обновляется триггерами)
+# поиск по индексу занимает доли миллисекунды, поэтому выполняется прямо в цикле событий
+# - журнал WAL: чтение не ждет записи, так что populate/sync из командной строки не останавливают поиск
+# - timeout - сколько ждать блокировку; если база все же занята, search выбрасывает sqlite3.OperationalError
+class ShowMirror:
+    def __init__(self, path: str = TV_MIRROR_PATH, timeout: float = SEARCH_BUSY_TIMEOUT):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self.metrics = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def close(self):
+        self._conn.close()
+
+    def count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM shows').fetchone()[0]
+
+    # сохраненное значение прогресса синхронизации
+    def get_state(self, key: str) -> str | None:
+        row = self._conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    # значение прогресса записывается в той же транзакции, что и данные (фиксирует вызывающий код)
+    def _set_state(self, key: str, value):
+        self._conn.execute(
+            'INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, str(value))
+        )
+
+    def _upsert(self, shows: list[dict]):
+        self._conn.executemany(
+            'INSERT INTO shows (id, name, updated, data) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET name = excluded.name, updated = excluded.updated, data = excluded.data',
+            [(show['id'], show['name'], show.get('updated') or 0, json.dumps(show, ensure_ascii=False)) for show in shows]
+        )
+
+    # поиск шоу по названию в формате ответа TVMaze /search/shows; пустой список - промах
+    def search(self, q: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+        query = fts_query(q)
+        rows = []
+        if query is not None:
+            try:
+                rows = self._conn.execute(
+                    'SELECT bm25(shows_fts), shows.data FROM shows_fts JOIN shows ON shows.id = shows_fts.rowid '
+                    'WHERE shows_fts MATCH ? ORDER BY bm25(shows_fts) LIMIT ?',
+                    (query, limit)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                self.metrics['errors'] += 1
+                raise
+        self.metrics['hits' if rows else 'misses'] += 1
+        # bm25 в SQLite тем меньше, чем лучше совпадение, а score в TVMaze - тем больше
+        return [{'score': round(-rank, 4), 'show': json.loads(data)} for rank, data in rows]
+
+    # заполнение зеркала из общего списка шоу TVMaze страница за страницей
+    # каждая страница сохраняется вместе с номером следующей страницы одной транзакцией
+    async def populate(self, client: TVMazeClient, max_pages: int | None = None, log=print) -> int:
+        page = int(self.get_state('index_page') or 0)
+        if page == 0:
+            # изменения, сделанные во время заполнения, подхватит следующая синхронизация
+            with self._conn:
+                self._set_state('last_sync', int(time.time()))
+        loaded = 0
+        while max_pages is None or loaded < max_pages:
+            shows = await client.get_show_index(page)
+            if not shows:
+                break
+            with self._conn:
+                self._upsert(shows)
+                self._set_state('index_page', page + 1)
+            log(f'страница {page}: {len(shows)} шоу, всего в зеркале {self.count()}')
+            page += 1
+            loaded += 1
+        return loaded
+
+    # период списка изменений TVMaze, покрывающий время с прошлой синхронизации
+    def updates_period(self, now: float) -> str:
+        elapsed = now - int(self.get_state('last_sync') or 0)
+        for period, length in UPDATE_PERIODS:
+            if elapsed < length:
+                return period
+        raise RuntimeError('Зеркало не синхронизировалось больше месяца, заполните его заново (populate)')
+
+    # инкрементальная синхронизация: загружаем только шоу, которые изменились в TVMaze позже сохраненной версии
+    # время изменения каждого шоу хранится в зеркале, поэтому прерванную синхронизацию можно просто повторить:
+    # уже обновленные шоу повторно не загружаются
+    async def sync_updates(self, client: TVMazeClient, log=print) -> int:
+        started = int(time.time())
+        updates = await client.get_show_updates(self.updates_period(started))
+        stored = dict(self._conn.execute('SELECT id, updated FROM shows').fetchall())
+        changed = sorted(show_id for show_id, updated in updates.items() if updated > stored.get(show_id, -1))
+        for start in range(0, len(changed), SYNC_BATCH_SIZE):
+            batch = changed[start:start + SYNC_BATCH_SIZE]
+            shows = []
+            for show_id in batch:
+                try:
+                    shows.append(await client.get_show(show_id, cached=False))
+                except httpx.HTTPStatusError as exc:
+                    # шоу удалено из TVMaze - убираем его и из зеркала
+                    if exc.response.status_code != 404:
+                        raise
+                    with self._conn:
+                        self._conn.execute('DELETE FROM shows WHERE id = ?', (show_id,))
+            with self._conn:
+                self._upsert(shows)
+            log(f'обновлено {start + len(batch)} из {len(changed)} шоу')
+        with self._conn:
+            self._set_state('last_sync', started)
+        return len(changed)
+
+async def main(command: str, path: str, max_pages: int | None):
+    mirror = ShowMirror(path, timeout=SYNC_BUSY_TIMEOUT)
+    client = TVMazeClient()
+    try:
+        if command == 'populate':
+            pages = await mirror.populate(client, max_pages)
+            print(f'Загружено страниц: {pages}, шоу в зеркале: {mirror.count()}')
+        else:
+            changed = await mirror.sync_updates(client)
+            print(f'Обновлено шоу: {changed}')
+    finally:
+        await client.close()
+        mirror.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Локальное зеркало шоу TVMaze')
+    parser.add_argument('command', choices=['populate', 'sync'], help='заполнить зеркало или синхронизировать изменения')
+    parser.add_argument('--db', default=TV_MIRROR_PATH, help='файл зеркала')
+    parser.add_argument('--max-pages', type=int, default=None, help='сколько страниц загрузить за запуск')
+    args = parser.parse_args()
+    asyncio.run(main(args.command, args.db, args.max_pages))
\ No newline at end of file
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+# компактное представление шоу: только поля, которые показывает наш фронтенд
+# slots=True - у объектов нет __dict__, поэтому в кэше они занимают в несколько раз меньше памяти,
+# чем исходный JSON со словарями описаний, картинок и ссылок
+@dataclass(slots=True)
+class ShowSummary:
+    id: int
+    name: str
+    type: str | None
+    language: str | None
+    genres: list[str]
+    premiered: str | None
+    rating: float | None
+    network: str | None
+    image: str | None
+
+# результат поиска: совпадение и шоу
+@dataclass(slots=True)
+class ShowMatch:
+    score: float
+    show: ShowSummary
+
+# из полного JSON шоу TVMaze берем только нужные поля
+def project_show(show: dict) -> ShowSummary:
+    network = show.get('network') or show.get('webChannel') or {}
+    return ShowSummary(
+        id=show['id'],
+        name=show['name'],
+        type=show.get('type'),
+        language=show.get('language'),
+        genres=show.get('genres') or [],
+        premiered=show.get('premiered'),
+        rating=(show.get('rating') or {}).get('average'),
+        network=network.get('name'),
+        image=(show.get('image') or {}).get('medium'),
+    )
+
+# ответ /search/shows в компактном виде
+def project_search(results: list[dict]) -> list[ShowMatch]:
+    return [ShowMatch(score=item['score'], show=project_show(item['show'])) for item in results]
\ No newline at end of file
@@ -1,7 +1,16 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+import json
+import sqlite3
+from typing import Literal
+
+from fastapi import APIRouter, Request, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import httpx
 
-from tv_client import TVMazeClient
+from tv_breaker import CircuitOpenError
+from tv_client import TVMazeClient, DETAILS_CONCURRENCY
+from tv_mirror import ShowMirror
+from tv_projection import project_search
 
 # роутер для эндпоинтов, работающих с TVMaze
 router = APIRouter(prefix='/tv')
@@ -12,14 +21,105 @@ def get_tvmaze_client(request: Request) -> TVMazeClient:
     # в app.state.tv_client при старте приложения через lifespan
     return request.app.state.tv_client
 
+# функция-зависимость для локального зеркала шоу (None, если зеркало не подключено)
+def get_tv_mirror(request: Request) -> ShowMirror | None:
+    return getattr(request.app.state, 'tv_mirror', None)
+
+# тело ответа TVMaze по частям; поток закрывается в finally, даже если клиент отключился посреди ответа:
+# фоновые задачи StreamingResponse при отключении клиента не выполняются, и незакрытый поток
+# навсегда занимал бы соединение из пула httpx
+async def stream_body(response: httpx.Response):
+    try:
+        async for chunk in response.aiter_bytes():
+            yield chunk
+    finally:
+        await response.aclose()
+
+# StreamingResponse, который закрывает тело при любом завершении ответа
+# если отправка клиенту завершилась ошибкой, генератор тела остается приостановленным на yield,
+# и без явного aclose его finally выполнился бы только при сборке мусора
+class ClosingStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
 # получение списка шоу по указанному названию
+# сначала ищем в локальном зеркале, во внешний API идем только при промахе
+# режимы ответа:
+# - full: полный JSON TVMaze (разбирается в словари и кэшируется);
+# - compact: только нужные поля шоу (в кэше хранятся компактные объекты);
+# - raw: тело ответа TVMaze передается клиенту по частям как есть, без разбора JSON и без кэша
 @router.get('/search')
-async def search_shows(q: str, client: TVMazeClient = Depends(get_tvmaze_client)):
+async def search_shows(
+    q: str,
+    mode: Literal['full', 'compact', 'raw'] = Query(default='full', description='Режим ответа'),
+    client: TVMazeClient = Depends(get_tvmaze_client),
+    mirror: ShowMirror | None = Depends(get_tv_mirror)
+):
+    # база зеркала занята (например, идет запись из командной строки) - ищем в TVMaze, как при промахе
+    if mirror is not None:
+        try:
+            shows = mirror.search(q)
+        except sqlite3.OperationalError:
+            shows = []
+        if shows:
+            return project_search(shows) if mode == 'compact' else shows
     # обращаемся к внешнему API и получаем список шоу
     try:
+        if mode == 'compact':
+            return await client.search_shows_compact(film_name=q)
+        if mode == 'raw':
+            response = await client.stream_search_shows(film_name=q)
+            return ClosingStreamingResponse(
+                stream_body(response),
+                media_type=response.headers.get('content-type', 'application/json')
+            )
         return await client.search_shows(film_name=q)
     # обрабатываем исключения при таймаутах и статусах 4xx/5xx
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail='TVMaze timeout')
     except httpx.HTTPStatusError as exc:
-        raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
\ No newline at end of file
+        raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
+    # TVMaze недоступен: выключатель разомкнут или соединение так и не удалось установить
+    except CircuitOpenError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={'Retry-After': str(int(exc.retry_in) + 1)})
+    except httpx.TransportError:
+        raise HTTPException(status_code=502, detail='TVMaze unavailable')
+
+# запрос подробностей о нескольких шоу
+class ShowDetailsRequest(BaseModel):
+    show_ids: list[int] = Field(min_length=1, max_length=200)
+    concurrency: int = Field(default=DETAILS_CONCURRENCY, ge=1, le=20)
+
+# подробности о шоу (данные, эпизоды, актеры) потоком NDJSON: одна строка JSON на шоу, по мере готовности
+# ошибка по отдельному шоу приходит строкой {"id": ..., "error": ...}, остальные шоу продолжают загружаться
+@router.post('/shows/details')
+async def get_shows_details(details_request: ShowDetailsRequest, client: TVMazeClient = Depends(get_tvmaze_client)):
+    async def lines():
+        async for result in client.iter_show_details(details_request.show_ids, details_request.concurrency):
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+# метрики кэша ответов TVMaze: попадания, промахи, фоновые обновления, объем
+@router.get('/cache/metrics')
+async def get_cache_metrics(client: TVMazeClient = Depends(get_tvmaze_client)):
+    return client.cache.get_metrics()
+
+# метрики планировщика запросов к TVMaze: ответы 429, паузы, очередь и время ожидания по приоритетам
+@router.get('/scheduler/metrics')
+async def get_scheduler_metrics(client: TVMazeClient = Depends(get_tvmaze_client)):
+    return client.scheduler.get_metrics()
+
+# состояние выключателя запросов к TVMaze
+@router.get('/breaker/metrics')
+async def get_breaker_metrics(client: TVMazeClient = Depends(get_tvmaze_client)):
+    return client.breaker.get_metrics()
+
+# метрики локального зеркала: попадания, промахи, ошибки чтения базы и число шоу
+@router.get('/mirror/metrics')
+async def get_mirror_metrics(mirror: ShowMirror | None = Depends(get_tv_mirror)):
+    if mirror is None:
+        raise HTTPException(status_code=404, detail='Зеркало не подключено')
+    return {**mirror.metrics, 'shows': mirror.count()}
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable
+
+# ограничение TVMaze: не больше 20 запросов за 10 секунд с одного IP
+TVMAZE_RATE_LIMIT = (20, 10.0)
+# приоритеты запросов: чем меньше число, тем раньше запрос уходит в TVMaze
+INTERACTIVE = 0     # поиск, который ждет пользователь
+BACKGROUND = 1      # фоновая предзагрузка и обновление кэша
+# пауза после 429, если TVMaze не прислал Retry-After
+DEFAULT_RETRY_AFTER = 1.0
+
+# корзина токенов: capacity токенов, пополняется со скоростью rate токенов в секунду
+# за любое окно window секунд уходит не больше capacity + rate * window запросов,
+# поэтому из лимита "limit запросов за window секунд" четверть отдаем на всплеск, остальное - на ровный поток
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    @classmethod
+    def for_limit(cls, limit: int, window: float, clock: Callable[[], float] = time.monotonic) -> 'TokenBucket':
+        capacity = max(limit // 4, 1)
+        return cls((limit - capacity) / window, capacity, clock)
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # через сколько секунд появится токен (0 - уже есть)
+    def time_until_token(self) -> float:
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    # после 429 корзина опустошается: лимит на стороне TVMaze уже исчерпан
+    def drain(self):
+        self._refill()
+        self.tokens = 0
+
+# пауза из заголовка Retry-After: число секунд или HTTP-дата
+def parse_retry_after(value: str | None) -> float:
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+# планировщик запросов к TVMaze
+# - каждый запрос сначала ждет своей очереди: await scheduler.acquire(priority)
+# - очередь с приоритетами: интерактивные запросы обгоняют фоновые, внутри приоритета - по порядку прихода
+# - запросы выпускаются по одному, когда в корзине есть токен и не идет пауза после 429 (Retry-After)
+# - метрики: сколько запросов ждали и сколько времени (в среднем и максимум) по приоритетам
+class RequestScheduler:
+    def __init__(self, bucket: TokenBucket | None = None, clock: Callable[[], float] = time.monotonic):
+        self.bucket = TokenBucket.for_limit(*TVMAZE_RATE_LIMIT, clock=clock) if bucket is None else bucket
+        self.clock = clock
+        self.paused_until = 0.0
+        self._queue: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self.metrics = {'rate_limited': 0, 'paused_seconds': 0.0}
+        self.waits: dict[int, dict] = {}
+
+    # ждем разрешения на запрос
+    async def acquire(self, priority: int = INTERACTIVE):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+        started = self.clock()
+        # если вызов отменен, future тоже отменяется и диспетчер его пропустит
+        await future
+        self._record_wait(priority, self.clock() - started)
+
+    def _record_wait(self, priority: int, wait: float):
+        stats = self.waits.setdefault(priority, {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+        stats['requests'] += 1
+        stats['total_wait'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
+
+    # выпускаем запросы из очереди, пока она не опустеет
+    async def _dispatch(self):
+        while True:
+            # отмененные ожидания не тратят токены
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                return
+            delay = max(self.paused_until - self.clock(), self.bucket.time_until_token())
+            if delay > 0:
+                # ждем токен; после ожидания заново смотрим на голову очереди - за это время мог прийти
+                # более приоритетный запрос или начаться пауза после 429
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, future = heapq.heappop(self._queue)
+            self.bucket.take()
+            future.set_result(None)
+
+    # TVMaze ответил 429: останавливаем все запросы на время из Retry-After
+    def pause(self, seconds: float):
+        self.metrics['rate_limited'] += 1
+        self.metrics['paused_seconds'] += seconds
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+        self.bucket.drain()
+
+    def get_metrics(self) -> dict:
+        waits = {
+            'interactive' if priority == INTERACTIVE else 'background' if priority == BACKGROUND else str(priority): {
+                'requests': stats['requests'],
+                'avg_wait': stats['total_wait'] / stats['requests'],
+                'max_wait': stats['max_wait'],
+            }
+            for priority, stats in sorted(self.waits.items())
+        }
+        return {**self.metrics, 'queued': len(self._queue), 'queue_wait': waits}
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        for _, _, future in self._queue:
+            future.cancel()
+        self._queue = []
\ No newline at end of file
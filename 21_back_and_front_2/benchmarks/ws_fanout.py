@@ -0,0 +1,146 @@
+'''
+Нагрузочный замер рассылки по комнате через ConnectionManager.
+
+Запуск из папки проекта:
+python -m benchmarks.ws_fanout --clients 10000 --messages 20
+
+Скрипт запускает приложение main.py в отдельном процессе uvicorn, открывает clients WebSocket-соединений
+к комнате /ws/rooms/bench и messages раз делает рассылку через POST /ws/rooms/bench/broadcast.
+Задержка доставки - время получения сообщения клиентом минус sent_at, которое сервер ставит при рассылке
+(сервер и клиенты на одной машине, часы общие). Выводятся перцентили задержки по всем доставкам
+и время, за которое рассылка дошла до последнего клиента.
+
+Для клиентов и сервера нужна библиотека websockets (входит в uvicorn[standard]).
+Каждое соединение занимает дескриптор файла в процессе клиентов и в процессе сервера, поэтому лимит поднимается до жесткого (ulimit -Hn).
+'''
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+ROOM = 'bench'
+
+# поднимаем лимит открытых файлов до жесткого, процесс сервера унаследует его
+def raise_open_files_limit(needed: int) -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < needed:
+        print(f'лимит открытых файлов {hard} меньше нужных {needed}, часть соединений может не открыться')
+    return hard
+
+# запускаем сервер и ждем, пока он начнет отвечать
+async def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port),
+        '--backlog', '4096', '--log-level', 'warning',
+    ])
+    async with httpx.AsyncClient() as http:
+        for _ in range(100):
+            try:
+                await http.get(f'http://127.0.0.1:{port}/ws/manager/stats')
+                return server
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('сервер не запустился')
+
+# клиенты бенчмарка: задержки доставок и число клиентов, получивших каждое сообщение
+class FanOutStats:
+    def __init__(self, messages: int):
+        self.latencies: list[float] = []
+        self.received = [0] * messages
+        self.last_delivery = [0.0] * messages
+        self.changed = asyncio.Event()
+
+    def record(self, text: str):
+        now = time.time()
+        message = json.loads(text)
+        n = int(message['text'])
+        self.latencies.append(now - message['sent_at'])
+        self.received[n] += 1
+        self.last_delivery[n] = now
+        self.changed.set()
+
+# один клиент: читает сообщения, пока его не закроют
+# сжатие и ping выключены: иначе сервер сжимает каждое сообщение отдельно для каждого соединения
+async def run_client(url: str, stats: FanOutStats, connected: list, opened: asyncio.Semaphore):
+    try:
+        async with opened:
+            ws = await websockets.connect(url, compression=None, ping_interval=None, open_timeout=60)
+        connected.append(ws)
+        async for text in ws:
+            stats.record(text)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+        connected.append(exc)
+
+# ждем, пока сообщение n получат все подключенные клиенты (или пока не истечет timeout)
+async def wait_delivered(stats: FanOutStats, n: int, clients: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while stats.received[n] < clients and time.monotonic() < deadline:
+        stats.changed.clear()
+        try:
+            await asyncio.wait_for(stats.changed.wait(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            pass
+
+def percentile_ms(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1] * 1000
+
+async def main(clients: int, messages: int, port: int, connect_concurrency: int, timeout: float):
+    raise_open_files_limit(clients + 100)
+    server = await start_server(port)
+    stats = FanOutStats(messages)
+    connected = []
+    opened = asyncio.Semaphore(connect_concurrency)
+    url = f'ws://127.0.0.1:{port}/ws/rooms/{ROOM}'
+    try:
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(run_client(url, stats, connected, opened)) for _ in range(clients)]
+        while len(connected) < clients:
+            await asyncio.sleep(0.1)
+        sockets = [ws for ws in connected if not isinstance(ws, Exception)]
+        print(f'открыто {len(sockets)} из {clients} соединений за {time.perf_counter() - started:.1f} с')
+
+        fan_out = []
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}') as http:
+            for n in range(messages):
+                sent_at = time.time()
+                response = await http.post(f'/ws/rooms/{ROOM}/broadcast', json={'text': str(n)})
+                queued = response.json()['clients']
+                await wait_delivered(stats, n, queued, timeout)
+                fan_out.append(stats.last_delivery[n] - sent_at)
+            server_stats = (await http.get('/ws/manager/stats')).json()
+
+        delivered = sum(stats.received)
+        print(f'{messages} рассылок на {len(sockets)} клиентов: доставлено {delivered} из {messages * len(sockets)}')
+        print(f'{"задержка доставки, мс":<28} p50 {percentile_ms(stats.latencies, 50):8.1f}'
+              f'  p90 {percentile_ms(stats.latencies, 90):8.1f}  p99 {percentile_ms(stats.latencies, 99):8.1f}'
+              f'  max {max(stats.latencies) * 1000:8.1f}')
+        print(f'{"до последнего клиента, мс":<28} p50 {statistics.median(fan_out) * 1000:8.1f}'
+              f'  max {max(fan_out) * 1000:8.1f}')
+        print(f'отключено медленных клиентов: {server_stats["slow_disconnects"]}')
+
+        for ws in sockets:
+            await ws.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Нагрузочный замер рассылки по WebSocket')
+    parser.add_argument('--clients', type=int, default=10000, help='число WebSocket-соединений')
+    parser.add_argument('--messages', type=int, default=20, help='число рассылок')
+    parser.add_argument('--port', type=int, default=8765, help='порт сервера')
+    parser.add_argument('--connect-concurrency', type=int, default=200, help='одновременных подключений')
+    parser.add_argument('--timeout', type=float, default=30.0, help='сколько секунд ждать доставки одной рассылки')
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.messages, args.port, args.connect_concurrency, args.timeout))
\ No newline at end of file
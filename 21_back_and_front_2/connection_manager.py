@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+from collections import deque
+from collections.abc import Iterable
+
+from fastapi import WebSocket
+
+# сколько сообщений может ждать отправки клиенту, прежде чем мы начинаем проверять, не отстает ли он
+SEND_QUEUE_SIZE = 64
+# клиент считается медленным, если при полной очереди самое старое сообщение ждет отправки дольше этого (секунды)
+SLOW_CLIENT_LAG = 2.0
+# сколько секунд может длиться отправка одного сообщения клиенту
+SEND_TIMEOUT = 5.0
+# код закрытия WebSocket для медленного клиента: 1008 - нарушение политики сервера
+SLOW_CLIENT_CLOSE_CODE = 1008
+
+# подключенный клиент: сокет, его комнаты и темы, очередь на отправку и задача, которая ее разбирает
+# в очереди лежат пары (строка сообщения, время постановки в очередь)
+class Client:
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.rooms: set[str] = set()
+        self.topics: set[str] = set()
+        self.queue: deque[tuple[str, float]] = deque()
+        self.wakeup = asyncio.Event()
+        self.writer: asyncio.Task | None = None
+        self.connected = True
+
+    # сколько секунд ждет отправки самое старое сообщение в очереди
+    def lag(self, now: float) -> float:
+        return now - self.queue[0][1] if self.queue else 0.0
+
+# реестр WebSocket-соединений с комнатами и темами
+# - клиент состоит в комнатах (чат) и подписан на темы (события сервера), рассылка идет по комнате или теме
+# - сообщение рассылки сериализуется в JSON один раз, всем клиентам уходит одна и та же строка
+# - рассылка не ждет клиентов: строка кладется в очередь каждого клиента без await,
+#   а в сокет пишет отдельная задача клиента - так отправка всем клиентам идет одновременно
+# - медленный клиент отключается, чтобы не копить для него сообщения и не задерживать остальных;
+#   медленным считается клиент, который отстал по времени, а не просто набрал полную очередь:
+#   всплеск рассылок за один проход цикла событий заполняет очереди всех клиентов, даже быстрых,
+#   потому что их задачи еще не успели ничего отправить
+#   * очередь длиннее SEND_QUEUE_SIZE и самое старое сообщение ждет дольше SLOW_CLIENT_LAG
+#   * отправка одного сообщения длится дольше SEND_TIMEOUT
+#   строка сообщения общая для всех клиентов, поэтому очередь клиента хранит только ссылки на нее,
+#   а ее длина ограничена числом рассылок за SLOW_CLIENT_LAG секунд
+class ConnectionManager:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.clients: set[Client] = set()
+        self.rooms: dict[str, set[Client]] = {}
+        self.topics: dict[str, set[Client]] = {}
+        self._closing: set[asyncio.Task] = set()
+        self.counters = {
+            'broadcasts': 0,        # рассылки
+            'queued': 0,            # сообщения, поставленные в очереди клиентов
+            'delivered': 0,         # сообщения, записанные в сокеты
+            'slow_disconnects': 0,  # отключенные медленные клиенты
+            'send_errors': 0,       # ошибки отправки (клиент уже отключился)
+        }
+
+    # принимаем соединение и регистрируем клиента в комнатах и темах
+    async def connect(self, ws: WebSocket, rooms: Iterable[str] = (), topics: Iterable[str] = ()) -> Client:
+        await ws.accept()
+        client = Client(ws)
+        self.clients.add(client)
+        for room in rooms:
+            self.join(client, room)
+        for topic in topics:
+            self.subscribe(client, topic)
+        client.writer = asyncio.create_task(self._write(client))
+        return client
+
+    # отключение клиента: убираем его из реестра и останавливаем отправку
+    # задача отправки завершается сама, увидев connected = False; отмена нужна,
+    # только чтобы прервать зависшую отправку
+    def disconnect(self, client: Client):
+        if not client.connected:
+            return
+        client.connected = False
+        client.queue.clear()
+        client.wakeup.set()
+        self.clients.discard(client)
+        for room in client.rooms:
+            self._remove(self.rooms, room, client)
+        for topic in client.topics:
+            self._remove(self.topics, topic, client)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    # пустые группы удаляем, чтобы реестр не рос от разовых комнат и тем
+    @staticmethod
+    def _remove(groups: dict[str, set[Client]], name: str, client: Client):
+        members = groups.get(name)
+        if members is not None:
+            members.discard(client)
+            if not members:
+                del groups[name]
+
+    def join(self, client: Client, room: str):
+        client.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(client)
+
+    def leave(self, client: Client, room: str):
+        client.rooms.discard(room)
+        self._remove(self.rooms, room, client)
+
+    def subscribe(self, client: Client, topic: str):
+        client.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, client: Client, topic: str):
+        client.topics.discard(topic)
+        self._remove(self.topics, topic, client)
+
+    # рассылка участникам комнаты, возвращает число клиентов, которым поставлено сообщение
+    def broadcast(self, room: str, message: dict) -> int:
+        return self._fan_out(self.rooms.get(room, ()), message)
+
+    # рассылка подписчикам темы
+    def publish(self, topic: str, message: dict) -> int:
+        return self._fan_out(self.topics.get(topic, ()), message)
+
+    def _fan_out(self, members, message: dict) -> int:
+        text = json.dumps(message, ensure_ascii=False)
+        self.counters['broadcasts'] += 1
+        now = self.clock()
+        queued = 0
+        # копия множества: отключение медленного клиента меняет группу во время обхода
+        for client in list(members):
+            if len(client.queue) >= SEND_QUEUE_SIZE and client.lag(now) > SLOW_CLIENT_LAG:
+                self._drop_slow(client)
+                continue
+            client.queue.append((text, now))
+            client.wakeup.set()
+            queued += 1
+        self.counters['queued'] += queued
+        return queued
+
+    # отключаем медленного клиента и закрываем его сокет в фоне
+    def _drop_slow(self, client: Client):
+        self.counters['slow_disconnects'] += 1
+        self.disconnect(client)
+        task = asyncio.create_task(self._close(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    # закрытие тоже может зависнуть на медленном клиенте, поэтому ждем его не дольше SEND_TIMEOUT
+    async def _close(self, client: Client):
+        try:
+            async with asyncio.timeout(SEND_TIMEOUT):
+                await client.ws.close(code=SLOW_CLIENT_CLOSE_CODE, reason='Клиент не успевает получать сообщения')
+        except Exception:
+            pass
+
+    # задача клиента: по одному пишем сообщения из очереди в сокет, пока клиент подключен
+    # asyncio.timeout, в отличие от wait_for, не теряет отмену задачи, если отправка завершилась в тот же момент
+    async def _write(self, client: Client):
+        while client.connected:
+            if not client.queue:
+                client.wakeup.clear()
+                await client.wakeup.wait()
+                continue
+            text, _ = client.queue.popleft()
+            try:
+                async with asyncio.timeout(SEND_TIMEOUT):
+                    await client.ws.send_text(text)
+            except TimeoutError:
+                self._drop_slow(client)
+                return
+            except Exception:
+                self.counters['send_errors'] += 1
+                self.disconnect(client)
+                return
+            self.counters['delivered'] += 1
+
+    # счетчики и размеры реестра
+    def get_stats(self) -> dict:
+        return {
+            'clients': len(self.clients),
+            'rooms': len(self.rooms),
+            'topics': len(self.topics),
+            **self.counters,
+        }
+
+    # остановка сервера: отключаем всех клиентов и дожидаемся их задач
+    async def close(self):
+        writers = [client.writer for client in self.clients if client.writer is not None]
+        for client in list(self.clients):
+            self.disconnect(client)
+        await asyncio.gather(*writers, *self._closing, return_exceptions=True)
\ No newline at end of file
@@ -1,13 +1,57 @@
 # подключаем asyncio для реализации задержки бота (1.5 секунды) и запуска фоновой задачи
 import asyncio
+# подключаем time, чтобы отмечать время рассылки в сообщениях
+import time
+# asynccontextmanager - декоратор для lifespan-функции приложения
+from contextlib import asynccontextmanager
 # WebSocket - класс для работы с протоколом WebSocket в FastAPI
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 # подключаем класс StaticFiles для работы с файлами HTML, CSS и JS
 from fastapi.staticfiles import StaticFiles
 # подключаем класс RedirectResponse чтобы при обращении к / происходил редирект на /static/index.html
 from fastapi.responses import RedirectResponse
+# BaseModel - базовый класс Pydantic для тела запросов на рассылку
+from pydantic import BaseModel
+# реестр соединений с комнатами и темами для рассылок
+from connection_manager import ConnectionManager
 
-app = FastAPI()
+# общий реестр соединений на процесс
+manager = ConnectionManager()
+
+# при остановке приложения отключаем всех клиентов реестра
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        yield
+    finally:
+        await manager.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# задержка "Бот печатает..." в секундах
+REPLY_DELAY = 1.5
+# сколько ответов одного соединения могут готовиться одновременно
+MAX_PENDING_REPLIES = 5
+# сколько принятых, но еще не взятых в работу сообщений держать на одно соединение
+INBOUND_QUEUE_SIZE = 20
+# что делать, если очередь сообщений соединения заполнена:
+# 'drop' - отбросить новое сообщение, 'close' - закрыть соединение (клиент шлет слишком много)
+OVERFLOW_POLICY = 'drop'
+# код закрытия WebSocket при переполнении: 1008 - нарушение политики сервера
+OVERFLOW_CLOSE_CODE = 1008
+# код закрытия WebSocket, если клиент прислал бинарный кадр: 1003 - неподдерживаемый тип данных
+UNSUPPORTED_DATA_CLOSE_CODE = 1003
+
+# счетчики работы WebSocket-чата для всех соединений
+ws_counters = {
+    'connections': 0,       # открытые соединения сейчас
+    'received': 0,          # принятые сообщения
+    'replied': 0,           # отправленные ответы
+    'dropped': 0,           # отброшенные сообщения (очередь была заполнена)
+    'closed_overflow': 0,   # соединения, закрытые из-за переполнения очереди
+    'closed_unsupported': 0,  # соединения, закрытые из-за бинарного кадра
+    'cancelled': 0,         # ответы и сообщения в очереди, отмененные из-за отключения клиента
+}
 
 # подключаем обработчик статических файлов из папки /static
 app.mount('/static', StaticFiles(directory='./static'), name='static')
@@ -27,10 +71,93 @@ def reply(user_text: str) -> str:
 
 # корутина для имитации "Бот печатает..." и отправки ответа через WebSocket
 async def process_and_reply(ws: WebSocket, text: str):
-    # задержка печати в 1.5 секунды
-    await asyncio.sleep(1.5)
+    # задержка печати (1.5 секунды)
+    await asyncio.sleep(REPLY_DELAY)
     # send_text() - метод для отправки текстовых сообщений через WebSocket
     await ws.send_text(reply(text))
+    ws_counters['replied'] += 1
+
+# ждем текстовое сообщение клиента, None - клиент прислал бинарный кадр
+# (receive_text() на бинарном кадре падает с KeyError, поэтому разбираем сообщение сами)
+async def receive_text_frame(ws: WebSocket) -> str | None:
+    message = await ws.receive()
+    if message['type'] == 'websocket.disconnect':
+        raise WebSocketDisconnect(code=message.get('code', 1000), reason=message.get('reason'))
+    return message.get('text')
+
+# обработка сообщений одного соединения
+# - принятые сообщения попадают в ограниченную очередь; при переполнении действует OVERFLOW_POLICY
+# - ответы готовятся фоновыми задачами, но не больше MAX_PENDING_REPLIES одновременно:
+#   следующее сообщение берется из очереди, только когда освободилось место
+# - ссылки на все задачи хранятся в tasks, поэтому при отключении клиента их можно отменить
+class ChatConnection:
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=INBOUND_QUEUE_SIZE)
+        self.slots = asyncio.Semaphore(MAX_PENDING_REPLIES)
+        self.tasks: set[asyncio.Task] = set()
+
+    # берем сообщения из очереди и запускаем подготовку ответов
+    async def dispatch(self):
+        while True:
+            # сначала ждем свободное место, потом берем сообщение: пока все места заняты,
+            # сообщения остаются в очереди, и при ее заполнении срабатывает OVERFLOW_POLICY
+            await self.slots.acquire()
+            text = await self.queue.get()
+            task = asyncio.create_task(process_and_reply(self.ws, text))
+            self.tasks.add(task)
+            task.add_done_callback(self._reply_done)
+
+    def _reply_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self.slots.release()
+        # ошибку отправки (клиент уже отключился) забираем из задачи, чтобы она не попала в лог asyncio:
+        # само соединение все равно завершится в run()
+        if not task.cancelled():
+            task.exception()
+
+    # принимаем сообщения, пока клиент подключен
+    async def receive(self):
+        while True:
+            # ожидаем получение текстового сообщения от клиента через WebSocket
+            text = await receive_text_frame(self.ws)
+            # чат работает только с текстом: на бинарный кадр закрываем соединение
+            if text is None:
+                ws_counters['closed_unsupported'] += 1
+                await self.ws.close(code=UNSUPPORTED_DATA_CLOSE_CODE, reason='Поддерживаются только текстовые сообщения')
+                return
+            ws_counters['received'] += 1
+            try:
+                self.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                if OVERFLOW_POLICY == 'close':
+                    ws_counters['closed_overflow'] += 1
+                    await self.ws.close(code=OVERFLOW_CLOSE_CODE, reason='Слишком много сообщений')
+                    return
+                ws_counters['dropped'] += 1
+
+    # отменяем всю незавершенную работу соединения: ответы уже некому отправлять
+    # отмена и подсчет выполняются сразу, без await: обработчик соединения сам может быть отменен
+    # (например, при остановке сервера), и тогда до кода после первого await дело не дойдет
+    async def cancel_pending(self, dispatcher: asyncio.Task):
+        dispatcher.cancel()
+        pending = list(self.tasks)
+        for task in pending:
+            task.cancel()
+        ws_counters['cancelled'] += len(pending) + self.queue.qsize()
+        ws_counters['connections'] -= 1
+        await asyncio.gather(dispatcher, *pending, return_exceptions=True)
+
+    async def run(self):
+        ws_counters['connections'] += 1
+        dispatcher = asyncio.create_task(self.dispatch())
+        try:
+            await self.receive()
+        # разрыв соединения - обычное завершение работы с клиентом
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await self.cancel_pending(dispatcher)
 
 # обработка GET-запроса для перехода на страницу бота
 @app.get('/')
@@ -42,14 +169,52 @@ def root():
 async def ws_endpoint(ws: WebSocket):
     # accept() - метод для начала работы WebSocket-соединения 
     await ws.accept()
-    # открываем бесконечный цикл приема сообщений 
-    # пока клиент подключен - будем читать и отвечать на сообщения
+    # пока клиент подключен - читаем сообщения и отвечаем на них, при отключении освобождаем ресурсы
+    await ChatConnection(ws).run()
+
+# счетчики WebSocket-чата: соединения, сообщения, отброшенная и отмененная работа
+@app.get('/ws/stats')
+def get_ws_stats():
+    return ws_counters
+
+# сообщение для рассылки по комнате или теме через HTTP
+class BroadcastIn(BaseModel):
+    text: str
+
+# комната чата: сообщение одного участника получают все участники комнаты
+# в параметре topics можно через запятую перечислить темы, на которые подписывается клиент
+@app.websocket('/ws/rooms/{room}')
+async def room_endpoint(ws: WebSocket, room: str, topics: str = ''):
+    client = await manager.connect(ws, rooms=[room], topics=[topic for topic in topics.split(',') if topic])
     try:
         while True:
-            # receive_text() - метод, ожидающий получение текстового сообщения от клиента через WebSocket
-            text = await ws.receive_text()
-            # создаем фоновую задачу, так сервер может принимать новые сообщения
-            asyncio.create_task(process_and_reply(ws, text))
-    # ловим любые исключения (например, разрыв соединения) - освобождаем ресурсы и закрываем соединение
-    except Exception:
-        pass
\ No newline at end of file
+            text = await receive_text_frame(ws)
+            # комната работает только с текстом, как и чат с ботом
+            if text is None:
+                await ws.close(code=UNSUPPORTED_DATA_CLOSE_CODE, reason='Поддерживаются только текстовые сообщения')
+                break
+            # sent_at - время рассылки, по нему клиент может посчитать задержку доставки
+            manager.broadcast(room, {'room': room, 'text': text, 'sent_at': time.time()})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(client)
+
+# рассылка от сервера всем участникам комнаты
+# обработчики рассылок асинхронные: реестр и очереди клиентов живут в цикле событий,
+# а обычные def-функции FastAPI выполняет в отдельном потоке
+@app.post('/ws/rooms/{room}/broadcast')
+async def broadcast_to_room(room: str, message: BroadcastIn):
+    clients = manager.broadcast(room, {'room': room, 'text': message.text, 'sent_at': time.time()})
+    return {'clients': clients}
+
+# рассылка подписчикам темы
+@app.post('/ws/topics/{topic}/publish')
+async def publish_to_topic(topic: str, message: BroadcastIn):
+    clients = manager.publish(topic, {'topic': topic, 'text': message.text, 'sent_at': time.time()})
+    return {'clients': clients}
+
+# число клиентов, комнат и тем, счетчики рассылок
+@app.get('/ws/manager/stats')
+def get_manager_stats():
+    return manager.get_stats()
\ No newline at end of file
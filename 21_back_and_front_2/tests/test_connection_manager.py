@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import connection_manager
+import main
+from connection_manager import ConnectionManager
+
+# поддельный сокет: запоминает отправленное, отправка может ждать, пока клиент "прочитает"
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent: list[str] = []
+        self.closed_code: int | None = None
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await self.unblocked.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        self.closed_code = code
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = ConnectionManager()
+    yield manager
+    await manager.close()
+
+# тестирование рассылки: сообщение сериализуется один раз и доходит только до своей комнаты или темы
+@pytest.mark.asyncio
+async def test_broadcast_rooms_and_topics(manager):
+    first, second, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    client = await manager.connect(first, rooms=['games'], topics=['news'])
+    await manager.connect(second, rooms=['games'])
+    await manager.connect(other, rooms=['music'], topics=['news'])
+
+    assert manager.broadcast('games', {'text': 'привет'}) == 2
+    assert manager.publish('news', {'text': 'новость'}) == 2
+    assert manager.broadcast('nobody', {'text': 'пусто'}) == 0
+    await asyncio.sleep(0.01)
+    assert first.sent == ['{"text": "привет"}', '{"text": "новость"}']
+    assert second.sent == ['{"text": "привет"}']
+    assert other.sent == ['{"text": "новость"}']
+    # всем клиентам уходит один и тот же объект строки
+    assert first.sent[0] is second.sent[0]
+
+    # после выхода из комнаты и отключения клиента пустые группы удаляются
+    manager.leave(client, 'games')
+    manager.disconnect(client)
+    assert manager.broadcast('games', {'text': 'еще'}) == 1
+    assert set(manager.topics['news']) == {c for c in manager.clients if c.ws is other}
+    assert manager.get_stats()['clients'] == 2
+
+# тестирование всплеска: рассылок за один проход цикла событий больше, чем SEND_QUEUE_SIZE,
+# но быстрые клиенты не отстают по времени и получают все сообщения
+@pytest.mark.asyncio
+async def test_burst_keeps_fast_clients(manager, monkeypatch):
+    monkeypatch.setattr(connection_manager, 'SEND_QUEUE_SIZE', 3)
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for ws in sockets:
+        await manager.connect(ws, rooms=['room'])
+    for i in range(20):
+        assert manager.broadcast('room', {'n': i}) == 3
+    await asyncio.sleep(0.01)
+    for ws in sockets:
+        assert [json.loads(text)['n'] for text in ws.sent] == list(range(20))
+    assert manager.get_stats()['slow_disconnects'] == 0
+
+# тестирование медленного клиента: отставший по времени клиент отключается, быстрый получает все сообщения
+@pytest.mark.asyncio
+async def test_slow_client_disconnected(manager, monkeypatch):
+    monkeypatch.setattr(connection_manager, 'SEND_QUEUE_SIZE', 3)
+    monkeypatch.setattr(connection_manager, 'SLOW_CLIENT_LAG', 0.05)
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    await manager.connect(fast, rooms=['room'])
+    await manager.connect(slow, rooms=['room'])
+
+    # медленный клиент застрял на первом сообщении, остальные копятся в его очереди
+    for i in range(5):
+        manager.broadcast('room', {'n': i})
+    await asyncio.sleep(0.1)
+    assert slow.closed_code is None
+    # очередь полна, самое старое сообщение ждет дольше SLOW_CLIENT_LAG - клиент отключается
+    for i in range(5, 8):
+        manager.broadcast('room', {'n': i})
+    await asyncio.sleep(0.01)
+    assert [json.loads(text)['n'] for text in fast.sent] == list(range(8))
+    assert slow.closed_code == connection_manager.SLOW_CLIENT_CLOSE_CODE
+    stats = manager.get_stats()
+    assert (stats['clients'], stats['slow_disconnects']) == (1, 1)
+
+# тестирование таймаута отправки: клиент, который долго не принимает сообщение, отключается
+@pytest.mark.asyncio
+async def test_send_timeout(manager, monkeypatch):
+    monkeypatch.setattr(connection_manager, 'SEND_TIMEOUT', 0.05)
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow, rooms=['room'])
+    manager.broadcast('room', {'n': 1})
+    await asyncio.sleep(0.2)
+    assert slow.closed_code == connection_manager.SLOW_CLIENT_CLOSE_CODE
+    assert manager.get_stats()['clients'] == 0
+
+# тестирование остановки: задачи отправки всех клиентов завершаются
+@pytest.mark.asyncio
+async def test_close_stops_writers(manager):
+    sockets = [FakeWebSocket(), FakeWebSocket(blocked=True)]
+    clients = [await manager.connect(ws, rooms=['room']) for ws in sockets]
+    manager.broadcast('room', {'n': 1})
+    await asyncio.sleep(0)
+    await asyncio.wait_for(manager.close(), 1)
+    assert all(client.writer.done() for client in clients)
+    assert manager.get_stats()['clients'] == 0
+
+# тестирование эндпоинтов: сообщение участника и рассылка сервера доходят до всех участников комнаты
+def test_room_endpoints():
+    with TestClient(main.app) as client:
+        with client.websocket_connect('/ws/rooms/chat?topics=news') as first, \
+                client.websocket_connect('/ws/rooms/chat') as second:
+            first.send_text('всем привет')
+            assert first.receive_json()['text'] == second.receive_json()['text'] == 'всем привет'
+
+            assert client.post('/ws/rooms/chat/broadcast', json={'text': 'от сервера'}).json() == {'clients': 2}
+            assert first.receive_json()['text'] == second.receive_json()['text'] == 'от сервера'
+
+            assert client.post('/ws/topics/news/publish', json={'text': 'новость'}).json() == {'clients': 1}
+            message = first.receive_json()
+            assert (message['topic'], message['text']) == ('news', 'новость')
+            assert client.get('/ws/manager/stats').json()['clients'] == 2
+
+# тестирование бинарного кадра в комнате: соединение закрывается с кодом 1003 и убирается из реестра
+def test_room_binary_frame_closes():
+    with TestClient(main.app) as client:
+        with client.websocket_connect('/ws/rooms/chat') as ws:
+            ws.send_bytes(b'\x00')
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                ws.receive_text()
+            assert exc_info.value.code == main.UNSUPPORTED_DATA_CLOSE_CODE
+        assert client.get('/ws/manager/stats').json()['clients'] == 0
\ No newline at end of file
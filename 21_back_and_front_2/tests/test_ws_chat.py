@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+# клиент чата с короткой задержкой ответа и обнуленными счетчиками
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'REPLY_DELAY', 0.01)
+    for name in main.ws_counters:
+        monkeypatch.setitem(main.ws_counters, name, 0)
+    with TestClient(main.app) as client:
+        yield client
+
+# ждем, пока обработчик соединения завершит работу после отключения клиента
+def wait_closed(client):
+    for _ in range(100):
+        stats = client.get('/ws/stats').json()
+        if stats['connections'] == 0:
+            return stats
+        time.sleep(0.01)
+    raise AssertionError('соединение не завершилось')
+
+# тестирование ответов: на каждое сообщение приходит ответ бота
+def test_reply(client):
+    with client.websocket_connect('/ws') as ws:
+        ws.send_text('Привет')
+        assert ws.receive_text() == 'Привет! Как твои дела?'
+        ws.send_text('как тебя зовут? имя')
+        assert ws.receive_text() == 'Меня зовут Ботти.'
+    stats = wait_closed(client)
+    assert (stats['received'], stats['replied'], stats['cancelled']) == (2, 2, 0)
+
+# тестирование политики 'drop': лишние сообщения отбрасываются, незавершенная работа отменяется при отключении
+def test_overflow_drop(client, monkeypatch):
+    monkeypatch.setattr(main, 'REPLY_DELAY', 10)
+    monkeypatch.setattr(main, 'MAX_PENDING_REPLIES', 1)
+    monkeypatch.setattr(main, 'INBOUND_QUEUE_SIZE', 2)
+    with client.websocket_connect('/ws') as ws:
+        for _ in range(10):
+            ws.send_text('привет')
+        # дожидаемся, пока сервер примет все сообщения
+        for _ in range(100):
+            if client.get('/ws/stats').json()['received'] == 10:
+                break
+            time.sleep(0.01)
+    stats = wait_closed(client)
+    # одно сообщение в работе, два в очереди - остальные отброшены
+    assert stats['dropped'] == 7
+    assert stats['cancelled'] == 3
+    assert stats['replied'] == 0
+
+# тестирование политики 'close': при переполнении очереди сервер закрывает соединение
+def test_overflow_close(client, monkeypatch):
+    monkeypatch.setattr(main, 'REPLY_DELAY', 10)
+    monkeypatch.setattr(main, 'MAX_PENDING_REPLIES', 1)
+    monkeypatch.setattr(main, 'INBOUND_QUEUE_SIZE', 2)
+    monkeypatch.setattr(main, 'OVERFLOW_POLICY', 'close')
+    with client.websocket_connect('/ws') as ws:
+        for _ in range(10):
+            ws.send_text('привет')
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+        assert exc_info.value.code == main.OVERFLOW_CLOSE_CODE
+    stats = wait_closed(client)
+    assert stats['closed_overflow'] == 1
+    assert stats['dropped'] == 0
+
+# тестирование бинарного кадра: сервер закрывает соединение с кодом 1003, а не падает с ошибкой
+def test_binary_frame_closes(client):
+    with client.websocket_connect('/ws') as ws:
+        ws.send_bytes(b'\x00\x01')
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+        assert exc_info.value.code == main.UNSUPPORTED_DATA_CLOSE_CODE
+    stats = wait_closed(client)
+    assert (stats['closed_unsupported'], stats['received']) == (1, 0)
\ No newline at end of file
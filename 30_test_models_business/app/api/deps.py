@@ -1,7 +1,5 @@
 from typing import Annotated
 
-import jwt
-from jwt.exceptions import InvalidTokenError
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -24,6 +22,10 @@ SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 # получаем текущего пользователя
 async def get_current_user(session: SessionDep, token: str = Depends(oauth2_scheme)) -> User:
+    # jwt импортируем при первом вызове, чтобы не замедлять импорт приложения
+    import jwt
+    from jwt.exceptions import InvalidTokenError
+
     credentials_exception = HTTPException(
         status_code = 401,
         detail = 'Не удалось подтвердить учетные данные',
@@ -41,6 +43,8 @@ async def get_current_user(session: SessionDep, token: str = Depends(oauth2_sche
     except (InvalidTokenError, ValidationError):
         raise credentials_exception
     
+    # is_active и is_superuser читаем из БД, а не из кэша: решение о доступе должно учитывать
+    # отключение пользователя или снятие прав сразу, а не после окончания TTL записи в кэше
     user = await get_user_by_username(session=session, username=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail='Пользователь не найден')
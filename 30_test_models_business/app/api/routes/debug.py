@@ -0,0 +1,101 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_superuser
+from app.core.cache import get_cache_stats
+from app.core.memory import memory_profiler, GroupBy
+from app.core.monitoring import loop_monitor
+from app.core.profiling import get_profile_path
+
+# служебные эндпоинты для диагностики производительности (только для админа)
+router = APIRouter(
+    prefix='/debug',
+    tags=['debug'],
+    dependencies=[Depends(get_current_superuser)]
+)
+
+# гистограмма задержек event loop и количество обнаруженных блокировок
+@router.get('/loop-lag')
+async def get_loop_lag():
+    return loop_monitor.stats()
+
+# доля попаданий по уровням для каждого кэша и статистика рассылки инвалидаций
+@router.get('/cache')
+async def get_cache():
+    return get_cache_stats()
+
+# результат профилирования запроса по ID из заголовка X-Profile-Id:
+# - kind=collapsed - свернутые стеки для построения flamegraph
+# - kind=txt - таблица самых тяжелых функций из cProfile
+@router.get('/profiles/{profile_id}', response_class=PlainTextResponse)
+async def get_profile(profile_id: str, kind: str = 'collapsed'):
+    if kind not in ('collapsed', 'txt') or not profile_id.isalnum():
+        raise HTTPException(status_code=400, detail='Некорректный запрос профиля')
+    path = get_profile_path(profile_id, kind)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail='Профиль не найден')
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+# проверяем, что снимок с таким именем существует
+def get_snapshot_name_or_404(name: str) -> str:
+    if name not in memory_profiler.snapshots:
+        raise HTTPException(status_code=404, detail=f'Снимок {name} не найден')
+    return name
+
+# состояние памяти процесса: RSS, счетчики поколений GC, статус tracemalloc
+@router.get('/memory')
+async def get_memory_stats():
+    return memory_profiler.stats()
+
+# запускаем tracemalloc
+@router.post('/memory/start')
+async def start_memory_tracing(frames: int = Query(default=1, ge=1, le=50)):
+    memory_profiler.start(frames=frames)
+    return memory_profiler.stats()
+
+# останавливаем tracemalloc и удаляем все снимки
+@router.post('/memory/stop')
+async def stop_memory_tracing():
+    memory_profiler.stop()
+    return memory_profiler.stats()
+
+# делаем именованный снимок памяти
+@router.post('/memory/snapshots/{name}')
+async def take_memory_snapshot(name: str):
+    try:
+        memory_profiler.take_snapshot(name)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {'message': f'Снимок {name} сохранен'}
+
+# самые крупные места выделения памяти в снимке
+# group_by задан через Literal: значение сверяется целиком, а не ищется внутри строки, как pattern
+@router.get('/memory/snapshots/{name}')
+async def get_memory_snapshot_top(
+    name: str,
+    group_by: GroupBy = 'lineno',
+    limit: int = Query(default=20, ge=1, le=500)
+):
+    get_snapshot_name_or_404(name)
+    return memory_profiler.top(name, group_by=group_by, limit=limit)
+
+# удаляем снимок
+@router.delete('/memory/snapshots/{name}')
+async def delete_memory_snapshot(name: str):
+    memory_profiler.delete_snapshot(get_snapshot_name_or_404(name))
+    return {'message': f'Снимок {name} удален'}
+
+# разница между двумя снимками
+@router.get('/memory/diff')
+async def get_memory_diff(
+    old: str,
+    new: str,
+    group_by: GroupBy = 'lineno',
+    limit: int = Query(default=20, ge=1, le=500)
+):
+    get_snapshot_name_or_404(old)
+    get_snapshot_name_or_404(new)
+    return memory_profiler.diff(old, new, group_by=group_by, limit=limit)
\ No newline at end of file
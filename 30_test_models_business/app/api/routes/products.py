@@ -4,6 +4,7 @@ from app.api.deps import SessionDep
 from app.models.products import ProductOut, ProductCreate, ProductUpdate
 from app.repositories.products import (
     get_product_by_id, 
+    get_product_cached,
     create_product as create_product_repo,
     update_product as update_product_repo
 )
@@ -13,7 +14,7 @@ router = APIRouter(prefix='/products', tags=['products'])
 # получаем продукт по ID
 @router.get('/{product_id}', response_model=ProductOut)
 async def get_product(session: SessionDep, product_id: int):
-    product = await get_product_by_id(session=session, product_id=product_id)
+    product = await get_product_cached(session=session, product_id=product_id)
     if not product:
         raise HTTPException(status_code=404, detail='Продукт не найден')
     return product
@@ -12,6 +12,7 @@ from app.repositories.users import (
     update_user as update_user_repo,
     delete_user as delete_user_repo,
     get_user_by_username,
+    get_user_by_username_cached,
     get_user_by_id,
     get_users
 )
@@ -26,9 +27,10 @@ async def get_user_me(current_user: CurrentUserDep):
 # получить пользователя по username - модифицируем:
 # - Если простой пользователь запрашивает информацию о себе - все окей
 # - Если простой пользователь запрашивает информацию о другом пользователе - только для админа
+# профиль берется из кэша, права текущего пользователя - из БД (см. get_current_user)
 @router.get('/{username}', response_model=UserOut)
 async def get_user(session: SessionDep, username: str, current_user: CurrentUserDep):
-    user = await get_user_by_username(session=session, username=username)
+    user = await get_user_by_username_cached(session=session, username=username)
     if not user:
         raise HTTPException(
             status_code=404,
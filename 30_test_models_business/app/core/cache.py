@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from time import monotonic, time
+
+from loguru import logger
+
+# общая папка кэша для всех воркеров, запущенных из одной папки проекта
+CACHE_DIR = os.path.join(
+    tempfile.gettempdir(),
+    'fastapi-cache-' + hashlib.sha1(os.getcwd().encode()).hexdigest()[:8]
+)
+# файл SQLite с общим кэшем второго уровня
+CACHE_L2_PATH = os.path.join(CACHE_DIR, 'l2.db')
+# папка с Unix-сокетами воркеров для рассылки инвалидаций
+CACHE_BUS_DIR = os.path.join(CACHE_DIR, 'bus')
+# размер кэша первого уровня (записей в каждом кэше)
+CACHE_L1_MAXSIZE = 1024
+# время жизни записей в секундах (страховка на случай потерянной инвалидации)
+CACHE_TTL = 60
+
+# счетчики попаданий и промахов для одного уровня кэша
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+# кэш первого уровня: LRU в памяти процесса
+# блокировка нужна, т.к. инвалидации приходят из потока-слушателя
+# у каждого ключа есть версия, которая растет при удалении: set с версией, прочитанной до удаления,
+# не выполняется - иначе запрос, прочитавший строку до изменения, вернул бы ее в кэш после инвалидации
+# (версии хранятся только для удалявшихся ключей, т.е. их не больше, чем измененных записей)
+class LRUCache:
+    def __init__(self, maxsize: int = CACHE_L1_MAXSIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < monotonic():
+                self._data.pop(key, None)
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return item[1]
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    # version - версия ключа, прочитанная до получения значения (None - без проверки)
+    # ttl - время жизни записи, если оно меньше обычного; возвращает False, если запись не сохранена
+    def set(self, key: str, value, version: int | None = None, ttl: float | None = None) -> bool:
+        with self._lock:
+            if version is not None and self._versions.get(key, 0) != version:
+                return False
+            self._data[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# кэш второго уровня: таблица в файле SQLite, общая для всех воркеров на машине
+# значения хранятся в JSON, поэтому кэшировать можно только JSON-совместимые данные
+# поколение ключа (таблица generations) растет при удалении - как версия в LRUCache, но общее для воркеров:
+# запись с поколением, прочитанным до удаления, не выполняется
+class SQLiteCache:
+    def __init__(self, path: str = CACHE_L2_PATH, ttl: float = CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._conn_: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    # соединение открываем при первом обращении, чтобы импорт приложения не создавал файлов
+    # одно соединение на процесс, обращения к нему защищаем блокировкой
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._conn_ is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS generations ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, generation INTEGER NOT NULL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+            self._conn_ = conn
+        return self._conn_
+
+    # значение и время его истечения (time()) или None
+    def get(self, namespace: str, key: str) -> tuple[object, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?',
+                (namespace, key, time())
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def generation(self, namespace: str, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT generation FROM generations WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    # generation - поколение ключа, прочитанное до получения значения (None - без проверки)
+    # проверка и запись - один оператор, поэтому удаление из другого воркера не может вклиниться между ними
+    def set(self, namespace: str, key: str, value, generation: int | None = None) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) SELECT ?, ?, ?, ? '
+                'WHERE ? IS NULL OR COALESCE((SELECT generation FROM generations WHERE namespace = ? AND key = ?), 0) = ?',
+                (namespace, key, json.dumps(value), time() + self.ttl, generation, namespace, key, generation)
+            )
+        return cursor.rowcount == 1
+
+    # сначала увеличиваем поколение, потом удаляем: запись, успевшая между ними, будет удалена,
+    # а все последующие записи со старым поколением не выполнятся
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO generations (namespace, key, generation) VALUES (?, ?, 1) '
+                'ON CONFLICT (namespace, key) DO UPDATE SET generation = generation + 1',
+                (namespace, key)
+            )
+            self._conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key))
+
+    # удаляем просроченные записи (можно вызывать периодически или при старте)
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time(),))
+
+    def close(self):
+        if self._conn_ is not None:
+            self._conn_.close()
+            self._conn_ = None
+
+# рассылка инвалидаций между воркерами через Unix-сокеты (датаграммы):
+# каждый воркер слушает свой сокет в общей папке, а при изменении данных
+# отправляет сообщение во все остальные сокеты этой папки
+class InvalidationBus:
+    def __init__(self, directory: str = CACHE_BUS_DIR, name: str | None = None):
+        self.directory = directory
+        self.name = name or str(os.getpid())
+        self.path = os.path.join(directory, f'{self.name}.sock')
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self._handlers = {}
+        self._sock: socket.socket | None = None
+        self._send_sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+
+    # регистрируем обработчик инвалидаций для пространства имен (имени кэша)
+    def subscribe(self, namespace: str, handler):
+        self._handlers[namespace] = handler
+
+    @property
+    def enabled(self) -> bool:
+        return self._sock is not None
+
+    # начинаем слушать свой сокет (на системах без Unix-сокетов рассылка отключена)
+    def start(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            logger.warning('Unix-сокеты недоступны, инвалидации кэша не рассылаются между воркерами')
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        # отправляем через отдельный неблокирующий сокет: если очередь получателя переполнена,
+        # сообщение теряется, а запись в его кэше доживет до окончания TTL
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.setblocking(False)
+        self._thread = threading.Thread(target=self._listen, args=(self._sock,), name='cache-invalidation', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._sock is None:
+            return
+        sock, self._sock = self._sock, None
+        # будим поток-слушатель пустым сообщением, чтобы он завершился
+        try:
+            self._send_sock.sendto(b'', self.path)
+        except OSError:
+            pass
+        if self._thread:
+            self._thread.join(timeout=1)
+        sock.close()
+        self._send_sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    # отправляем инвалидацию всем остальным воркерам
+    def publish(self, namespace: str, key: str):
+        if self._sock is None:
+            return
+        message = json.dumps({'namespace': namespace, 'key': key}).encode()
+        for file_name in os.listdir(self.directory):
+            path = os.path.join(self.directory, file_name)
+            if path == self.path or not file_name.endswith('.sock'):
+                continue
+            try:
+                self._send_sock.sendto(message, path)
+                self.sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # воркер завершился и не убрал за собой сокет
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as exc:
+                logger.warning(f'Не удалось отправить инвалидацию в {path}: {exc}')
+
+    def _listen(self, sock: socket.socket):
+        while self._sock is not None:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return
+            if not data:
+                continue
+            # испорченное сообщение пропускаем: если поток-слушатель упадет, инвалидации перестанут доходить
+            try:
+                message = json.loads(data)
+                namespace, key = message['namespace'], message['key']
+            except (ValueError, TypeError, KeyError) as exc:
+                self.dropped += 1
+                logger.warning(f'Пропущено некорректное сообщение инвалидации {data[:100]!r}: {exc!r}')
+                continue
+            handler = self._handlers.get(namespace)
+            if handler:
+                self.received += 1
+                handler(key)
+
+# двухуровневый кэш: L1 в памяти процесса, L2 общий для воркеров, инвалидации рассылаются через шину
+# обращения к L2 (sqlite3, блокирующий ввод-вывод) выполняются в пуле потоков, чтобы не блокировать event loop;
+# попадание в L1 обслуживается сразу, без перехода в поток
+# cache-aside без гонок с инвалидацией: при промахе берем version(key) до чтения из базы и передаем его в set;
+# если за это время запись была инвалидирована, set ничего не сохраняет
+class TwoLevelCache:
+    def __init__(
+        self,
+        name: str,
+        l2: SQLiteCache | None,
+        bus: InvalidationBus | None,
+        maxsize: int = CACHE_L1_MAXSIZE,
+        ttl: float = CACHE_TTL,
+    ):
+        self.name = name
+        self.l1 = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.l2 = l2
+        # L2 общий для нескольких кэшей, поэтому его попадания считаем здесь, отдельно по каждому кэшу
+        self.l2_stats = CacheStats()
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe(name, self.l1.delete)
+
+    async def get(self, key):
+        key = str(key)
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+        version = self.l1.version(key)
+        item = await asyncio.to_thread(self.l2.get, self.name, key)
+        if item is None:
+            self.l2_stats.misses += 1
+            return None
+        self.l2_stats.hits += 1
+        value, expires_at = item
+        # в L1 запись живет не дольше, чем в L2, иначе каждое попадание в L2 продлевало бы ее на полный TTL
+        self.l1.set(key, value, version, ttl=expires_at - time())
+        return value
+
+    # версия записи для set: (версия в L1, поколение в L2)
+    async def version(self, key) -> tuple[int, int | None]:
+        key = str(key)
+        local = self.l1.version(key)
+        if self.l2 is None:
+            return local, None
+        return local, await asyncio.to_thread(self.l2.generation, self.name, key)
+
+    # version - результат version(key), полученный до чтения значения из базы (None - сохранить без проверки)
+    # сначала пишем в L2: если запись там отклонена, в L1 она тоже не попадет
+    async def set(self, key, value, version: tuple[int, int | None] | None = None) -> bool:
+        key = str(key)
+        local, generation = version if version is not None else (None, None)
+        if self.l2 is not None and not await asyncio.to_thread(self.l2.set, self.name, key, value, generation):
+            return False
+        return self.l1.set(key, value, local)
+
+    # удаляем запись на всех уровнях и сообщаем остальным воркерам
+    async def invalidate(self, key):
+        key = str(key)
+        self.l1.delete(key)
+        if self.l2 is not None:
+            await asyncio.to_thread(self.l2.delete, self.name, key)
+        if self.bus is not None:
+            self.bus.publish(self.name, key)
+
+    def stats(self) -> dict:
+        return {
+            'l1': {**self.l1.stats.as_dict(), 'size': len(self.l1)},
+            'l2': self.l2_stats.as_dict() if self.l2 is not None else None,
+        }
+
+# общие для приложения L2-хранилище, шина и кэши
+cache_l2 = SQLiteCache()
+cache_bus = InvalidationBus()
+product_cache = TwoLevelCache('products', l2=cache_l2, bus=cache_bus)
+user_cache = TwoLevelCache('users', l2=cache_l2, bus=cache_bus)
+caches = {cache.name: cache for cache in (product_cache, user_cache)}
+
+# статистика всех кэшей по уровням
+def get_cache_stats() -> dict:
+    return {
+        'caches': {name: cache.stats() for name, cache in caches.items()},
+        'bus': {
+            'enabled': cache_bus.enabled,
+            'sent': cache_bus.sent,
+            'received': cache_bus.received,
+            'dropped': cache_bus.dropped,
+        },
+    }
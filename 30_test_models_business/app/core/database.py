@@ -5,6 +5,9 @@ DATABASE_ASYNC = 'sqlite+aiosqlite:///./products.db'
 # синхронное подключение для работы с alembic
 DATABASE_SYNC = 'sqlite:///./products.db'
 
+# сколько соединений пула открыть заранее при старте приложения
+POOL_WARMUP_CONNECTIONS = 5
+
 # асинхронный движок для работы с БД
 engine = create_async_engine(url=DATABASE_ASYNC, echo=False)
 # фабрика асинхронных сессий
@@ -0,0 +1,108 @@
+import gc
+import tracemalloc
+from typing import Literal
+
+# сколько кадров стека сохранять для каждого выделения памяти
+TRACEMALLOC_FRAMES = 1
+# сколько снимков можно хранить одновременно (каждый снимок занимает память)
+MAX_SNAPSHOTS = 10
+
+# группировки статистики, которые поддерживает tracemalloc
+GroupBy = Literal['lineno', 'filename', 'traceback']
+
+# профилировщик памяти на основе tracemalloc: именованные снимки и их сравнение
+class MemoryProfiler:
+    def __init__(self):
+        self.snapshots: dict[str, tracemalloc.Snapshot] = {}
+
+    # запускаем отслеживание выделений памяти
+    def start(self, frames: int = TRACEMALLOC_FRAMES):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    # останавливаем отслеживание, снимки при этом тоже удаляются
+    def stop(self):
+        tracemalloc.stop()
+        self.snapshots.clear()
+
+    # делаем именованный снимок, игнорируя выделения внутри самого tracemalloc
+    def take_snapshot(self, name: str):
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc не запущен')
+        if name not in self.snapshots and len(self.snapshots) >= MAX_SNAPSHOTS:
+            raise RuntimeError(f'Нельзя хранить больше {MAX_SNAPSHOTS} снимков')
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        self.snapshots[name] = snapshot
+
+    # удаляем снимок
+    def delete_snapshot(self, name: str):
+        self.snapshots.pop(name)
+
+    # самые крупные места выделения памяти в снимке
+    def top(self, name: str, group_by: GroupBy = 'lineno', limit: int = 20) -> list[dict]:
+        stats = self.snapshots[name].statistics(group_by)
+        return [
+            {
+                'location': format_traceback(stat.traceback),
+                'size_kb': round(stat.size / 1024, 1),
+                'count': stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+    # разница между двумя снимками: где память выросла сильнее всего
+    def diff(self, old: str, new: str, group_by: GroupBy = 'lineno', limit: int = 20) -> list[dict]:
+        stats = self.snapshots[new].compare_to(self.snapshots[old], group_by)
+        return [
+            {
+                'location': format_traceback(stat.traceback),
+                'size_kb': round(stat.size / 1024, 1),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count': stat.count,
+                'count_diff': stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    # общее состояние памяти процесса
+    def stats(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            'rss_kb': get_rss_kb(),
+            'max_rss_kb': get_max_rss_kb(),
+            'gc_counts': gc.get_count(),
+            'gc_thresholds': gc.get_threshold(),
+            'tracing': tracemalloc.is_tracing(),
+            'traced_current_kb': round(current / 1024, 1),
+            'traced_peak_kb': round(peak / 1024, 1),
+            'snapshots': list(self.snapshots),
+        }
+
+# место выделения памяти в виде "файл:строка" (для traceback - цепочка через " <- ")
+def format_traceback(traceback: tracemalloc.Traceback) -> str:
+    return ' <- '.join(f'{frame.filename}:{frame.lineno}' for frame in traceback)
+
+# текущий размер резидентной памяти процесса (в Linux читаем из /proc)
+def get_rss_kb() -> int | None:
+    try:
+        with open('/proc/self/status', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+# пиковый размер резидентной памяти процесса (модуль resource есть только в Unix)
+def get_max_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# общий профилировщик памяти на все приложение
+memory_profiler = MemoryProfiler()
\ No newline at end of file
@@ -2,8 +2,15 @@ from time import perf_counter
 from fastapi import FastAPI, Request
 from loguru import logger
 
+from app.core.monitoring import RouteTrackingMiddleware
+from app.core.profiling import ProfilingMiddleware
+
 # функция-обертка для запуска middleware
 def setup_middleware(app: FastAPI):
+    # запоминаем маршрут текущего запроса для сторожа event loop
+    # добавляем первым, чтобы middleware оказалось самым внутренним
+    app.add_middleware(RouteTrackingMiddleware)
+
     # создаем middleware для добавления времени выполнения запроса в заголовок ответа
     @app.middleware('http')
     async def add_process_time_header(request: Request, call_next):
@@ -13,4 +20,8 @@ def setup_middleware(app: FastAPI):
         process_time = (perf_counter() - start_time) * 1000
         logger.info(f'{request.method} {request.url.path} выполнялся {process_time:.2f} мс')
         response.headers['X-Process-Time-ms'] = f'{process_time:.2f}'
-        return response
\ No newline at end of file
+        return response
+
+    # профилирование запросов с заголовком X-Profile (только для суперпользователя)
+    # добавляем последним, чтобы middleware было самым внешним и охватывало весь запрос
+    app.add_middleware(ProfilingMiddleware)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import asyncio
+import sys
+import threading
+import traceback
+from bisect import bisect_left
+from time import perf_counter
+
+from loguru import logger
+
+# как часто (в секундах) event loop отмечается в мониторе
+LOOP_LAG_INTERVAL = 0.05
+# после скольких миллисекунд блокировки event loop считается "зависшим"
+LOOP_LAG_THRESHOLD_MS = 200
+# границы корзин гистограммы задержек в миллисекундах (последняя корзина - все, что больше)
+LOOP_LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# маршруты, которые сейчас обрабатываются, в виде {задача asyncio: 'METHOD /path'}
+# заполняется middleware, читается потоком-сторожем, чтобы понять, чей код заблокировал loop
+active_routes: dict[asyncio.Task, str] = {}
+
+# гистограмма задержек планирования event loop
+class LagHistogram:
+    def __init__(self, buckets_ms: tuple[float, ...] = LOOP_LAG_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self.sum_ms = 0.0
+
+    # учитываем одно измерение задержки
+    def observe(self, lag_ms: float):
+        self.counts[bisect_left(self.buckets_ms, lag_ms)] += 1
+        self.total += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    # представление гистограммы для отдачи по API
+    def as_dict(self) -> dict:
+        labels = [f'<={bound}' for bound in self.buckets_ms] + [f'>{self.buckets_ms[-1]}']
+        return {
+            'buckets_ms': dict(zip(labels, self.counts)),
+            'count': self.total,
+            'avg_ms': round(self.sum_ms / self.total, 3) if self.total else 0.0,
+            'max_ms': round(self.max_ms, 3),
+        }
+
+# получаем стек потока с event loop в виде списка строк
+def format_thread_stack(thread_id: int) -> list[str]:
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    return traceback.format_stack(frame)
+
+# сторож event loop:
+# - корутина внутри loop раз в interval отмечает "сердцебиение" и считает задержку пробуждения
+# - отдельный поток следит за сердцебиением и, если loop молчит дольше порога,
+#   снимает стек потока с loop и пишет в лог вместе с маршрутом, который сейчас выполняется
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+    ):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.histogram = LagHistogram()
+        self.stalls = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat = perf_counter()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    # запускаем монитор, вызывается внутри работающего event loop (например, в lifespan)
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    # останавливаем монитор и дожидаемся завершения потока-сторожа
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    # корутина-измеритель: засыпаем на interval и смотрим, насколько позже нас разбудили
+    async def _measure(self):
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(self.interval)
+            now = perf_counter()
+            self._heartbeat = now
+            lag_ms = max(0.0, (now - start - self.interval) * 1000)
+            self.histogram.observe(lag_ms)
+
+    # поток-сторож: работает вне event loop, поэтому может заметить, что loop заблокирован
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_ms = (perf_counter() - heartbeat) * 1000
+            # о каждой блокировке сообщаем один раз
+            if blocked_ms < self.threshold_ms or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            self.stalls += 1
+            self._report_stall(blocked_ms)
+
+    # пишем в лог стек и маршрут, который держит event loop
+    def _report_stall(self, blocked_ms: float):
+        route = 'вне запроса'
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            route = active_routes.get(task, route)
+        stack = ''.join(format_thread_stack(self._loop_thread_id))
+        logger.warning(
+            f'Event loop заблокирован уже {blocked_ms:.0f} мс, маршрут: {route}\n{stack}'
+        )
+
+    # сводка для отдачи по API
+    def stats(self) -> dict:
+        return {
+            'interval_ms': self.interval * 1000,
+            'threshold_ms': self.threshold_ms,
+            'stalls': self.stalls,
+            'lag': self.histogram.as_dict(),
+        }
+
+# ASGI-middleware, запоминающее маршрут для задачи, в которой выполняется запрос
+# подключается самым внутренним, чтобы задача совпадала с задачей обработчика эндпоинта
+class RouteTrackingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        active_routes[task] = f"{scope['method']} {scope['path']}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active_routes.pop(task, None)
+
+# общий монитор на все приложение
+loop_monitor = LoopLagMonitor()
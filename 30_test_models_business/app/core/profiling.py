@@ -0,0 +1,184 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+
+from fastapi import HTTPException
+from loguru import logger
+
+from app.core.database import AsyncSessionLocal
+
+# заголовок запроса, включающий профилирование (нужен также токен суперпользователя)
+PROFILE_HEADER = b'x-profile'
+# папка для сохранения результатов профилирования
+PROFILES_DIR = os.path.join('logs', 'profiles')
+# интервал между снимками стека в семплирующем профилировщике (в секундах)
+PROFILE_SAMPLE_INTERVAL = 0.001
+# сколько самых тяжелых функций попадает в таблицу
+PROFILE_TOP_N = 30
+# сколько секунд профилируемый запрос ждет завершения уже начатых запросов
+PROFILE_DRAIN_TIMEOUT = 5.0
+
+# семплирующий профилировщик: отдельный поток периодически снимает стек потока с event loop
+# и копит "свернутые" стеки (формат collapsed stacks для flamegraph.pl / speedscope)
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+
+    # результат в формате "корень;...;лист <количество>" - по строке на стек
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+# сворачиваем стек в одну строку от корня к листу
+def collapse_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+# таблица top-N функций по накопленному времени из cProfile
+def format_top_functions(profiler, limit: int = PROFILE_TOP_N) -> str:
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
+
+# путь до файла с результатом профилирования
+def get_profile_path(profile_id: str, kind: str) -> str:
+    return os.path.join(PROFILES_DIR, f'{profile_id}.{kind}')
+
+# проверяем, что заголовок Authorization содержит токен активного суперпользователя
+async def is_superuser_token(authorization: str) -> bool:
+    # импортируем здесь, чтобы не создавать циклический импорт app.api -> app.core
+    from app.api.deps import get_current_user
+
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    async with AsyncSessionLocal() as session:
+        try:
+            user = await get_current_user(session=session, token=token)
+        except HTTPException:
+            return False
+    return user.is_superuser
+
+# ASGI-middleware для профилирования отдельных запросов по заголовку X-Profile
+# cProfile и снимки стека видят весь поток с event loop, т.е. все запросы, которые выполняются одновременно
+# с профилируемым; чтобы профиль относился только к одному запросу, на время профилирования
+# новые HTTP-запросы ждут у входа, а профилирование начинается после завершения уже начатых
+# (если они не успели завершиться за PROFILE_DRAIN_TIMEOUT, в ответе будет X-Profile-Status: concurrent)
+# без активного профилирования запросы без заголовка проходят с одной проверкой и счетчиком
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # cProfile может работать только один в потоке, поэтому профилируем по одному запросу
+        self._lock = asyncio.Lock()
+        # открыт, пока никто не профилируется
+        self._gate = asyncio.Event()
+        self._gate.set()
+        # выполняющиеся сейчас обычные запросы
+        self._in_flight = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope['headers'])
+        if PROFILE_HEADER not in headers:
+            await self._pass(scope, receive, send)
+            return
+        authorization = headers.get(b'authorization', b'').decode('latin-1')
+        if not await is_superuser_token(authorization):
+            await self._pass(scope, receive, send)
+            return
+        if self._lock.locked():
+            await self._pass(scope, receive, send_with_headers(send, {'X-Profile-Status': 'busy'}))
+            return
+        async with self._lock:
+            self._gate.clear()
+            try:
+                await self._profile(scope, receive, send)
+            finally:
+                self._gate.set()
+
+    # обычный запрос: ждем окончания профилирования и учитываем запрос в счетчике
+    async def _pass(self, scope, receive, send):
+        if not self._gate.is_set():
+            await self._gate.wait()
+        self._in_flight += 1
+        self._drained.clear()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._drained.set()
+
+    # выполняем запрос под cProfile и семплирующим профилировщиком одновременно
+    async def _profile(self, scope, receive, send):
+        # cProfile и pstats импортируем только при профилировании, чтобы не замедлять импорт приложения
+        import cProfile
+
+        profile_id = uuid.uuid4().hex
+        response_headers = {'X-Profile-Id': profile_id}
+        try:
+            await asyncio.wait_for(self._drained.wait(), PROFILE_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            response_headers['X-Profile-Status'] = 'concurrent'
+        sampler = StackSampler(thread_id=threading.get_ident())
+        profiler = cProfile.Profile()
+        sampler.start()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_headers(send, response_headers))
+        finally:
+            profiler.disable()
+            sampler.stop()
+            # форматирование и запись файлов - в отдельном потоке, чтобы не блокировать event loop
+            await asyncio.to_thread(save_profile, profile_id, sampler, profiler)
+            logger.info(f"Профиль запроса {scope['method']} {scope['path']} сохранен: {profile_id}")
+
+# сохраняем свернутые стеки и таблицу функций в PROFILES_DIR
+def save_profile(profile_id: str, sampler: StackSampler, profiler):
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    with open(get_profile_path(profile_id, 'collapsed'), 'w', encoding='utf-8') as file:
+        file.write(sampler.collapsed())
+    with open(get_profile_path(profile_id, 'txt'), 'w', encoding='utf-8') as file:
+        file.write(format_top_functions(profiler))
+
+# обертка над send, добавляющая заголовки в начало ответа
+def send_with_headers(send, extra_headers: dict[str, str]):
+    async def wrapped_send(message):
+        if message['type'] == 'http.response.start':
+            message['headers'] = list(message.get('headers', [])) + [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in extra_headers.items()
+            ]
+        await send(message)
+    return wrapped_send
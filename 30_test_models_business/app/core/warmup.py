@@ -0,0 +1,45 @@
+import asyncio
+from time import perf_counter
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import configure_mappers
+
+from app.core.security import get_password_hash, verify_password
+
+# валидаторы и сериализаторы тел запросов и ответов FastAPI строит сам при регистрации маршрутов
+# (TypeAdapter внутри ModelField), а OpenAPI-схема собирается только при первом запросе /openapi.json -
+# строим ее заранее
+def warmup_openapi(app: FastAPI):
+    app.openapi()
+
+# открываем нужное количество соединений пула одновременно и проверяем каждое запросом SELECT 1,
+# после выхода из контекста соединения возвращаются в пул и переиспользуются запросами
+async def warmup_pool(engine: AsyncEngine, connections: int):
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+# хэширование пароля (argon2) при первом вызове загружает библиотеку и выделяет память,
+# делаем это заранее в пуле потоков, заодно запуская сам пул потоков
+def warmup_password_hash():
+    verify_password('warmup-password', get_password_hash('warmup-password'))
+
+# модули, которые приложение импортирует лениво (при первом использовании),
+# при прогреве загружаем их заранее, чтобы не платить за импорт в первом запросе
+def warmup_lazy_imports():
+    import jwt  # noqa: F401
+
+# прогрев всего приложения перед приемом запросов
+async def warmup_app(app: FastAPI, engine: AsyncEngine, pool_connections: int):
+    start_time = perf_counter()
+    warmup_openapi(app)
+    configure_mappers()
+    warmup_lazy_imports()
+    await warmup_pool(engine, pool_connections)
+    await run_in_threadpool(warmup_password_hash)
+    logger.info(f'Прогрев приложения занял {(perf_counter() - start_time) * 1000:.2f} мс')
\ No newline at end of file
@@ -1,15 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from app.api.routes import products, users, login
+from app.api.routes import products, users, login, debug
+from app.core.cache import cache_bus, cache_l2
+from app.core.database import engine, POOL_WARMUP_CONNECTIONS
 from app.core.logging import setup_logging
 from app.core.middleware import setup_middleware
+from app.core.monitoring import loop_monitor
+from app.core.warmup import warmup_app
 
-setup_logging()
+# фабрика приложения:
+# - warmup=True - при старте заранее строим OpenAPI-схему, настраиваем мапперы SQLAlchemy,
+#   открываем соединения пула и инициализируем argon2, чтобы первые запросы не были медленными
+def create_app(warmup: bool = True) -> FastAPI:
+    # при старте настраиваем логирование, прогреваем приложение, запускаем сторож event loop
+    # и шину инвалидаций кэша, при завершении все останавливаем и закрываем соединения с БД
+    # (логирование настраиваем здесь, а не при импорте, чтобы импорт не создавал папки и файлы)
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        setup_logging()
+        if warmup:
+            await warmup_app(app, engine, POOL_WARMUP_CONNECTIONS)
+        loop_monitor.start()
+        cache_bus.start()
+        try:
+            yield
+        finally:
+            cache_bus.stop()
+            cache_l2.close()
+            await loop_monitor.stop()
+            await engine.dispose()
 
-app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
-app.include_router(products.router)
-app.include_router(users.router)
-app.include_router(login.router)
- 
-setup_middleware(app)
\ No newline at end of file
+    app.include_router(products.router)
+    app.include_router(users.router)
+    app.include_router(login.router)
+    app.include_router(debug.router)
+
+    setup_middleware(app)
+    return app
+
+# объект приложения для запуска через uvicorn app.main:app
+# (или через фабрику: uvicorn app.main:create_app --factory)
+app = create_app()
\ No newline at end of file
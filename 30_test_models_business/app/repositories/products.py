@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.products import Product, ProductCreate, ProductUpdate
+from app.core.cache import product_cache
+from app.models.products import Product, ProductCreate, ProductUpdate, ProductOut
 
 # создание нового продукта
 async def create_product(session: AsyncSession, product_create: ProductCreate) -> Product:
@@ -17,8 +18,23 @@ async def update_product(session: AsyncSession, product_db: Product, product_upd
         setattr(product_db, key, value)
     session.add(product_db)
     await session.commit()
+    # сбрасываем кэш продукта во всех воркерах
+    await product_cache.invalidate(product_db.id)
     return product_db
 
 # получение продукта по ID
 async def get_product_by_id(session: AsyncSession, product_id: int) -> Product | None:
-    return await session.get(Product, product_id)
\ No newline at end of file
+    return await session.get(Product, product_id)
+
+# получение продукта по ID для ответа по API через двухуровневый кэш
+async def get_product_cached(session: AsyncSession, product_id: int) -> dict | None:
+    product_data = await product_cache.get(product_id)
+    if product_data is None:
+        # версию берем до запроса к базе: если продукт изменится, пока мы его читаем, старые данные не попадут в кэш
+        version = await product_cache.version(product_id)
+        product = await get_product_by_id(session=session, product_id=product_id)
+        if not product:
+            return None
+        product_data = ProductOut.model_validate(product).model_dump()
+        await product_cache.set(product_id, product_data, version)
+    return product_data
\ No newline at end of file
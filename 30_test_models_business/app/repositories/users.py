@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.cache import user_cache
 from app.core.security import get_password_hash, verify_password
 from app.models.users import User, UserCreate, UserUpdate
 
+# поля пользователя, которые хранятся в кэше (хэш пароля в кэш не попадает)
+USER_CACHE_COLUMNS = ('id', 'username', 'full_name', 'is_active', 'is_superuser')
+
 # регистрация нового пользователя
 async def create_user(session: AsyncSession, user_create: UserCreate) -> User:
     user_data = user_create.model_dump(exclude={'password'})
@@ -18,6 +22,7 @@ async def create_user(session: AsyncSession, user_create: UserCreate) -> User:
 # обновление данных пользователя
 async def update_user(session: AsyncSession, user_db: User, user_update: UserUpdate) -> User:
     user_data = user_update.model_dump(exclude_unset=True)
+    old_username = user_db.username
     if 'password' in user_data:
         new_password = user_data.pop('password')
         user_db.hashed_password = get_password_hash(new_password)
@@ -25,6 +30,9 @@ async def update_user(session: AsyncSession, user_db: User, user_update: UserUpd
         setattr(user_db, key, value)
     session.add(user_db)
     await session.commit()
+    # сбрасываем кэш пользователя во всех воркерах (в том числе по старому username)
+    await user_cache.invalidate(old_username)
+    await user_cache.invalidate(user_db.username)
     return user_db
     
 # получение пользователя по username
@@ -34,6 +42,21 @@ async def get_user_by_username(session: AsyncSession, username: str) -> User | N
     user = result.scalar_one_or_none()
     return user
 
+# получение пользователя по username через двухуровневый кэш (для просмотра профиля)
+# возвращается объект User, не привязанный к сессии и без хэша пароля - только для чтения
+# для проверки прав кэш не используется: инвалидация между воркерами может потеряться,
+# и отключенный или лишенный прав пользователь сохранил бы доступ до окончания TTL
+async def get_user_by_username_cached(session: AsyncSession, username: str) -> User | None:
+    user_data = await user_cache.get(username)
+    if user_data is None:
+        version = await user_cache.version(username)
+        user_db = await get_user_by_username(session=session, username=username)
+        if not user_db:
+            return None
+        user_data = {column: getattr(user_db, column) for column in USER_CACHE_COLUMNS}
+        await user_cache.set(username, user_data, version)
+    return User(**user_data)
+
 # получение пользователя по ID
 async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
     return await session.get(User, user_id)
@@ -49,6 +72,7 @@ async def get_users(session: AsyncSession, skip: int = 0, limit: int = 100) -> l
 async def delete_user(session: AsyncSession, user_db: User):
     await session.delete(user_db)
     await session.commit()
+    await user_cache.invalidate(user_db.username)
 
 # аутентификация пользователя
 async def authenticate(session: AsyncSession, username: str, password: str) -> User | None:
@@ -0,0 +1,63 @@
+'''
+Бенчмарк задержки первых запросов после старта процесса.
+
+Запуск из корня проекта (нужна БД с примененными миграциями):
+python -m benchmarks.first_request --runs 5
+
+Каждый прогон - отдельный процесс: импортируем приложение, выполняем lifespan
+(с прогревом или без) и замеряем первый и второй запрос к нескольким эндпоинтам.
+'''
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+# запросы, которые выполняются сразу после старта
+REQUESTS = [
+    ('GET', '/products/1', {}),
+    ('POST', '/login/access-token', {'data': {'username': 'admin', 'password': 'wrong-password'}}),
+    ('GET', '/users/me', {'headers': {'Authorization': 'Bearer invalid'}}),
+]
+
+# один прогон внутри дочернего процесса
+def run_child(warmup: bool) -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    app = create_app(warmup=warmup)
+    result = {}
+    with TestClient(app) as client:
+        for attempt in ('first', 'second'):
+            for method, url, kwargs in REQUESTS:
+                start_time = perf_counter()
+                client.request(method, url, **kwargs)
+                result[f'{attempt} {method} {url}'] = (perf_counter() - start_time) * 1000
+    return result
+
+# запускаем прогоны в отдельных процессах и собираем медианы
+def run_parent(runs: int):
+    for warmup in (False, True):
+        samples: dict[str, list[float]] = {}
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.first_request', '--child', f'--warmup={int(warmup)}'],
+                capture_output=True, text=True, check=True
+            ).stdout
+            for name, value in json.loads(output.splitlines()[-1]).items():
+                samples.setdefault(name, []).append(value)
+        print(f'\nПрогрев {"включен" if warmup else "выключен"} (медиана по {runs} процессам):')
+        for name, values in samples.items():
+            print(f'  {name:45} {statistics.median(values):8.2f} мс')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', action='store_true')
+    parser.add_argument('--warmup', type=int, default=1)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_child(warmup=bool(args.warmup))))
+    else:
+        run_parent(args.runs)
\ No newline at end of file
@@ -0,0 +1,148 @@
+'''
+Бенчмарк времени старта приложения с бюджетом на регрессию.
+
+Запуск из корня проекта:
+python -m benchmarks.startup                    # отчет по времени импорта и первого ответа
+python -m benchmarks.startup --update-baseline  # сохранить текущие значения как базовые
+python -m benchmarks.startup --check            # код выхода 1, если старт стал медленнее бюджета
+
+Замеряется:
+- время импорта app.main (python -X importtime), с разбивкой по модулям и пакетам
+- время до первого ответа: импорт + lifespan (прогрев) + первый запрос, в отдельном процессе
+- эталон: время импорта самих фреймворков (FastAPI, SQLAlchemy) на этой же машине
+
+Бюджет проверяется по отношению к эталону, а не по миллисекундам: абсолютное время старта
+зависит от процессора и диска, поэтому базовые значения с одной машины не годятся для другой,
+а отношение "старт приложения / импорт фреймворков" от машины почти не зависит.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from time import perf_counter
+
+# файл с базовыми значениями
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'startup_baseline.json')
+# допустимое замедление относительно базовых значений (0.2 = на 20%)
+STARTUP_BUDGET = 0.2
+# модуль приложения, время импорта которого замеряем
+APP_MODULE = 'app.main'
+# модули эталонного замера: фреймворки, на которых построено приложение
+REFERENCE_MODULES = ('fastapi', 'sqlalchemy.ext.asyncio')
+
+# разбираем вывод python -X importtime: {модуль: (собственное время, время с зависимостями)} в мкс
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+# один замер времени импорта модулей в отдельном процессе
+def measure_import(*module_names: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {", ".join(module_names)}'],
+        capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+# эталон: время импорта фреймворков в мс (модули импортируются по очереди, поэтому время не пересекается)
+def measure_reference() -> float:
+    modules = measure_import(*REFERENCE_MODULES)
+    return sum(modules[name][1] for name in REFERENCE_MODULES) / 1000
+
+# замер времени до первого ответа внутри дочернего процесса
+def run_first_response_child():
+    start_time = perf_counter()
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    with TestClient(create_app()) as client:
+        client.get('/products/1')
+        print(json.dumps({'first_response_ms': (perf_counter() - start_time) * 1000}))
+
+# один замер времени до первого ответа в отдельном процессе
+def measure_first_response() -> float:
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup', '--child'],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])['first_response_ms']
+
+# печатаем самые тяжелые модули и пакеты верхнего уровня
+def print_import_report(modules: dict[str, tuple[int, int]], top: int):
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        packages[name.split('.')[0]] += self_us
+    print(f'\nСамые тяжелые пакеты (собственное время импорта всех модулей пакета):')
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f'  {name:40} {self_us / 1000:8.2f} мс')
+    print(f'\nСамые тяжелые модули (время с зависимостями):')
+    for name, (_, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:top]:
+        print(f'  {name:60} {cumulative_us / 1000:8.2f} мс')
+
+# проверяем, что отношения к эталону не вышли за бюджет относительно базовых
+def check_budget(ratios: dict[str, float], baseline: dict[str, float]) -> bool:
+    passed = True
+    for name, value in ratios.items():
+        limit = baseline[name] * (1 + STARTUP_BUDGET)
+        status = 'OK' if value <= limit else 'РЕГРЕССИЯ'
+        passed = passed and value <= limit
+        print(f'  {name:24} {value:6.2f} (базовое {baseline[name]:.2f}, предел {limit:.2f}) {status}')
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args()
+    if args.child:
+        run_first_response_child()
+        return
+
+    # в каждом прогоне эталон замеряется рядом с приложением, а отношение считается внутри прогона:
+    # так фоновая нагрузка на машину одинаково влияет на числитель и знаменатель
+    runs = []
+    for _ in range(args.runs):
+        reference_ms = measure_reference()
+        modules = measure_import(APP_MODULE)
+        runs.append({
+            'import_ms': modules[APP_MODULE][1] / 1000,
+            'first_response_ms': measure_first_response(),
+            'reference_ms': reference_ms,
+            'modules': modules,
+        })
+    current = {
+        name: statistics.median(run[name] for run in runs)
+        for name in ('import_ms', 'first_response_ms', 'reference_ms')
+    }
+    ratios = {
+        name.replace('_ms', '_ratio'): statistics.median(run[name] / run['reference_ms'] for run in runs)
+        for name in ('import_ms', 'first_response_ms')
+    }
+    print_import_report(runs[-1]['modules'], args.top)
+    print(f'\nМедиана по {args.runs} процессам:')
+    for name, value in current.items():
+        print(f'  {name:20} {value:8.2f} мс')
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+            json.dump(ratios, file, indent=4)
+        print(f'\nБазовые значения сохранены в {BASELINE_PATH}')
+    if args.check:
+        with open(BASELINE_PATH, encoding='utf-8') as file:
+            baseline = json.load(file)
+        print(f'\nПроверка бюджета (+{STARTUP_BUDGET:.0%} к базовым отношениям к эталону):')
+        if not check_budget(ratios, baseline):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
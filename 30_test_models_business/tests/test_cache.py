@@ -0,0 +1,119 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from app.core.cache import LRUCache, SQLiteCache, InvalidationBus, TwoLevelCache
+from app.models.products import Product, ProductCreate, ProductUpdate
+from app.repositories import products
+
+# тестируем вытеснение самой давно использованной записи
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats.as_dict() == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+# тестируем, что воркеры делят L2, а инвалидация на одном воркере доходит до L1 другого
+@pytest.mark.asyncio
+async def test_two_level_cache_shared_between_workers(tmp_path):
+    workers = []
+    for name in ('worker-a', 'worker-b'):
+        bus = InvalidationBus(directory=str(tmp_path / 'bus'), name=name)
+        bus.start()
+        l2 = SQLiteCache(path=str(tmp_path / 'l2.db'))
+        workers.append((bus, l2, TwoLevelCache('products', l2=l2, bus=bus)))
+    (bus_a, l2_a, cache_a), (bus_b, l2_b, cache_b) = workers
+    try:
+        await cache_a.set(1, {'name': 'Ноутбук'})
+        # воркер B не видел запись, но находит ее в общем L2 и кладет в свой L1
+        assert await cache_b.get(1) == {'name': 'Ноутбук'}
+        assert cache_b.stats()['l2']['hits'] == 1
+        assert await cache_b.get(1) == {'name': 'Ноутбук'}
+        assert cache_b.stats()['l1']['hits'] == 1
+
+        # воркер A обновил продукт - запись должна пропасть у обоих
+        await cache_a.invalidate(1)
+        deadline = time.monotonic() + 2
+        while cache_b.l1.get('1') is not None and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert await cache_b.get(1) is None
+        assert bus_b.received == 1
+    finally:
+        for bus, l2, _ in workers:
+            bus.stop()
+            l2.close()
+
+# тестируем, что некорректное сообщение не останавливает поток-слушатель шины
+def test_bus_skips_malformed_messages(tmp_path):
+    bus = InvalidationBus(directory=str(tmp_path / 'bus'), name='worker')
+    invalidated = []
+    bus.subscribe('products', invalidated.append)
+    bus.start()
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        for message in (b'not json', b'[1, 2]', b'{"namespace": "products"}', b'{"namespace": "products", "key": "1"}'):
+            sender.sendto(message, bus.path)
+        deadline = time.monotonic() + 2
+        while not invalidated and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert invalidated == ['1']
+        assert (bus.dropped, bus.received) == (3, 1)
+    finally:
+        sender.close()
+        bus.stop()
+
+# тестируем гонку чтения с обновлением: запрос прочитал продукт из базы до изменения,
+# а сохранить в кэш пытается после инвалидации - старые данные в кэш попасть не должны
+@pytest.mark.asyncio
+async def test_slow_read_does_not_cache_stale_product(session, tmp_path, monkeypatch):
+    l2 = SQLiteCache(path=str(tmp_path / 'l2.db'))
+    cache = TwoLevelCache('products', l2=l2, bus=None)
+    monkeypatch.setattr(products, 'product_cache', cache)
+    product = await products.create_product(session, ProductCreate(name='Ноутбук', price=55000))
+
+    read, release = asyncio.Event(), asyncio.Event()
+    async def slow_get_product_by_id(session, product_id):
+        stale = Product(id=product.id, name=product.name, price=product.price, in_stock=product.in_stock)
+        read.set()
+        await release.wait()
+        return stale
+    monkeypatch.setattr(products, 'get_product_by_id', slow_get_product_by_id)
+    try:
+        reading = asyncio.create_task(products.get_product_cached(session, product.id))
+        await read.wait()
+        await products.update_product(session, product, ProductUpdate(price=60000))
+        release.set()
+        assert (await reading)['price'] == 55000
+        # ни в L1, ни в L2 старой записи нет
+        assert cache.l1.get(str(product.id)) is None
+        assert l2.get('products', str(product.id)) is None
+    finally:
+        l2.close()
+
+# тестируем то же между воркерами (инвалидация по шине еще не дошла) и время жизни записи из L2:
+# L1 хранит ее не дольше, чем осталось жить в L2
+@pytest.mark.asyncio
+async def test_two_level_cache_versions_between_workers(tmp_path):
+    l2_a, l2_b = SQLiteCache(path=str(tmp_path / 'l2.db')), SQLiteCache(path=str(tmp_path / 'l2.db'))
+    cache_a = TwoLevelCache('products', l2=l2_a, bus=None)
+    cache_b = TwoLevelCache('products', l2=l2_b, bus=None)
+    try:
+        version = await cache_b.version(1)
+        await cache_a.invalidate(1)
+        assert await cache_b.set(1, {'price': 55000}, version) is False
+        assert await cache_b.get(1) is None
+
+        assert await cache_b.set(1, {'price': 60000}, await cache_b.version(1)) is True
+        l2_a._conn.execute('UPDATE cache SET expires_at = ?', (time.time() + 5,))
+        assert await cache_a.get(1) == {'price': 60000}
+        assert cache_a.l1._data['1'][0] - time.monotonic() <= 5
+    finally:
+        l2_a.close()
+        l2_b.close()
\ No newline at end of file
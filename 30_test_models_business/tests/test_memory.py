@@ -0,0 +1,35 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_superuser
+from app.api.routes import debug
+from app.core.memory import MemoryProfiler
+
+# тестируем, что сравнение снимков показывает место, где выросла память
+def test_snapshot_diff_shows_growth():
+    profiler = MemoryProfiler()
+    profiler.start()
+    try:
+        profiler.take_snapshot('before')
+        leak = [bytes(1024) for _ in range(1000)]
+        profiler.take_snapshot('after')
+        diff = profiler.diff('before', 'after', group_by='filename', limit=5)
+        stats = profiler.stats()
+    finally:
+        profiler.stop()
+    assert diff[0]['location'].startswith(__file__)
+    assert diff[0]['size_diff_kb'] >= 1000
+    assert stats['snapshots'] == ['before', 'after']
+    assert len(stats['gc_counts']) == 3
+    assert len(leak) == 1000
+
+# тестируем проверку group_by: значение должно совпадать целиком, иначе 422, а не ошибка tracemalloc
+def test_group_by_validation():
+    app = FastAPI()
+    app.include_router(debug.router)
+    app.dependency_overrides[get_current_superuser] = lambda: None
+    client = TestClient(app)
+    for group_by in ('xlinenoZZ', 'lineno|filename', ''):
+        assert client.get('/debug/memory/snapshots/missing', params={'group_by': group_by}).status_code == 422
+        assert client.get('/debug/memory/diff', params={'old': 'a', 'new': 'b', 'group_by': group_by}).status_code == 422
+    assert client.get('/debug/memory/snapshots/missing', params={'group_by': 'traceback'}).status_code == 404
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import pytest
+from loguru import logger
+
+from app.core.monitoring import LoopLagMonitor, LagHistogram, active_routes
+
+# тестируем раскладку задержек по корзинам гистограммы
+def test_lag_histogram_buckets():
+    histogram = LagHistogram(buckets_ms=(1, 10, 100))
+    for lag_ms in (0.5, 5, 5, 50, 500):
+        histogram.observe(lag_ms)
+    stats = histogram.as_dict()
+    assert stats['buckets_ms'] == {'<=1': 1, '<=10': 2, '<=100': 1, '>100': 1}
+    assert stats['count'] == 5
+    assert stats['max_ms'] == 500
+
+# тестируем, что блокирующий вызов в event loop попадает в лог вместе со стеком и маршрутом
+@pytest.mark.asyncio
+async def test_monitor_reports_blocking_call():
+    messages = []
+    sink_id = logger.add(messages.append, level='WARNING', format='{message}')
+    monitor = LoopLagMonitor(interval=0.01, threshold_ms=50)
+    monitor.start()
+
+    async def blocking_handler():
+        active_routes[asyncio.current_task()] = 'GET /slow'
+        try:
+            await asyncio.sleep(0.05)
+            # синхронный вызов, который держит event loop
+            time.sleep(0.3)
+        finally:
+            active_routes.pop(asyncio.current_task(), None)
+
+    try:
+        await asyncio.create_task(blocking_handler())
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+        logger.remove(sink_id)
+
+    assert monitor.stalls == 1
+    assert monitor.histogram.max_ms >= 200
+    assert 'GET /slow' in messages[0]
+    assert 'blocking_handler' in messages[0]
\ No newline at end of file
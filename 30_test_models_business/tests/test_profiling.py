@@ -0,0 +1,81 @@
+import asyncio
+import cProfile
+import threading
+import time
+
+import pytest
+
+from app.core import profiling
+from app.core.profiling import ProfilingMiddleware, StackSampler, format_top_functions, send_with_headers
+
+def slow_function():
+    time.sleep(0.05)
+
+# тестируем, что семплирующий профилировщик видит функцию, в которой поток проводит время
+def test_stack_sampler_collects_collapsed_stacks():
+    sampler = StackSampler(thread_id=threading.get_ident(), interval=0.001)
+    sampler.start()
+    slow_function()
+    sampler.stop()
+    collapsed = sampler.collapsed()
+    assert 'slow_function' in collapsed
+    # каждая строка - стек от корня к листу и количество семплов через пробел
+    stack, count = collapsed.splitlines()[0].rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+
+# тестируем таблицу самых тяжелых функций
+def test_format_top_functions():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    slow_function()
+    profiler.disable()
+    assert 'slow_function' in format_top_functions(profiler, limit=10)
+
+# тестируем добавление заголовков в ответ
+def test_send_with_headers():
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    wrapped = send_with_headers(send, {'X-Profile-Id': 'abc'})
+    asyncio.run(wrapped({'type': 'http.response.start', 'status': 200, 'headers': []}))
+    assert messages[0]['headers'] == [(b'x-profile-id', b'abc')]
+
+# тестируем изоляцию профиля: обычный запрос, пришедший во время профилирования, ждет его окончания,
+# а профилирование начинается после завершения уже начатого запроса
+@pytest.mark.asyncio
+async def test_profiled_request_runs_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILES_DIR', str(tmp_path))
+
+    async def is_superuser_token(authorization):
+        return True
+    monkeypatch.setattr(profiling, 'is_superuser_token', is_superuser_token)
+
+    events = []
+
+    async def app(scope, receive, send):
+        events.append(f"start {scope['path']}")
+        await asyncio.sleep(0.05)
+        events.append(f"end {scope['path']}")
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+
+    async def send(message):
+        pass
+
+    def request(path, profile=False):
+        headers = [(b'x-profile', b'1'), (b'authorization', b'Bearer t')] if profile else []
+        return {'type': 'http', 'method': 'GET', 'path': path, 'headers': headers}
+
+    middleware = ProfilingMiddleware(app)
+    before = asyncio.create_task(middleware(request('/before'), None, send))
+    await asyncio.sleep(0.01)
+    profiled = asyncio.create_task(middleware(request('/profiled', profile=True), None, send))
+    await asyncio.sleep(0.01)
+    after = asyncio.create_task(middleware(request('/after'), None, send))
+    await asyncio.gather(before, profiled, after)
+
+    assert events == [
+        'start /before', 'end /before', 'start /profiled', 'end /profiled', 'start /after', 'end /after'
+    ]
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == ['.collapsed', '.txt']
\ No newline at end of file